@@ -0,0 +1,56 @@
+"""Add hot-path indexes for ticket lists, dashboards and timelines
+
+Revision ID: a3f1c9d2b7e4
+Revises: 31a761281fa3
+Create Date: 2026-10-18 10:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3f1c9d2b7e4'
+down_revision: Union[str, Sequence[str], None] = '31a761281fa3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Enum columns store the member names
+ACTIVE_STATUSES = sa.text("status IN ('OPEN', 'IN_PROGRESS', 'WAITING_USER', 'REOPENED')")
+
+# (name, table, columns, extra create_index kwargs)
+INDEXES = [
+    ("ix_tickets_assigned_to_created", "tickets", ["assigned_to_id", sa.text("created_at DESC")], {}),
+    ("ix_tickets_created_by_created", "tickets", ["created_by_id", sa.text("created_at DESC")], {}),
+    ("ix_tickets_status_created", "tickets", ["status", sa.text("created_at DESC")], {}),
+    ("ix_tickets_priority", "tickets", ["priority"], {}),
+    ("ix_tickets_category_id", "tickets", ["category_id"], {}),
+    ("ix_tickets_created_at", "tickets", ["created_at"], {}),
+    ("ix_tickets_active_assigned", "tickets", ["assigned_to_id", "priority"],
+     {"postgresql_where": ACTIVE_STATUSES, "sqlite_where": ACTIVE_STATUSES}),
+    ("ix_ticket_activities_ticket_created", "ticket_activities", ["ticket_id", "created_at"], {}),
+    ("ix_ticket_activities_created_at", "ticket_activities", ["created_at"], {}),
+    ("ix_ticket_comments_ticket_created", "ticket_comments", ["ticket_id", "created_at"], {}),
+    ("ix_ticket_attachments_ticket_id", "ticket_attachments", ["ticket_id"], {}),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "postgresql":
+        # Build without blocking writes on the live tables
+        with op.get_context().autocommit_block():
+            for name, table, columns, kwargs in INDEXES:
+                op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True, **kwargs)
+    else:
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, **kwargs)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,29 @@
+"""Add updated_at to categories
+
+Revision ID: a9e4c7b2d316
+Revises: f3b8d6a1c925
+Create Date: 2026-10-19 00:41:17.264905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9e4c7b2d316'
+down_revision: Union[str, Sequence[str], None] = 'f3b8d6a1c925'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('categories', sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('categories') as batch_op:
+        batch_op.drop_column('updated_at')
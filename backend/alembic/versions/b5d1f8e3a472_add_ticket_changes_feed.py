@@ -0,0 +1,41 @@
+"""Add ticket tombstones and updated_at index for the changes feed
+
+Revision ID: b5d1f8e3a472
+Revises: a9e4c7b2d316
+Create Date: 2026-10-19 01:12:53.508214
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d1f8e3a472'
+down_revision: Union[str, Sequence[str], None] = 'a9e4c7b2d316'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tickets_updated_at', 'tickets', ['updated_at'])
+    op.create_table(
+        'ticket_tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('ticket_id', sa.Integer(), nullable=False),
+        sa.Column('reason', sa.String(length=20), nullable=False),
+        sa.Column('created_by_id', sa.Integer(), nullable=True),
+        sa.Column('assigned_to_id', sa.Integer(), nullable=True),
+        sa.Column('removed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ticket_tombstones_removed_at', 'ticket_tombstones', ['removed_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ticket_tombstones_removed_at', table_name='ticket_tombstones')
+    op.drop_table('ticket_tombstones')
+    op.drop_index('ix_tickets_updated_at', table_name='tickets')
@@ -0,0 +1,211 @@
+"""Add stored SLA deadlines and first response time to tickets
+
+Revision ID: b7d2e4f81c3a
+Revises: a3f1c9d2b7e4
+Create Date: 2026-10-18 14:03:27.518342
+
+"""
+import json
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Sequence, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d2e4f81c3a'
+down_revision: Union[str, Sequence[str], None] = 'a3f1c9d2b7e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+ACTIVE_STATUSES = sa.text("status IN ('OPEN', 'IN_PROGRESS', 'WAITING_USER', 'REOPENED')")
+
+BATCH_SIZE = 5000
+
+tickets = sa.table(
+    "tickets",
+    sa.column("id", sa.Integer),
+    sa.column("priority", sa.String),
+    sa.column("created_by_id", sa.Integer),
+    sa.column("created_at", sa.DateTime(timezone=True)),
+    sa.column("response_due_at", sa.DateTime(timezone=True)),
+    sa.column("resolve_due_at", sa.DateTime(timezone=True)),
+    sa.column("first_response_at", sa.DateTime(timezone=True)),
+)
+activities = sa.table(
+    "ticket_activities",
+    sa.column("ticket_id", sa.Integer),
+    sa.column("user_id", sa.Integer),
+    sa.column("created_at", sa.DateTime(timezone=True)),
+)
+system_settings = sa.table(
+    "system_settings",
+    sa.column("key", sa.String),
+    sa.column("value", sa.Text),
+)
+
+
+# Frozen copy of the SLA defaults and calendar arithmetic at this revision, so
+# the backfill does not change with the application code
+
+DEFAULT_TIMEZONE = "America/Sao_Paulo"
+
+DEFAULT_SLA = {
+    "low_priority_hours": 72,
+    "medium_priority_hours": 24,
+    "high_priority_hours": 8,
+    "urgent_priority_hours": 2,
+    "critical_priority_hours": 1,
+    "low_response_hours": 24,
+    "medium_response_hours": 8,
+    "high_response_hours": 4,
+    "urgent_response_hours": 1,
+    "critical_response_hours": 0.5,
+    "business_hours_only": False,
+    "business_start_hour": 8,
+    "business_end_hour": 18,
+    "business_days": [0, 1, 2, 3, 4],
+    "holidays": ["01-01", "04-21", "05-01", "09-07", "10-12", "11-02", "11-15", "11-20", "12-25"],
+}
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class _Calendar:
+    """Working-time addition over business hours, working days and holidays"""
+
+    def __init__(self, sla: Dict[str, Any], tz: str):
+        start_hour, end_hour = sla["business_start_hour"], sla["business_end_hour"]
+        if not 0 <= start_hour < end_hour <= 24:
+            start_hour, end_hour = 0, 24
+        self.opens = timedelta(hours=start_hour)
+        self.day_length = timedelta(hours=end_hour) - self.opens
+        self.workdays = frozenset(int(day) for day in sla["business_days"] or ()) or frozenset(range(7))
+        self.business_hours_only = bool(sla["business_hours_only"])
+        try:
+            self.tz = ZoneInfo(tz)
+        except (ZoneInfoNotFoundError, ValueError):
+            self.tz = timezone.utc
+        self.dates = set()
+        self.yearly = set()
+        for holiday in sla["holidays"] or ():
+            parts = [int(part) for part in str(holiday).split("-")]
+            if len(parts) == 3:
+                self.dates.add(date(*parts))
+            elif len(parts) == 2:
+                self.yearly.add((parts[0], parts[1]))
+
+    def _is_business_day(self, day: date) -> bool:
+        return day.weekday() in self.workdays and day not in self.dates and (day.month, day.day) not in self.yearly
+
+    def _opening(self, day: date) -> datetime:
+        return datetime(day.year, day.month, day.day, tzinfo=self.tz) + self.opens
+
+    def add_hours(self, start: datetime, hours: float) -> datetime:
+        start = _as_utc(start)
+        if not self.business_hours_only:
+            return start + timedelta(hours=hours)
+        remaining = timedelta(hours=hours)
+        current = start.astimezone(self.tz)
+        day = current.date()
+        while True:
+            if self._is_business_day(day):
+                opens = self._opening(day)
+                current = max(current, opens)
+                available = opens + self.day_length - current
+                if available > timedelta(0):
+                    if remaining <= available:
+                        return (current + remaining).astimezone(timezone.utc)
+                    remaining -= available
+            day += timedelta(days=1)
+            current = self._opening(day)
+
+
+def _stored_value(value: str) -> Any:
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+
+def _due_dates(connection):
+    """Function of (stored priority, created_at) to both deadlines, from the settings at migration time"""
+    stored = {
+        key: _stored_value(value)
+        for key, value in connection.execute(sa.select(system_settings.c.key, system_settings.c.value))
+    }
+    sla = {name: stored.get(f"sla.{name}", default) for name, default in DEFAULT_SLA.items()}
+    calendar = _Calendar(sla, stored.get("general.timezone", DEFAULT_TIMEZONE))
+
+    def due_dates(priority: str, created_at: datetime):
+        # Enum columns store the member names (LOW, ...); settings use the values
+        name = priority.lower()
+        response = sla.get(f"{name}_response_hours")
+        resolve = sla.get(f"{name}_priority_hours")
+        return (
+            calendar.add_hours(created_at, float(response)) if response is not None else None,
+            calendar.add_hours(created_at, float(resolve)) if resolve is not None else None,
+        )
+
+    return due_dates
+
+
+def _backfill(connection):
+    due_dates = _due_dates(connection)
+
+    update = tickets.update().where(tickets.c.id == sa.bindparam("_id")).values(
+        response_due_at=sa.bindparam("_response_due_at"),
+        resolve_due_at=sa.bindparam("_resolve_due_at"),
+    )
+    rows = connection.execute(
+        sa.select(tickets.c.id, tickets.c.priority, tickets.c.created_at)
+        .where(tickets.c.created_at.isnot(None))
+        .order_by(tickets.c.id)
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+    batch = []
+    for ticket_id, priority, created_at in rows:
+        response_due_at, resolve_due_at = due_dates(priority, created_at)
+        batch.append({"_id": ticket_id, "_response_due_at": response_due_at, "_resolve_due_at": resolve_due_at})
+        if len(batch) >= BATCH_SIZE:
+            connection.execute(update, batch)
+            batch = []
+    if batch:
+        connection.execute(update, batch)
+
+    # First activity by someone other than the requester
+    first_response = sa.select(sa.func.min(activities.c.created_at)).where(
+        activities.c.ticket_id == tickets.c.id,
+        activities.c.user_id != tickets.c.created_by_id
+    ).scalar_subquery()
+    connection.execute(tickets.update().values(first_response_at=first_response))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tickets', sa.Column('response_due_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('tickets', sa.Column('resolve_due_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('tickets', sa.Column('first_response_at', sa.DateTime(timezone=True), nullable=True))
+
+    _backfill(op.get_bind())
+
+    op.create_index(
+        'ix_tickets_active_resolve_due', 'tickets', ['resolve_due_at'],
+        postgresql_where=ACTIVE_STATUSES, sqlite_where=ACTIVE_STATUSES
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tickets_active_resolve_due', table_name='tickets', if_exists=True)
+    with op.batch_alter_table('tickets') as batch_op:
+        batch_op.drop_column('first_response_at')
+        batch_op.drop_column('resolve_due_at')
+        batch_op.drop_column('response_due_at')
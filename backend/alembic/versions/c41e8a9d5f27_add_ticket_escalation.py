@@ -0,0 +1,31 @@
+"""Add automatic escalation state to tickets
+
+Revision ID: c41e8a9d5f27
+Revises: b7d2e4f81c3a
+Create Date: 2026-10-18 16:48:09.730115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e8a9d5f27'
+down_revision: Union[str, Sequence[str], None] = 'b7d2e4f81c3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tickets', sa.Column('escalation_level', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('tickets', sa.Column('escalated_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('tickets') as batch_op:
+        batch_op.drop_column('escalated_at')
+        batch_op.drop_column('escalation_level')
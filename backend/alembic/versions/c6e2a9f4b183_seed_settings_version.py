@@ -0,0 +1,46 @@
+"""Seed the settings cache version row
+
+Revision ID: c6e2a9f4b183
+Revises: b5d1f8e3a472
+Create Date: 2026-10-19 09:41:07.215630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e2a9f4b183'
+down_revision: Union[str, Sequence[str], None] = 'b5d1f8e3a472'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSION_KEY = "_meta.version"
+
+system_settings = sa.table(
+    "system_settings",
+    sa.column("key", sa.String),
+    sa.column("value", sa.Text),
+    sa.column("description", sa.Text),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Settings writers lock this row; it used to be created by the first write
+    connection = op.get_bind()
+    exists = connection.execute(
+        sa.select(system_settings.c.key).where(system_settings.c.key == VERSION_KEY)
+    ).first()
+    if exists is None:
+        op.bulk_insert(system_settings, [
+            {"key": VERSION_KEY, "value": "0", "description": "Settings cache version"}
+        ])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The row is harmless on the previous revision, which also reads it
+    pass
@@ -0,0 +1,49 @@
+"""Allow ticket activities without a user (automatic actions)
+
+Revision ID: d2f7b4c9e061
+Revises: c6e2a9f4b183
+Create Date: 2026-10-19 11:26:44.908317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f7b4c9e061'
+down_revision: Union[str, Sequence[str], None] = 'c6e2a9f4b183'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+activities = sa.table(
+    "ticket_activities",
+    sa.column("ticket_id", sa.Integer),
+    sa.column("user_id", sa.Integer),
+    sa.column("action", sa.String),
+)
+tickets = sa.table(
+    "tickets",
+    sa.column("id", sa.Integer),
+    sa.column("created_by_id", sa.Integer),
+    sa.column("assigned_to_id", sa.Integer),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('ticket_activities') as batch_op:
+        batch_op.alter_column('user_id', existing_type=sa.Integer(), nullable=True)
+    # Automatic escalations were logged under the assignee or the requester
+    op.execute(activities.update().where(activities.c.action == "escalated").values(user_id=None))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    owner = sa.select(sa.func.coalesce(tickets.c.assigned_to_id, tickets.c.created_by_id)).where(
+        tickets.c.id == activities.c.ticket_id
+    ).scalar_subquery()
+    op.execute(activities.update().where(activities.c.user_id.is_(None)).values(user_id=owner))
+    with op.batch_alter_table('ticket_activities') as batch_op:
+        batch_op.alter_column('user_id', existing_type=sa.Integer(), nullable=False)
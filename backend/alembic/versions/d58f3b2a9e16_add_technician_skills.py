@@ -0,0 +1,37 @@
+"""Add technician category skills
+
+Revision ID: d58f3b2a9e16
+Revises: c41e8a9d5f27
+Create Date: 2026-10-18 18:12:44.207391
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd58f3b2a9e16'
+down_revision: Union[str, Sequence[str], None] = 'c41e8a9d5f27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'technician_skills',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'category_id')
+    )
+    op.create_index('ix_technician_skills_category_id', 'technician_skills', ['category_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_technician_skills_category_id', table_name='technician_skills')
+    op.drop_table('technician_skills')
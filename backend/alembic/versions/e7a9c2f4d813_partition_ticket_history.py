@@ -0,0 +1,130 @@
+"""Partition ticket activities and comments by month
+
+Revision ID: e7a9c2f4d813
+Revises: d58f3b2a9e16
+Create Date: 2026-10-18 23:31:05.804211
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a9c2f4d813'
+down_revision: Union[str, Sequence[str], None] = 'd58f3b2a9e16'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copy of the DDL in app.services.partitions as of this revision; later
+# months are created by the workers and the maintenance command
+PARTITIONED_TABLES = ("ticket_activities", "ticket_comments")
+MONTHS_AHEAD = 3
+
+
+def _month_start(value: datetime, months: int = 0) -> datetime:
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _is_partitioned(connection, table: str) -> bool:
+    return connection.execute(
+        sa.text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"), {"table": table}
+    ).first() is not None
+
+
+def _create_partition(connection, table: str, month: datetime):
+    upper = _month_start(month, 1)
+    connection.execute(sa.text(
+        f"CREATE TABLE {table}_y{month.year}m{month.month:02d} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+    ))
+
+
+def _restore_keys_and_indexes(connection, table: str, foreign_keys, indexes):
+    for foreign_key in foreign_keys:
+        ondelete = foreign_key.get("options", {}).get("ondelete")
+        connection.execute(sa.text(
+            f"ALTER TABLE {table} ADD FOREIGN KEY ({', '.join(foreign_key['constrained_columns'])}) "
+            f"REFERENCES {foreign_key['referred_table']} ({', '.join(foreign_key['referred_columns'])})"
+            + (f" ON DELETE {ondelete}" if ondelete else "")
+        ))
+    for index in indexes:
+        connection.execute(sa.text(f"CREATE INDEX {index['name']} ON {table} ({', '.join(index['column_names'])})"))
+
+
+def _partition_table(connection, table: str):
+    if _is_partitioned(connection, table):
+        return
+
+    inspector = sa.inspect(connection)
+    columns = [column["name"] for column in inspector.get_columns(table)]
+    indexes = [index for index in inspector.get_indexes(table) if not index.get("unique")]
+    foreign_keys = inspector.get_foreign_keys(table)
+    legacy = f"{table}_unpartitioned"
+
+    connection.execute(sa.text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+    connection.execute(sa.text(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE"))
+    connection.execute(sa.text(
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)"
+    ))
+    connection.execute(sa.text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+
+    # Every month from the oldest row on, so the copy leaves DEFAULT empty
+    oldest = connection.execute(sa.text(f"SELECT min(created_at) FROM {legacy}")).scalar()
+    current = _month_start(datetime.now(timezone.utc))
+    month = _month_start(oldest) if oldest is not None else current
+    while month <= _month_start(current, MONTHS_AHEAD):
+        _create_partition(connection, table, month)
+        month = _month_start(month, 1)
+
+    selected = ", ".join("COALESCE(created_at, now())" if column == "created_at" else column for column in columns)
+    connection.execute(sa.text(f"INSERT INTO {table} ({', '.join(columns)}) SELECT {selected} FROM {legacy}"))
+    connection.execute(sa.text(f"DROP TABLE {legacy}"))
+
+    # The partition key has to be part of the primary key
+    connection.execute(sa.text(f"ALTER TABLE {table} ADD PRIMARY KEY (id, created_at)"))
+    connection.execute(sa.text(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id"))
+    _restore_keys_and_indexes(connection, table, foreign_keys, indexes)
+
+
+def _unpartition_table(connection, table: str):
+    if not _is_partitioned(connection, table):
+        return
+
+    inspector = sa.inspect(connection)
+    indexes = [index for index in inspector.get_indexes(table) if not index.get("unique")]
+    foreign_keys = inspector.get_foreign_keys(table)
+    partitioned = f"{table}_partitioned"
+
+    connection.execute(sa.text(f"ALTER TABLE {table} RENAME TO {partitioned}"))
+    connection.execute(sa.text(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE"))
+    connection.execute(sa.text(f"CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS)"))
+    connection.execute(sa.text(f"INSERT INTO {table} SELECT * FROM {partitioned}"))
+    connection.execute(sa.text(f"DROP TABLE {partitioned}"))
+
+    connection.execute(sa.text(f"ALTER TABLE {table} ADD PRIMARY KEY (id)"))
+    connection.execute(sa.text(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id"))
+    _restore_keys_and_indexes(connection, table, foreign_keys, indexes)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    connection = op.get_bind()
+    if connection.dialect.name == "postgresql":
+        # Rows are copied into the new monthly partitions; indexes, keys and
+        # ids are carried over
+        for table in PARTITIONED_TABLES:
+            _partition_table(connection, table)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    connection = op.get_bind()
+    if connection.dialect.name == "postgresql":
+        for table in PARTITIONED_TABLES:
+            _unpartition_table(connection, table)
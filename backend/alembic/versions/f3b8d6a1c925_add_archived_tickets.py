@@ -0,0 +1,58 @@
+"""Add archived tickets
+
+Revision ID: f3b8d6a1c925
+Revises: e7a9c2f4d813
+Create Date: 2026-10-19 00:02:41.093318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d6a1c925'
+down_revision: Union[str, Sequence[str], None] = 'e7a9c2f4d813'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# The enum types already exist on PostgreSQL (tickets table)
+STATUS = postgresql.ENUM(
+    'OPEN', 'IN_PROGRESS', 'WAITING_USER', 'RESOLVED', 'CLOSED', 'REOPENED', name='ticketstatus', create_type=False
+)
+PRIORITY = postgresql.ENUM('LOW', 'MEDIUM', 'HIGH', 'URGENT', 'CRITICAL', name='ticketpriority', create_type=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'archived_tickets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('solution', sa.Text(), nullable=True),
+        sa.Column('status', STATUS, nullable=False),
+        sa.Column('priority', PRIORITY, nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('created_by_id', sa.Integer(), nullable=False),
+        sa.Column('assigned_to_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('closed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_archived_tickets_created_by_created', 'archived_tickets', ['created_by_id', sa.text('created_at DESC')])
+    op.create_index('ix_archived_tickets_assigned_to_created', 'archived_tickets', ['assigned_to_id', sa.text('created_at DESC')])
+    op.create_index('ix_archived_tickets_created_at', 'archived_tickets', ['created_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_archived_tickets_created_at', table_name='archived_tickets')
+    op.drop_index('ix_archived_tickets_assigned_to_created', table_name='archived_tickets')
+    op.drop_index('ix_archived_tickets_created_by_created', table_name='archived_tickets')
+    op.drop_table('archived_tickets')
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
 from app.core.database import get_db
 from app.core.deps import get_current_user, get_current_admin
+from app.core.http_cache import etag_matches, not_modified, set_etag, weak_etag
 from app.models.models import Category, User
 from app.schemas.schemas import Category as CategorySchema, CategoryCreate, CategoryUpdate
 
@@ -11,6 +13,8 @@ router = APIRouter()
 
 @router.get("/", response_model=List[CategorySchema])
 async def get_categories(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     is_active: Optional[str] = Query(None),
@@ -20,6 +24,19 @@ async def get_categories(
 ):
     """Get categories list"""
     
+    # Any change to the table changes the watermark
+    count, max_id, last_change = db.query(
+        func.count(Category.id), func.max(Category.id),
+        func.max(func.coalesce(Category.updated_at, Category.created_at))
+    ).one()
+    etag = weak_etag(
+        "categories", count, max_id, last_change, current_user.role.lower() == "admin",
+        skip, limit, is_active, search
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    
     query = db.query(Category)
     
     # Apply filters
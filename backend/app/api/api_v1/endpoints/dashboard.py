@@ -1,21 +1,30 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, extract
+from starlette.concurrency import run_in_threadpool
 from datetime import datetime, timedelta
 from typing import Optional
+import asyncio
+import json
 
-from app.core.database import get_db
-from app.core.deps import get_current_active_user
+from app.core.config import settings
+from app.core.database import SessionLocal, get_read_db
+from app.core.deps import get_current_active_user, get_user_from_token_param
 from app.models.models import Ticket, TicketStatus, TicketPriority, Category, User, UserRole, TicketActivity
 from app.schemas.schemas import DashboardStats
+from app.services.dashboard_counters import Stream, dashboard_counters, scope_for
 
 router = APIRouter()
 
+# Window searched first for the dashboard's recent activity
+RECENT_ACTIVITY_DAYS = 30
+
 @router.get("/stats", response_model=DashboardStats)
 async def get_dashboard_stats(
     days: int = Query(30, ge=1, le=365),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get dashboard statistics"""
     
@@ -158,7 +167,7 @@ async def get_dashboard_stats(
     tickets_by_category = dict(category_stats)
     
     # Recent activities (last 10) - apply role-based filtering
-    activities_query = db.query(TicketActivity).join(
+    activities_query = db.query(TicketActivity).outerjoin(
         User, TicketActivity.user_id == User.id
     ).join(
         Ticket, TicketActivity.ticket_id == Ticket.id
@@ -173,9 +182,17 @@ async def get_dashboard_stats(
     elif user_role_str == "user":
         activities_query = activities_query.filter(Ticket.created_by_id == current_user.id)
     
-    recent_activities = activities_query.order_by(
-        TicketActivity.created_at.desc()
-    ).limit(10).all()
+    activities_query = activities_query.order_by(TicketActivity.created_at.desc())
+    if date_filter is True:
+        # Activity is partitioned by month: look at the last weeks first and
+        # only read the whole history when they hold fewer than 10 entries
+        recent_activities = activities_query.filter(
+            TicketActivity.created_at >= datetime.utcnow() - timedelta(days=RECENT_ACTIVITY_DAYS)
+        ).limit(10).all()
+        if len(recent_activities) < 10:
+            recent_activities = activities_query.limit(10).all()
+    else:
+        recent_activities = activities_query.limit(10).all()
     
     return DashboardStats(
         total_tickets=total_tickets,
@@ -190,11 +207,57 @@ async def get_dashboard_stats(
         recent_activities=recent_activities
     )
 
+def _stream_user(request: Request) -> User:
+    # Not a dependency: the session would stay checked out for the whole stream
+    db = SessionLocal()
+    try:
+        user = get_user_from_token_param(request, db)
+        db.expunge(user)
+        return user
+    finally:
+        db.close()
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def _counter_events(stream: Stream, counts: dict):
+    try:
+        yield "retry: 5000\n"
+        yield _sse("snapshot", await dashboard_counters.payload(counts))
+        while not stream.overflowed:
+            try:
+                delta = await asyncio.wait_for(stream.queue.get(), settings.DASHBOARD_STREAM_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            yield _sse("delta", await dashboard_counters.payload(delta))
+        # Fell too far behind: the browser reconnects and gets a new snapshot
+    finally:
+        dashboard_counters.unsubscribe(stream)
+
+
+@router.get("/stream")
+async def stream_dashboard_counters(request: Request):
+    """Server-Sent Events with the ticket counters of the user's dashboard (token query parameter)"""
+    if not dashboard_counters.running:
+        raise HTTPException(status_code=503, detail="Dashboard stream disabled")
+    
+    current_user = await run_in_threadpool(_stream_user, request)
+    stream, counts = await dashboard_counters.subscribe(scope_for(current_user))
+    return StreamingResponse(
+        _counter_events(stream, counts),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/tickets-by-month")
 async def get_tickets_by_month(
     months: int = Query(12, ge=1, le=24),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get tickets count by month"""
     
@@ -251,7 +314,7 @@ async def get_tickets_by_month(
 async def get_technician_performance(
     days: int = Query(30, ge=1, le=365),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get technician performance statistics"""
     
@@ -313,7 +376,7 @@ async def get_technician_performance(
 async def get_priority_trends(
     days: int = Query(30, ge=1, le=365),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get priority trends over time"""
     
@@ -7,7 +7,7 @@ from sqlalchemy import and_, func, desc
 from typing import List, Optional
 from datetime import datetime, timedelta
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.deps import get_current_user, get_current_admin, get_current_technician
 from app.models.models import (
     TicketEvaluation, Ticket, User, UserRole, TicketStatus
@@ -186,7 +186,7 @@ async def get_evaluations(
     date_from: Optional[str] = Query(None),
     date_to: Optional[str] = Query(None),
     current_user: User = Depends(get_current_technician),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get evaluations list (technicians and admins only)"""
     
@@ -235,7 +235,7 @@ async def get_satisfaction_metrics(
     days: int = Query(30, ge=1, le=365),
     technician_id: Optional[int] = Query(None),
     current_user: User = Depends(get_current_technician),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get satisfaction metrics"""
     
@@ -308,7 +308,7 @@ async def get_satisfaction_metrics(
 async def get_technician_satisfaction_metrics(
     days: int = Query(30, ge=1, le=365),
     current_user: User = Depends(get_current_technician),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get satisfaction metrics by technician"""
     
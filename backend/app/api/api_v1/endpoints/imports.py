@@ -0,0 +1,88 @@
+import os
+import shutil
+import uuid
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
+from fastapi.responses import FileResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.deps import get_current_admin
+from app.models.models import User
+from app.services.importer import IMPORT_ENTITIES, IMPORT_FORMATS
+from app.services.jobs import COMPLETED, JobLimitError, job_queue, public_view
+
+router = APIRouter()
+
+FORMAT_EXTENSIONS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+
+def _get_import_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None or job["kind"] != "import":
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+def _save_upload(file: UploadFile, path: str):
+    with open(path, "wb") as target:
+        shutil.copyfileobj(file.file, target, 1024 * 1024)
+
+
+@router.post("/{entity}", status_code=202)
+async def create_import_job(
+    entity: str,
+    file: UploadFile = File(...),
+    format: Optional[str] = Form(None),
+    current_user: User = Depends(get_current_admin)
+):
+    """Queue a CSV or NDJSON file of tickets or users to be imported in the background"""
+
+    if entity not in IMPORT_ENTITIES:
+        raise HTTPException(status_code=404, detail="Unknown import entity")
+    if format is None:
+        format = FORMAT_EXTENSIONS.get(os.path.splitext(file.filename or "")[1].lower())
+    if format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Invalid import format")
+
+    # Streamed to disk: import files can be far larger than memory allows
+    os.makedirs(settings.JOB_DIR, exist_ok=True)
+    upload = f"{uuid.uuid4().hex}.upload"
+    await run_in_threadpool(_save_upload, file, os.path.join(settings.JOB_DIR, upload))
+
+    params = {"entity": entity, "format": format, "upload": upload, "source": file.filename}
+    try:
+        job = await job_queue.submit("import", params, current_user.id)
+    except JobLimitError:
+        os.remove(os.path.join(settings.JOB_DIR, upload))
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many active jobs (limit {job_queue.max_active_per_user})"
+        )
+
+    return {
+        **public_view(job),
+        'status_url': f"/api/v1/imports/jobs/{job['id']}",
+        'errors_url': f"/api/v1/imports/jobs/{job['id']}/errors"
+    }
+
+@router.get("/jobs")
+def list_import_jobs(current_user: User = Depends(get_current_admin)):
+    """List the current user's import jobs"""
+    return [public_view(job) for job in job_queue.list_for_user(current_user.id) if job["kind"] == "import"]
+
+@router.get("/jobs/{job_id}")
+def get_import_job(job_id: str, current_user: User = Depends(get_current_admin)):
+    """Get the status and row counts of an import job"""
+    return public_view(_get_import_job(job_id))
+
+@router.get("/jobs/{job_id}/errors")
+def download_import_errors(job_id: str, current_user: User = Depends(get_current_admin)):
+    """Download the row-level error report of a finished import"""
+
+    job = _get_import_job(job_id)
+    if job["status"] != COMPLETED:
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+
+    return FileResponse(job["result_path"], media_type=job["media_type"], filename=job["filename"])
@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+import json
+import os
+
+from app.core.config import settings
+from app.core.deps import get_current_admin
+from app.core.profiling import profile_path
+from app.models.models import User
+
+router = APIRouter()
+
+@router.get("/")
+async def list_profiles(
+    limit: int = 50,
+    current_user: User = Depends(get_current_admin)
+):
+    """List stored request profiles, newest first (admin only)"""
+    if not os.path.isdir(settings.PROFILE_DIR):
+        return []
+    
+    summaries = [
+        os.path.join(settings.PROFILE_DIR, name)
+        for name in os.listdir(settings.PROFILE_DIR)
+        if name.endswith(".json")
+    ]
+    summaries.sort(key=os.path.getmtime, reverse=True)
+    
+    result = []
+    for path in summaries[:limit]:
+        with open(path) as summary_file:
+            summary = json.load(summary_file)
+        summary.pop("sql_statements", None)
+        result.append(summary)
+    return result
+
+@router.get("/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    current_user: User = Depends(get_current_admin)
+):
+    """Get the summary and SQL statement timings of a profile (admin only)"""
+    path = profile_path(profile_id, "json")
+    if not path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    
+    with open(path) as summary_file:
+        return json.load(summary_file)
+
+@router.get("/{profile_id}/folded")
+async def download_folded_stacks(
+    profile_id: str,
+    current_user: User = Depends(get_current_admin)
+):
+    """Download collapsed stacks of a profile for flamegraph tools (admin only)"""
+    path = profile_path(profile_id, "folded")
+    if not path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found"
+        )
+    
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.folded")
@@ -1,27 +1,46 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query, Request, Response
 from fastapi.responses import FileResponse, StreamingResponse
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import and_, or_, desc, func
-from typing import List, Optional
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, joinedload, aliased
+from sqlalchemy import and_, or_, delete, desc, func, select, update
+from typing import List, Optional, Tuple
 import os
 import uuid
-from datetime import datetime
-from app.core.database import get_db
+from datetime import datetime, timezone
+from app.core.database import get_db, get_read_db
 from app.core.deps import get_current_user, get_current_technician, get_user_from_token_param
+from app.core.http_cache import etag_matches, not_modified, set_etag, weak_etag
 from app.models.models import (
     Ticket, TicketComment, TicketAttachment, TicketActivity, 
-    TicketEvaluation, User, Category, UserRole, TicketStatus, TicketPriority
+    TicketEvaluation, User, Category, UserRole, TicketStatus, TicketPriority,
+    ACTIVE_TICKET_FILTER
 )
 from app.schemas.schemas import (
-    Ticket as TicketSchema, TicketCreate, TicketUpdate, 
-    CommentCreate, TicketFilters
+    Ticket as TicketSchema, TicketCreate, TicketCreated, TicketUpdate, 
+    CommentCreate, TicketFilters, SimilarTicket, SolutionSuggestion,
+    TicketBulkUpdate, TicketBulkResult
 )
 from app.core.config import settings
+from app.services import activity, report_export, ticket_changes
+from app.services.archive import archive_service
+from app.services.assignment import assignment_engine
+from app.services.partitions import history_since
+from app.services.settings_service import settings_service
+from app.services.similarity import similarity_index
+from app.services.solutions import solution_index
+from app.services.sla import sla_service
+from app.services.ticket_events import CREATED, DELETED, UPDATED, snapshot, ticket_events
 from app.websocket.notifications import notification_service
 
 
 router = APIRouter()
 
+# Possible duplicates attached to a newly created ticket
+SUGGESTED_DUPLICATES = 5
+
+# Solution matches ranked per suggestion returned to a user, who only sees their own tickets
+USER_SOLUTION_POOL = 20
+
 
 @router.get("/test")
 async def test_endpoint():
@@ -45,18 +64,116 @@ async def get_simple_tickets(db: Session = Depends(get_db)):
     ]
 
 
-def create_activity(db: Session, ticket_id: int, user_id: int, action: str, description: str, old_value: str = None, new_value: str = None):
-    """Create ticket activity log"""
-    activity = TicketActivity(
-        ticket_id=ticket_id,
-        user_id=user_id,
-        action=action,
-        description=description,
-        old_value=old_value,
-        new_value=new_value
-    )
-    db.add(activity)
-    return activity
+def filter_tickets(
+    query,
+    current_user: User,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    category_id: Optional[int] = None,
+    assigned_to_id: Optional[int] = None,
+    created_by_id: Optional[int] = None,
+    search: Optional[str] = None
+):
+    """Apply role visibility and list filters to a ticket Query or select()"""
+    # Filter based on user role - FIXED: Added proper enum handling
+    user_role = current_user.role
+    if isinstance(user_role, str):
+        user_role_str = user_role.lower()
+    else:
+        user_role_str = user_role.value.lower()
+    
+    if user_role_str == "user":
+        # Users can only see their own tickets
+        query = query.filter(Ticket.created_by_id == current_user.id)
+    elif user_role_str == "technician":
+        # Technicians can only see tickets assigned to them
+        query = query.filter(Ticket.assigned_to_id == current_user.id)
+    # Admin can see all tickets (no additional filter)
+    
+    # Apply filters
+    if status and status.strip():
+        query = query.filter(Ticket.status == status)
+    
+    if priority and priority.strip():
+        query = query.filter(Ticket.priority == priority)
+    
+    if category_id:
+        query = query.filter(Ticket.category_id == category_id)
+    
+    if assigned_to_id:
+        query = query.filter(Ticket.assigned_to_id == assigned_to_id)
+    
+    if created_by_id and user_role_str in ["technician", "admin"]:
+        query = query.filter(Ticket.created_by_id == created_by_id)
+    
+    if search and search.strip():
+        search_filter = or_(
+            Ticket.title.ilike(f"%{search}%"),
+            Ticket.description.ilike(f"%{search}%"),
+            Ticket.solution.ilike(f"%{search}%")
+        )
+        query = query.filter(search_filter)
+    
+    return query
+
+
+def ticket_list_item(ticket: Ticket) -> dict:
+    """Ticket as listed by GET /tickets/ (creator, assignee and category loaded)"""
+    # Safe enum value extraction
+    status_value = "unknown"
+    priority_value = "unknown"
+    
+    try:
+        if hasattr(ticket.status, 'value'):
+            status_value = ticket.status.value.lower()
+        else:
+            status_value = str(ticket.status).lower()
+    except:
+        status_value = "unknown"
+    
+    try:
+        if hasattr(ticket.priority, 'value'):
+            priority_value = ticket.priority.value.lower()
+        else:
+            priority_value = str(ticket.priority).lower()
+    except:
+        priority_value = "unknown"
+    
+    return {
+        "id": ticket.id,
+        "title": ticket.title or "",
+        "description": ticket.description or "",
+        "status": status_value,
+        "priority": priority_value,
+        "category_id": ticket.category_id,
+        "created_by_id": ticket.created_by_id,
+        "assigned_to_id": ticket.assigned_to_id,
+        "created_at": ticket.created_at.isoformat() if ticket.created_at else None,
+        "updated_at": ticket.updated_at.isoformat() if ticket.updated_at else None,
+        "resolved_at": ticket.resolved_at.isoformat() if ticket.resolved_at else None,
+        "closed_at": ticket.closed_at.isoformat() if ticket.closed_at else None,
+        "first_response_at": ticket.first_response_at.isoformat() if ticket.first_response_at else None,
+        "response_due_at": ticket.response_due_at.isoformat() if ticket.response_due_at else None,
+        "resolve_due_at": ticket.resolve_due_at.isoformat() if ticket.resolve_due_at else None,
+        "solution": ticket.solution or "",
+        "created_by": {
+            "id": ticket.created_by.id,
+            "username": ticket.created_by.username,
+            "full_name": ticket.created_by.full_name,
+            "email": ticket.created_by.email
+        } if ticket.created_by else None,
+        "assigned_to": {
+            "id": ticket.assigned_to.id,
+            "username": ticket.assigned_to.username,
+            "full_name": ticket.assigned_to.full_name,
+            "email": ticket.assigned_to.email
+        } if ticket.assigned_to else None,
+        "category": {
+            "id": ticket.category.id,
+            "name": ticket.category.name,
+            "color": ticket.category.color
+        } if ticket.category else None
+    }
 
 
 @router.get("/", response_model=List[dict])
@@ -70,7 +187,7 @@ async def get_tickets(
     created_by_id: Optional[int] = Query(None),
     search: Optional[str] = Query(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get tickets with filters"""
     
@@ -81,106 +198,17 @@ async def get_tickets(
             joinedload(Ticket.category)
         )
         
-        # Filter based on user role - FIXED: Added proper enum handling
-        user_role = current_user.role
-        if isinstance(user_role, str):
-            user_role_str = user_role.lower()
-        else:
-            user_role_str = user_role.value.lower()
-        
-        if user_role_str == "user":
-            # Users can only see their own tickets
-            query = query.filter(Ticket.created_by_id == current_user.id)
-        elif user_role_str == "technician":
-            # Technicians can only see tickets assigned to them
-            query = query.filter(Ticket.assigned_to_id == current_user.id)
-        # Admin can see all tickets (no additional filter)
-        
-        # Apply filters
-        if status and status.strip():
-            query = query.filter(Ticket.status == status)
-        
-        if priority and priority.strip():
-            query = query.filter(Ticket.priority == priority)
-        
-        if category_id:
-            query = query.filter(Ticket.category_id == category_id)
-        
-        if assigned_to_id:
-            query = query.filter(Ticket.assigned_to_id == assigned_to_id)
-        
-        if created_by_id and user_role_str in ["technician", "admin"]:
-            query = query.filter(Ticket.created_by_id == created_by_id)
-        
-        if search and search.strip():
-            search_filter = or_(
-                Ticket.title.ilike(f"%{search}%"),
-                Ticket.description.ilike(f"%{search}%"),
-                Ticket.solution.ilike(f"%{search}%")
-            )
-            query = query.filter(search_filter)
+        query = filter_tickets(
+            query, current_user, status, priority, category_id, assigned_to_id, created_by_id, search
+        )
         
         # Order by creation date (newest first)
         query = query.order_by(desc(Ticket.created_at))
         
         tickets = query.offset(skip).limit(limit).all()
         
-        # Convert enum values to strings for frontend compatibility - FIXED: Added safe attribute access
-        result = []
-        for ticket in tickets:
-            # Safe enum value extraction
-            status_value = "unknown"
-            priority_value = "unknown"
-            
-            try:
-                if hasattr(ticket.status, 'value'):
-                    status_value = ticket.status.value.lower()
-                else:
-                    status_value = str(ticket.status).lower()
-            except:
-                status_value = "unknown"
-            
-            try:
-                if hasattr(ticket.priority, 'value'):
-                    priority_value = ticket.priority.value.lower()
-                else:
-                    priority_value = str(ticket.priority).lower()
-            except:
-                priority_value = "unknown"
-            
-            ticket_dict = {
-                "id": ticket.id,
-                "title": ticket.title or "",
-                "description": ticket.description or "",
-                "status": status_value,
-                "priority": priority_value,
-                "category_id": ticket.category_id,
-                "created_by_id": ticket.created_by_id,
-                "assigned_to_id": ticket.assigned_to_id,
-                "created_at": ticket.created_at.isoformat() if ticket.created_at else None,
-                "updated_at": ticket.updated_at.isoformat() if ticket.updated_at else None,
-                "resolved_at": ticket.resolved_at.isoformat() if ticket.resolved_at else None,
-                "closed_at": ticket.closed_at.isoformat() if ticket.closed_at else None,
-                "solution": ticket.solution or "",
-                "created_by": {
-                    "id": ticket.created_by.id,
-                    "username": ticket.created_by.username,
-                    "full_name": ticket.created_by.full_name,
-                    "email": ticket.created_by.email
-                } if ticket.created_by else None,
-                "assigned_to": {
-                    "id": ticket.assigned_to.id,
-                    "username": ticket.assigned_to.username,
-                    "full_name": ticket.assigned_to.full_name,
-                    "email": ticket.assigned_to.email
-                } if ticket.assigned_to else None,
-                "category": {
-                    "id": ticket.category.id,
-                    "name": ticket.category.name,
-                    "color": ticket.category.color
-                } if ticket.category else None
-            }
-            result.append(ticket_dict)
+        # Convert enum values to strings for frontend compatibility
+        result = [ticket_list_item(ticket) for ticket in tickets]
         
         return result
         
@@ -195,30 +223,339 @@ async def get_tickets(
         return []
 
 
+@router.get("/changes", response_model=dict)
+async def get_ticket_changes(
+    since: Optional[datetime] = Query(None, description="Watermark returned by the previous call"),
+    limit: int = Query(500, ge=1, le=1000),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Tickets created, updated or removed from the user's list since a watermark"""
+    
+    # Read on the primary: a replica's clock and lag would make the watermark unsafe
+    now = ticket_changes.database_now(db)
+    if since is None:
+        return {"watermark": now.isoformat(), "tickets": [], "deleted": [], "resync": False}
+    if ticket_changes.is_expired(since, now):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Watermark expired; reload the ticket list"
+        )
+    
+    start = ticket_changes.window_start(since)
+    query = db.query(Ticket).options(
+        joinedload(Ticket.created_by),
+        joinedload(Ticket.assigned_to),
+        joinedload(Ticket.category)
+    ).filter(or_(Ticket.updated_at >= start, Ticket.created_at >= start))
+    tickets = filter_tickets(query, current_user).order_by(Ticket.id).limit(limit + 1).all()
+    if len(tickets) > limit:
+        return {"watermark": now.isoformat(), "tickets": [], "deleted": [], "resync": True}
+    
+    return {
+        "watermark": now.isoformat(),
+        "tickets": [ticket_list_item(ticket) for ticket in tickets],
+        "deleted": ticket_changes.removed_since(db, current_user, start),
+        "resync": False
+    }
+
+
+TICKET_EXPORT_COLUMNS = [
+    "id", "title", "status", "priority", "category", "created_by", "assigned_to",
+    "created_at", "updated_at", "resolved_at", "closed_at",
+    "first_response_at", "response_due_at", "resolve_due_at", "resolution_hours", "sla_breached"
+]
+
+
+def _iter_ticket_export_rows(statement, bind):
+    """Rows for the ticket export, read through a server-side cursor"""
+    now_aware = datetime.now(timezone.utc)
+    now_naive = datetime.utcnow()
+    with bind.connect() as connection:
+        result = connection.execution_options(yield_per=settings.EXPORT_BATCH_SIZE).execute(statement)
+        for (ticket_id, title, status, priority, category, created_by, assigned_to,
+             created_at, updated_at, resolved_at, closed_at,
+             first_response_at, response_due_at, resolve_due_at) in result:
+            end = resolved_at or closed_at
+            resolution_hours = None
+            if created_at is not None and end is not None:
+                resolution_hours = round((end - created_at).total_seconds() / 3600, 2)
+            sla_breached = None
+            if resolve_due_at is not None:
+                if end is None:
+                    end = now_aware if resolve_due_at.tzinfo else now_naive
+                sla_breached = end > resolve_due_at
+            yield (
+                ticket_id, title,
+                status.value if status else None,
+                priority.value if priority else None,
+                category, created_by, assigned_to,
+                created_at, updated_at, resolved_at, closed_at,
+                first_response_at, response_due_at, resolve_due_at,
+                resolution_hours, sla_breached
+            )
+
+
+@router.get("/export")
+async def export_tickets(
+    format: str = Query("csv", description="Export format: csv, xlsx"),
+    status: Optional[str] = Query(None),
+    priority: Optional[str] = Query(None),
+    category_id: Optional[int] = Query(None),
+    assigned_to_id: Optional[int] = Query(None),
+    created_by_id: Optional[int] = Query(None),
+    search: Optional[str] = Query(None),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Stream the tickets visible to the user as CSV or XLSX"""
+    if format not in report_export.EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Invalid export format")
+    
+    creator = aliased(User)
+    assignee = aliased(User)
+    statement = select(
+        Ticket.id, Ticket.title, Ticket.status, Ticket.priority,
+        Category.name.label("category"),
+        creator.full_name.label("created_by"),
+        assignee.full_name.label("assigned_to"),
+        Ticket.created_at, Ticket.updated_at, Ticket.resolved_at, Ticket.closed_at,
+        Ticket.first_response_at, Ticket.response_due_at, Ticket.resolve_due_at
+    ).join(
+        creator, Ticket.created_by_id == creator.id
+    ).outerjoin(
+        assignee, Ticket.assigned_to_id == assignee.id
+    ).outerjoin(
+        Category, Ticket.category_id == Category.id
+    )
+    statement = filter_tickets(
+        statement, current_user, status, priority, category_id, assigned_to_id, created_by_id, search
+    ).order_by(desc(Ticket.created_at))
+    
+    filename = f"tickets-{datetime.now().strftime('%Y-%m-%d')}.{format}"
+    return StreamingResponse(
+        report_export.stream_rows(
+            TICKET_EXPORT_COLUMNS, _iter_ticket_export_rows(statement, db.get_bind()), format, "Tickets"
+        ),
+        media_type=report_export.MEDIA_TYPES[format],
+        headers=report_export.attachment_headers(filename)
+    )
+
+
+def similar_tickets(
+    db: Session,
+    current_user: User,
+    matches: List[Tuple[int, float]],
+    limit: int,
+    active_only: bool = False
+) -> List[SimilarTicket]:
+    """Visible tickets among similarity matches, best first"""
+    if not matches:
+        return []
+    scores = dict(matches)
+    query = db.query(
+        Ticket.id, Ticket.title, Ticket.status, Ticket.priority,
+        Ticket.category_id, Ticket.assigned_to_id, Ticket.created_at
+    ).filter(Ticket.id.in_(list(scores)))
+    
+    user_role = current_user.role
+    user_role_str = user_role.lower() if isinstance(user_role, str) else user_role.value.lower()
+    if user_role_str == "user":
+        query = query.filter(Ticket.created_by_id == current_user.id)
+    if active_only:
+        query = query.filter(ACTIVE_TICKET_FILTER)
+    
+    rows = sorted(query.all(), key=lambda row: (-scores[row.id], row.id))[:limit]
+    return [SimilarTicket(**row._asdict(), similarity=scores[row.id]) for row in rows]
+
+
+@router.get("/similar", response_model=List[SimilarTicket])
+def find_similar_tickets(
+    title: str = Query(..., min_length=1),
+    description: Optional[str] = Query(None),
+    limit: int = Query(SUGGESTED_DUPLICATES, ge=1, le=50),
+    active_only: bool = Query(True),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Find tickets similar to a text, to check for duplicates before creating one"""
+    if not settings.SIMILARITY_INDEX:
+        return []
+    matches = similarity_index.similar(title, description)
+    return similar_tickets(db, current_user, matches, limit, active_only)
+
+
+@router.get("/solutions", response_model=List[SolutionSuggestion])
+def suggest_solutions(
+    title: str = Query(..., min_length=1),
+    description: Optional[str] = Query(None),
+    limit: int = Query(5, ge=1, le=20),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Suggest solutions of resolved tickets for a problem being reported"""
+    if not settings.SOLUTION_INDEX:
+        return []
+    user_role = current_user.role
+    user_role_str = user_role.lower() if isinstance(user_role, str) else user_role.value.lower()
+    # Users only see their own tickets: look further down the ranking for them
+    own_only = user_role_str == "user"
+    matches = solution_index.search(title, description, limit * USER_SOLUTION_POOL if own_only else limit)
+    if not matches:
+        return []
+    scores = dict(matches)
+    query = db.query(
+        Ticket.id, Ticket.title, Ticket.solution, Ticket.category_id, Ticket.resolved_at
+    ).filter(Ticket.id.in_(list(scores)))
+    if own_only:
+        query = query.filter(Ticket.created_by_id == current_user.id)
+    rows = sorted(query.all(), key=lambda row: (-scores[row.id], row.id))[:limit]
+    return [
+        SolutionSuggestion(
+            ticket_id=row.id, title=row.title, solution=row.solution,
+            category_id=row.category_id, resolved_at=row.resolved_at, score=scores[row.id]
+        )
+        for row in rows if row.solution
+    ]
+
+
+@router.get("/archive", response_model=List[dict])
+def search_archived_tickets(
+    search: Optional[str] = Query(None),
+    category_id: Optional[int] = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Search archived tickets"""
+    return [
+        {
+            "id": archived.id,
+            "title": archived.title or "",
+            "status": archived.status.value,
+            "priority": archived.priority.value,
+            "category_id": archived.category_id,
+            "created_by_id": archived.created_by_id,
+            "assigned_to_id": archived.assigned_to_id,
+            "created_at": archived.created_at.isoformat() if archived.created_at else None,
+            "closed_at": archived.closed_at.isoformat() if archived.closed_at else None,
+            "archived_at": archived.archived_at.isoformat() if archived.archived_at else None
+        }
+        for archived in archive_service.search(db, current_user, search, category_id, skip, limit)
+    ]
+
+
+def get_archived_ticket(db: Session, ticket_id: int, current_user: User) -> dict:
+    """Full document of an archived ticket the user may see"""
+    found = archive_service.get(db, ticket_id)
+    if found is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ticket not found"
+        )
+    archived, document = found
+    if current_user.role.value.lower() == "user" and archived.created_by_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    document["archived"] = True
+    document["archived_at"] = archived.archived_at.isoformat() if archived.archived_at else None
+    return document
+
+
+@router.get("/{ticket_id}/similar", response_model=List[SimilarTicket])
+def get_similar_tickets(
+    ticket_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    active_only: bool = Query(False),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get possible duplicates of a ticket"""
+    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
+    if not ticket:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Ticket not found"
+        )
+    
+    user_role = current_user.role
+    user_role_str = user_role.lower() if isinstance(user_role, str) else user_role.value.lower()
+    if user_role_str == "user" and ticket.created_by_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    if not settings.SIMILARITY_INDEX:
+        return []
+    matches = similarity_index.similar(ticket.title, ticket.description, exclude_id=ticket.id)
+    return similar_tickets(db, current_user, matches, limit, active_only)
+
+
+def ticket_etag(db: Session, ticket_id: int) -> Optional[Tuple[str, int]]:
+    """ETag of a ticket's detail view and its creator id, from one row; None if not found"""
+    creator = aliased(User)
+    assignee = aliased(User)
+    row = db.execute(
+        select(
+            *Ticket.__table__.c,
+            Category.updated_at, creator.updated_at, assignee.updated_at,
+            select(func.count(TicketAttachment.id)).where(TicketAttachment.ticket_id == Ticket.id).scalar_subquery(),
+            select(func.max(TicketAttachment.id)).where(TicketAttachment.ticket_id == Ticket.id).scalar_subquery()
+        ).outerjoin(
+            Category, Ticket.category_id == Category.id
+        ).outerjoin(
+            creator, Ticket.created_by_id == creator.id
+        ).outerjoin(
+            assignee, Ticket.assigned_to_id == assignee.id
+        ).where(Ticket.id == ticket_id)
+    ).first()
+    if row is None:
+        return None
+    # The ticket's own columns are hashed as read, so updates within the
+    # resolution of updated_at still change the tag
+    return weak_etag("ticket", *row), row.created_by_id
+
+
 @router.get("/{ticket_id}", response_model=dict)
 async def get_ticket(
     ticket_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get specific ticket"""
     
+    # Unchanged tickets are answered from the watermark row alone
+    found = ticket_etag(db, ticket_id)
+    if found is not None:
+        etag, created_by_id = found
+        can_view = current_user.role.value.lower() != "user" or created_by_id == current_user.id
+        if can_view and etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+    
     try:
+        # Comments and activities are served by their own endpoints, bounded by
+        # the ticket's creation so only the partitions since then are read
         ticket = db.query(Ticket).options(
             joinedload(Ticket.created_by),
             joinedload(Ticket.assigned_to),
             joinedload(Ticket.category),
-            joinedload(Ticket.comments).joinedload(TicketComment.user),
             joinedload(Ticket.attachments),
-            joinedload(Ticket.activities).joinedload(TicketActivity.user),
             joinedload(Ticket.evaluation)
         ).filter(Ticket.id == ticket_id).first()
         
         if not ticket:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Ticket not found"
-            )
+            # Old closed tickets are read from the archive
+            document = get_archived_ticket(db, ticket_id, current_user)
+            document.pop("comments")
+            document.pop("activities")
+            return document
         
         # Check permissions - FIXED: Safe role comparison
         user_role = current_user.role
@@ -257,6 +594,9 @@ async def get_ticket(
             "updated_at": ticket.updated_at.isoformat() if ticket.updated_at else None,
             "resolved_at": ticket.resolved_at.isoformat() if ticket.resolved_at else None,
             "closed_at": ticket.closed_at.isoformat() if ticket.closed_at else None,
+            "first_response_at": ticket.first_response_at.isoformat() if ticket.first_response_at else None,
+            "response_due_at": ticket.response_due_at.isoformat() if ticket.response_due_at else None,
+            "resolve_due_at": ticket.resolve_due_at.isoformat() if ticket.resolve_due_at else None,
             "solution": ticket.solution or "",
             "created_by": {
                 "id": ticket.created_by.id,
@@ -305,7 +645,7 @@ async def get_ticket(
         )
 
 
-@router.post("/", response_model=TicketSchema)
+@router.post("/", response_model=TicketCreated)
 async def create_ticket(
     ticket: TicketCreate,
     current_user: User = Depends(get_current_user),
@@ -331,17 +671,17 @@ async def create_ticket(
         created_by_id=current_user.id,
         status=TicketStatus.OPEN
     )
+    sla_service.apply(db, db_ticket)
+    
+    # Unassigned tickets go to the least loaded technician
+    if db_ticket.assigned_to_id is None and settings_service.get(db, "permissions.auto_assign_tickets"):
+        db_ticket.assigned_to_id = assignment_engine.choose(db, db_ticket.category_id)
     
     db.add(db_ticket)
+    activity.record(db, db_ticket, current_user.id, "created", f"Ticket criado: {ticket.title}")
     db.commit()
     db.refresh(db_ticket)
-    
-    # Create activity log
-    create_activity(
-        db, db_ticket.id, current_user.id, 
-        "created", f"Ticket criado: {ticket.title}"
-    )
-    db.commit()
+    ticket_events.publish(CREATED, db_ticket)
     
     # Send notification for new ticket
     await notification_service.notify_ticket_created(db_ticket, current_user)
@@ -363,7 +703,129 @@ async def create_ticket(
         joinedload(Ticket.evaluation)
     ).filter(Ticket.id == db_ticket.id).first()
     
-    return ticket_with_relations
+    response = TicketCreated.model_validate(ticket_with_relations)
+    if settings.SIMILARITY_INDEX:
+        matches = await run_in_threadpool(
+            similarity_index.similar, db_ticket.title, db_ticket.description, db_ticket.id
+        )
+        response.suggested_duplicates = similar_tickets(
+            db, current_user, matches, SUGGESTED_DUPLICATES, active_only=True
+        )
+    
+    return response
+
+
+@router.post("/bulk", response_model=TicketBulkResult)
+async def bulk_update_tickets(
+    bulk: TicketBulkUpdate,
+    current_user: User = Depends(get_current_technician),
+    db: Session = Depends(get_db)
+):
+    """Apply one change set to many tickets (technicians and admins only)"""
+    
+    update_data = bulk.dict(exclude_unset=True, exclude={'ticket_ids'})
+    if not update_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No changes given"
+        )
+    
+    if update_data.get('assigned_to_id') is not None:
+        assignee = db.query(User.id).filter(
+            User.id == update_data['assigned_to_id'],
+            User.is_active == True,
+            User.role.in_([UserRole.technician, UserRole.admin])
+        ).first()
+        if not assignee:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Assignee not found"
+            )
+    
+    # Every target ticket in one query
+    ticket_ids = list(dict.fromkeys(bulk.ticket_ids))
+    tickets = db.query(Ticket).filter(Ticket.id.in_(ticket_ids)).all()
+    missing = set(ticket_ids) - {ticket.id for ticket in tickets}
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Tickets not found: {sorted(missing)}"
+        )
+    
+    # Per-ticket changes feed the activity log; the UPDATE itself is set-based
+    previous = {}
+    deadlines = []
+    policy = sla_service.get_policy(db) if 'priority' in update_data else None
+    for ticket in tickets:
+        changes = []
+        for field, new_value in update_data.items():
+            old_value = getattr(ticket, field)
+            if old_value == new_value:
+                continue
+            changes.append({
+                'field': field,
+                'old_value': str(old_value) if old_value else None,
+                'new_value': str(new_value) if new_value else None
+            })
+            if field == 'priority':
+                response_due_at, resolve_due_at = policy.due_dates(
+                    new_value, ticket.created_at or datetime.now(timezone.utc)
+                )
+                deadlines.append({'id': ticket.id, 'response_due_at': response_due_at, 'resolve_due_at': resolve_due_at})
+        if changes:
+            previous[ticket.id] = snapshot(ticket)
+            activity.record_changes(db, ticket.id, current_user.id, changes)
+    
+    changed_ids = list(previous)
+    if changed_ids:
+        # Database clock, as the changes feed watermark
+        values = dict(update_data, updated_at=func.now())
+        db.execute(
+            update(Ticket).where(Ticket.id.in_(changed_ids)).values(**values)
+            .execution_options(synchronize_session=False)
+        )
+        # Resolution and closing times only move for tickets entering that status
+        new_status = update_data.get('status')
+        stamp = {TicketStatus.RESOLVED: 'resolved_at', TicketStatus.CLOSED: 'closed_at'}.get(new_status)
+        entering = [ticket_id for ticket_id, before in previous.items() if before['status'] != new_status]
+        if stamp and entering:
+            db.execute(
+                update(Ticket).where(Ticket.id.in_(entering)).values({stamp: datetime.utcnow()})
+                .execution_options(synchronize_session=False)
+            )
+        if deadlines:
+            # Deadlines depend on each creation time: executemany by primary key
+            db.execute(update(Ticket), deadlines)
+        if 'assigned_to_id' in update_data:
+            ticket_changes.record_removals(db, [
+                ticket_changes.removal(ticket_id, ticket_changes.REASSIGNED, assigned_to_id=before['assigned_to_id'])
+                for ticket_id, before in previous.items()
+                if before['assigned_to_id'] is not None and before['assigned_to_id'] != update_data['assigned_to_id']
+            ])
+        # Any change by staff counts as a response
+        db.execute(
+            update(Ticket)
+            .where(
+                Ticket.id.in_(changed_ids),
+                Ticket.first_response_at.is_(None),
+                Ticket.created_by_id != current_user.id
+            )
+            .values(first_response_at=datetime.now(timezone.utc), updated_at=func.now())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        
+        updated = db.query(Ticket).filter(Ticket.id.in_(changed_ids)).all()
+        for ticket in updated:
+            ticket_events.publish(UPDATED, ticket, previous[ticket.id])
+        
+        await notification_service.notify_tickets_bulk_updated(updated, update_data, current_user)
+    
+    return TicketBulkResult(
+        updated=len(changed_ids),
+        unchanged=len(ticket_ids) - len(changed_ids),
+        ticket_ids=changed_ids
+    )
 
 
 @router.put("/{ticket_id}", response_model=TicketSchema)
@@ -436,6 +898,7 @@ async def update_ticket(
     
     # Track changes for activity log and notifications
     changes = []
+    previous = snapshot(ticket)
     old_status = ticket.status
     old_assigned_to_id = ticket.assigned_to_id
     
@@ -450,35 +913,30 @@ async def update_ticket(
                 })
                 setattr(ticket, field, new_value)
     
+    # Deadlines follow the priority; any change by staff counts as a response
+    if any(change['field'] == 'priority' for change in changes):
+        sla_service.apply(db, ticket)
+    if changes:
+        sla_service.record_response(ticket, current_user)
+    
     # Handle status changes
-    if 'status' in update_data:
-        if update_data['status'] == TicketStatus.RESOLVED:
+    if ticket.status != old_status:
+        if ticket.status == TicketStatus.RESOLVED:
             ticket.resolved_at = datetime.utcnow()
-        elif update_data['status'] == TicketStatus.CLOSED:
+        elif ticket.status == TicketStatus.CLOSED:
             ticket.closed_at = datetime.utcnow()
     
-    ticket.updated_at = datetime.utcnow()
-    
-    # Create activity logs for changes
-    for change in changes:
-        field_names = {
-            'status': 'Status',
-            'priority': 'Prioridade',
-            'assigned_to_id': 'Responsável',
-            'title': 'Título',
-            'description': 'Descrição',
-            'solution': 'Solução'
-        }
-        field_name = field_names.get(change['field'], change['field'])
-        
-        create_activity(
-            db, ticket.id, current_user.id,
-            "updated", f"{field_name} alterado",
-            change['old_value'], change['new_value']
-        )
+    # Database clock, as the changes feed watermark
+    ticket.updated_at = func.now()
     
+    activity.record_changes(db, ticket, current_user.id, changes)
+    if old_assigned_to_id is not None and ticket.assigned_to_id != old_assigned_to_id:
+        ticket_changes.record_removals(db, [
+            ticket_changes.removal(ticket.id, ticket_changes.REASSIGNED, assigned_to_id=old_assigned_to_id)
+        ])
     db.commit()
     db.refresh(ticket)
+    ticket_events.publish(UPDATED, ticket, previous)
     
     # Send notifications for changes
     if old_status != ticket.status:
@@ -553,18 +1011,14 @@ async def add_comment(
             ticket_id=ticket_id,
             user_id=current_user.id
         )
+        sla_service.record_response(ticket, current_user)
         
         db.add(db_comment)
-        db.commit()
-        db.refresh(db_comment)
-        
-        # Create activity log
         comment_type = "comentário interno" if comment.is_internal else "comentário"
-        create_activity(
-            db, ticket_id, current_user.id,
-            "commented", f"Adicionou {comment_type}"
-        )
+        activity.record(db, ticket_id, current_user.id, "commented", f"Adicionou {comment_type}")
         db.commit()
+        db.refresh(db_comment)
+        ticket_events.publish(UPDATED, ticket)
         
         # Send notification for new comment (only for non-internal comments or to technicians)
         if not comment.is_internal:
@@ -589,18 +1043,15 @@ async def add_comment(
 @router.get("/{ticket_id}/comments")
 async def get_ticket_comments(
     ticket_id: int,
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get comments for a specific ticket"""
     
     try:
-        ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
-        if not ticket:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Ticket not found"
-            )
+        ticket = db.query(Ticket.id, Ticket.created_by_id, Ticket.created_at).filter(Ticket.id == ticket_id).first()
         
         # Check permissions - FIXED: Safe role comparison
         user_role = current_user.role
@@ -609,6 +1060,12 @@ async def get_ticket_comments(
         else:
             user_role_str = user_role.value.lower()
         
+        if not ticket:
+            comments = get_archived_ticket(db, ticket_id, current_user)["comments"]
+            if user_role_str == "user":
+                comments = [comment for comment in comments if not comment["is_internal"]]
+            return comments
+        
         can_view = (
             user_role_str in ["technician", "admin"] or
             ticket.created_by_id == current_user.id
@@ -620,16 +1077,28 @@ async def get_ticket_comments(
                 detail="Not enough permissions"
             )
         
-        # Get comments with user information
-        comments_query = db.query(TicketComment).options(
-            joinedload(TicketComment.user)
-        ).filter(TicketComment.ticket_id == ticket_id)
-        
+        comment_filters = [
+            TicketComment.ticket_id == ticket_id,
+            TicketComment.created_at >= history_since(ticket.created_at)
+        ]
         # Filter internal comments for regular users
         if user_role_str == "user":
-            comments_query = comments_query.filter(TicketComment.is_internal == False)
+            comment_filters.append(TicketComment.is_internal == False)
+        
+        # Edited comments move their updated_at; author names and roles, the users' one
+        watermark = db.query(
+            func.count(TicketComment.id), func.max(TicketComment.id),
+            func.max(TicketComment.updated_at), func.max(User.updated_at)
+        ).join(User, TicketComment.user_id == User.id).filter(*comment_filters).one()
+        etag = weak_etag("comments", ticket_id, user_role_str == "user", *watermark)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
         
-        comments = comments_query.order_by(TicketComment.created_at).all()
+        # Get comments with user information
+        comments = db.query(TicketComment).options(
+            joinedload(TicketComment.user)
+        ).filter(*comment_filters).order_by(TicketComment.created_at).all()
         
         # Convert to dict format - FIXED: Safe attribute access
         result = []
@@ -753,13 +1222,7 @@ async def upload_attachment(
     )
     
     db.add(attachment)
-    
-    # Create activity log
-    create_activity(
-        db, ticket_id, current_user.id,
-        "attachment", f"Anexou arquivo: {file.filename}"
-    )
-    
+    activity.record(db, ticket_id, current_user.id, "attachment", f"Anexou arquivo: {file.filename}")
     db.commit()
     db.refresh(attachment)
     
@@ -887,9 +1350,22 @@ async def delete_ticket(
             except OSError:
                 pass  # File might already be deleted
     
-    # Delete ticket (cascade will handle related records)
+    # History rows are deleted up front, bounded by the ticket's creation so
+    # only the partitions since then are scanned; the cascade handles the rest
+    for model in (TicketActivity, TicketComment):
+        db.execute(
+            delete(model)
+            .where(model.ticket_id == ticket.id, model.created_at >= history_since(ticket.created_at))
+            .execution_options(synchronize_session=False)
+        )
+    
+    ticket_changes.record_removals(db, [
+        ticket_changes.removal(ticket.id, ticket_changes.DELETED, ticket.created_by_id, ticket.assigned_to_id)
+    ])
+    previous = snapshot(ticket)
     db.delete(ticket)
     db.commit()
+    ticket_events.publish(DELETED, ticket, previous)
     
     # Send notification
     await notification_service.send_system_notification(
@@ -1,19 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Body, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
+import logging
 from app.core.database import get_db
 from app.core.deps import get_current_user, get_current_admin, get_current_technician
 from app.core.security import get_password_hash
-from app.models.models import User as UserModel, UserRole
-from app.schemas.schemas import UserCreate, UserUpdate, User as UserSchema, ProfileUpdate
+from app.models.models import User as UserModel, UserRole, Category
+from app.schemas.schemas import (
+    UserCreate, UserUpdate, User as UserSchema, ProfileUpdate,
+    Category as CategorySchema, TechnicianSkillsUpdate
+)
+from app.services.assignment import assignment_engine
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# Check if router has global dependencies
-print(f"=== ROUTER DEPENDENCIES DEBUG ===")
-print(f"Router dependencies: {getattr(router, 'dependencies', 'None')}")
-print(f"Router prefix: {getattr(router, 'prefix', 'None')}")
-print(f"Router tags: {getattr(router, 'tags', 'None')}")
+router = APIRouter()
 
 @router.get("/", response_model=List[UserSchema])
 async def get_users(
@@ -86,7 +87,7 @@ async def get_technicians(
         return filtered_technicians
         
     except Exception as e:
-        print(f"Error in get_technicians: {str(e)}")
+        logger.error("Error in get_technicians: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error fetching technicians: {str(e)}"
@@ -153,6 +154,7 @@ async def create_user(
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    assignment_engine.reset()
     
     return db_user
 
@@ -185,9 +187,67 @@ async def update_user(
     
     db.commit()
     db.refresh(user)
+    assignment_engine.reset()
     
     return user
 
+@router.get("/{user_id}/skills", response_model=List[CategorySchema])
+async def get_user_skills(
+    user_id: int,
+    current_user: UserSchema = Depends(get_current_technician),
+    db: Session = Depends(get_db)
+):
+    """Get the categories a technician handles"""
+    
+    user = db.query(UserModel).filter(UserModel.id == user_id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    if user.role != UserRole.technician:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User is not a technician"
+        )
+    
+    return user.skills
+
+@router.put("/{user_id}/skills", response_model=List[CategorySchema])
+async def update_user_skills(
+    user_id: int,
+    skills: TechnicianSkillsUpdate,
+    current_user: UserSchema = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+):
+    """Set the categories a technician handles (admin only)"""
+    
+    user = db.query(UserModel).filter(UserModel.id == user_id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    if user.role != UserRole.technician:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User is not a technician"
+        )
+    
+    category_ids = set(skills.category_ids)
+    categories = db.query(Category).filter(Category.id.in_(category_ids)).all() if category_ids else []
+    if len(categories) != len(category_ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Category not found"
+        )
+    
+    user.skills = categories
+    db.commit()
+    assignment_engine.reset()
+    
+    return user.skills
+
 @router.put("/profile")
 async def update_profile(
     profile_data: ProfileUpdate,
@@ -196,22 +256,12 @@ async def update_profile(
 ):
     """Update current user profile"""
     
-    print(f"=== USERS.PY PROFILE UPDATE ENDPOINT CALLED ===")
-    print(f"Current user: {current_user.username} (ID: {current_user.id})")
-    print(f"User active: {current_user.is_active}")
-    print(f"User role: {current_user.role}")
-    print(f"Profile data: {profile_data.dict(exclude_unset=True)}")
-    print(f"This should be the CORRECT endpoint being called")
-    
     try:
         # Get the actual user from database
         user = db.query(UserModel).filter(UserModel.id == current_user.id).first()
         if not user:
-            print(f"✗ User not found in database: ID {current_user.id}")
             raise HTTPException(status_code=404, detail="User not found")
         
-        print(f"Database user found: {user.username}, active: {user.is_active}")
-        
         # Convert ProfileUpdate to dict, excluding None values
         update_data = profile_data.dict(exclude_unset=True)
         
@@ -221,18 +271,13 @@ async def update_profile(
         
         for field, value in update_data.items():
             if field in allowed_fields and hasattr(user, field):
-                old_value = getattr(user, field)
                 setattr(user, field, value)
                 updated_fields.append(field)
-                print(f"✓ Updated {field}: '{old_value}' -> '{value}'")
         
         if updated_fields:
-            print(f"Committing changes for fields: {updated_fields}")
             db.commit()
             db.refresh(user)
-            print("✓ Database commit successful")
-        else:
-            print("No fields to update")
+            logger.debug("Profile of user %s updated: %s", user.id, updated_fields)
         
         response_data = {
             "message": "Profile updated successfully" if updated_fields else "No changes detected",
@@ -251,11 +296,12 @@ async def update_profile(
             }
         }
         
-        print(f"✓ Returning response: {response_data}")
         return response_data
         
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"✗ Exception occurred: {str(e)}")
+        logger.exception("Error updating profile of user %s", current_user.id)
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
@@ -282,6 +328,7 @@ async def deactivate_user(
     
     user.is_active = False
     db.commit()
+    assignment_engine.reset()
     
     return {"message": "User deactivated successfully"}
 
@@ -302,6 +349,7 @@ async def activate_user(
     
     user.is_active = True
     db.commit()
+    assignment_engine.reset()
     
     return {"message": "User activated successfully"}
 
@@ -329,5 +377,6 @@ async def delete_user(
     
     db.delete(user)
     db.commit()
+    assignment_engine.reset()
     
     return {"message": "User deleted successfully"}
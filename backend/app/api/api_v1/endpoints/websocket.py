@@ -1,11 +1,12 @@
 """
 WebSocket endpoints para notificações em tempo real
 """
+from typing import Optional
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.core.deps import get_db
-from app.websocket.manager import manager
-from app.models.models import User
+from app.websocket.manager import JSON, manager, negotiate_encoding
+from app.models.models import User, UserRole
 from app.core.security import verify_token
 import logging
 import json
@@ -46,27 +47,33 @@ async def get_user_from_websocket_token(token: str, db: Session) -> User:
 async def websocket_endpoint(
     websocket: WebSocket,
     token: str = Query(...),
+    encoding: Optional[str] = Query(None),
     db: Session = Depends(get_db)
 ):
-    """Endpoint principal do WebSocket para notificações"""
+    """Endpoint principal do WebSocket para notificações (``encoding``: json, compact ou msgpack)"""
     logger.info(f"WebSocket connection attempt from {websocket.client}")
     try:
         # Autentica o usuário
         logger.info("Starting WebSocket authentication...")
         user = await get_user_from_websocket_token(token, db)
         
-        # Conecta o usuário
+        # Conecta o usuário; formatos compactos recebem técnicos e admins no cache inicial
         logger.info(f"Connecting user {user.username} to WebSocket")
-        await manager.connect(websocket, user)
+        encoding = negotiate_encoding(encoding)
+        staff = []
+        if encoding != JSON:
+            staff = db.query(User).filter(
+                User.is_active == True,
+                User.role.in_([UserRole.admin, UserRole.technician])
+            ).all()
+        await manager.connect(websocket, user, encoding, staff)
         logger.info(f"User {user.username} connected successfully")
         
         try:
             while True:
                 # Recebe mensagens do cliente (heartbeat, etc.)
-                data = await websocket.receive_text()
-                
                 try:
-                    message = json.loads(data)
+                    message = await manager.receive(websocket)
                     message_type = message.get("type")
                     
                     if message_type == "heartbeat":
@@ -92,6 +99,8 @@ async def websocket_endpoint(
                             # Aqui você pode implementar a lógica para marcar como lida no banco
                             logger.info(f"User {user.id} marked notification {notification_id} as read")
                     
+                except WebSocketDisconnect:
+                    raise
                 except json.JSONDecodeError:
                     logger.warning(f"Invalid JSON received from user {user.id}")
                 except Exception as e:
@@ -0,0 +1,137 @@
+"""
+Startup schema check driven by Alembic.
+
+Each worker compares the database revision with the migration head using one
+small query. Only when they differ is a migration lock taken (an advisory lock
+on PostgreSQL) and the schema brought up to date:
+
+* empty database: tables are created from the models and stamped at head
+* database created before migrations existed: stamped at the baseline revision,
+  then upgraded
+* database behind head: upgraded
+
+On PostgreSQL the monthly partitions of the ticket history tables for the
+coming months are created afterwards (``app.services.partitions``).
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+from app.services.partitions import PARTITIONED_TABLES, ensure_partitions, partition_table
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+ALEMBIC_INI = os.path.join(BACKEND_DIR, "alembic.ini")
+
+# First revision; databases created by create_all before Alembic was used match it
+BASELINE_REVISION = "31a761281fa3"
+
+# Arbitrary key shared by every worker for pg_advisory_lock
+MIGRATION_LOCK_KEY = 7351902214
+
+
+def alembic_config(connection: Optional[Connection] = None):
+    # Alembic is imported on demand to keep it out of the application import
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    config.attributes["configure_logger"] = False
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+
+def head_revision() -> Optional[str]:
+    from alembic.script import ScriptDirectory
+
+    return ScriptDirectory.from_config(alembic_config()).get_current_head()
+
+
+def current_revision(connection: Connection) -> Optional[str]:
+    from alembic.runtime.migration import MigrationContext
+
+    return MigrationContext.configure(connection).get_current_revision()
+
+
+@contextmanager
+def migration_lock(connection: Connection):
+    """Serialize schema changes between workers starting at the same time"""
+    if connection.dialect.name != "postgresql":
+        yield
+        return
+    connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    try:
+        yield
+    finally:
+        connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+
+
+def _migrate(connection: Connection, head: str) -> str:
+    from alembic import command
+
+    from app.models.models import Base
+    from app.services.settings_service import create_version_row
+
+    current = current_revision(connection)
+    if current == head:
+        # Another worker finished while we waited for the lock
+        return "current"
+
+    config = alembic_config(connection)
+    created = current is None and not inspect(connection).has_table("tickets")
+    if created:
+        Base.metadata.create_all(bind=connection)
+        if connection.dialect.name == "postgresql":
+            # The models describe plain tables; history is partitioned as by the migration
+            for table in PARTITIONED_TABLES:
+                partition_table(connection, table)
+        # Seeded by the migration on existing databases
+        create_version_row(connection)
+    # Alembic manages its own transactions (the index migration needs
+    # autocommit on PostgreSQL), so nothing may be pending when it starts
+    connection.commit()
+
+    if created:
+        command.stamp(config, head)
+        return "created"
+
+    if current is None:
+        command.stamp(config, BASELINE_REVISION)
+    command.upgrade(config, head)
+    return "upgraded"
+
+
+def ensure_schema(engine: Engine) -> str:
+    """Bring the database to the Alembic head; returns what was done"""
+    start = time.perf_counter()
+    head = head_revision()
+
+    with engine.connect() as connection:
+        current = current_revision(connection)
+        if current == head:
+            outcome = "current"
+        elif not settings.AUTO_MIGRATE:
+            logger.warning("Database at revision %s, expected %s; AUTO_MIGRATE is off", current, head)
+            outcome = "outdated"
+        else:
+            # Release the implicit transaction so the lock is taken outside it
+            connection.commit()
+            with migration_lock(connection):
+                outcome = _migrate(connection, head)
+                connection.commit()
+        if outcome != "outdated":
+            ensure_partitions(connection)
+
+    logger.info(
+        "Schema check finished",
+        extra={"outcome": outcome, "revision": head, "duration_ms": round((time.perf_counter() - start) * 1000, 1)}
+    )
+    return outcome
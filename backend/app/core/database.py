@@ -1,16 +1,87 @@
-from sqlalchemy import create_engine
+import itertools
+import time
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
 
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read replicas: dashboards, reports and lists read from them in turn. Without
+# replicas every read goes to the primary.
+replica_engines = [
+    create_engine(url.strip(), pool_pre_ping=True)
+    for url in settings.DATABASE_REPLICA_URLS.split(",") if url.strip()
+]
+_replica_cycle = itertools.cycle(replica_engines) if replica_engines else None
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+# Set after a write so the same client reads its own changes from the primary
+# while the replicas catch up; holds the time (epoch seconds) it expires
+STICKY_COOKIE = "db_primary_until"
+
 Base = declarative_base()
 
+
+@event.listens_for(ReadSessionLocal, "before_flush")
+def _reject_writes(session: Session, flush_context, instances):
+    raise RuntimeError("Read-only session: use get_db for writes")
+
+
+def read_engine():
+    """Next replica engine, or the primary when there are none"""
+    return next(_replica_cycle) if _replica_cycle is not None else engine
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_read_db(request: Request):
+    """Session for read-only endpoints, on a replica unless the client just wrote"""
+    bind = engine
+    if _replica_cycle is not None:
+        try:
+            sticky = float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            sticky = False
+        if not sticky:
+            bind = read_engine()
+    db = ReadSessionLocal(bind=bind)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+class ReadYourWritesMiddleware:
+    """ASGI middleware pinning a client's reads to the primary after a write"""
+
+    WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                seconds = settings.REPLICA_STICKY_SECONDS
+                cookie = (
+                    f"{STICKY_COOKIE}={int(time.time() + seconds) + 1}; Max-Age={int(seconds) + 1}; "
+                    f"Path=/; HttpOnly; SameSite=Lax"
+                )
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -3,12 +3,15 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 from typing import Optional
+import logging
 
 from app.core.config import settings
 from app.core.database import get_db
 from app.models.models import User as UserModel, UserRole
 from app.schemas.schemas import TokenData
 
+logger = logging.getLogger(__name__)
+
 security = HTTPBearer()
 
 def get_current_user(
@@ -16,59 +19,31 @@ def get_current_user(
     db: Session = Depends(get_db)
 ) -> UserModel:
     """Get current authenticated user"""
-    print(f"=== GET_CURRENT_USER CALLED ===")
-    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    print(f" === GET_CURRENT_USER CALLED ===")
-    print(f"Token received: {credentials.credentials[:20]}...")
-    print(f"SECRET_KEY (first 10 chars): {settings.SECRET_KEY[:10]}...")
-    print(f"ALGORITHM: {settings.ALGORITHM}")
-    
     try:
         payload = jwt.decode(credentials.credentials, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        print(f"Token payload: {payload}")
         username: str = payload.get("sub")
         if username is None:
-            print(f"✗ No username in token payload")
+            logger.debug("Token without subject")
             raise credentials_exception
-        print(f"Username from token: {username}")
     except JWTError as e:
-        print(f"✗ JWT decode error: {e}")
+        logger.debug("JWT decode error: %s", e)
         raise credentials_exception
     
     user = db.query(UserModel).filter(UserModel.username == username).first()
     if user is None:
-        print(f"✗ User not found in database: {username}")
+        logger.debug("User from token not found: %s", username)
         raise credentials_exception
     
-    print(f"User found: {user.username}, active: {user.is_active}, role: {user.role}")
-    
     if not user.is_active:
-        print(f"✗ User is inactive: {username}")
+        logger.debug("Inactive user rejected: %s", username)
         raise HTTPException(status_code=403, detail="Inactive user")
     
-    print(f"✓ User authenticated successfully: {username}")
-    
-    # Check if there's a hidden dependency calling get_current_admin
-    import inspect
-    frame = inspect.currentframe()
-    try:
-        current_frame = frame.f_back
-        while current_frame:
-            filename = current_frame.f_code.co_filename
-            function_name = current_frame.f_code.co_name
-            if 'get_current_admin' in function_name:
-                print(f"FOUND get_current_admin in call stack: {filename}:{current_frame.f_lineno}")
-                raise HTTPException(status_code=403, detail="Not enough permissions. Admin role required.")
-            current_frame = current_frame.f_back
-    finally:
-        del frame
-    
     return user
 
 def get_current_active_user(
@@ -0,0 +1,45 @@
+"""
+Conditional GET support: weak ETags and 304 responses.
+
+Endpoints build the ETag from watermarks read with one small query
+(``updated_at`` values, row counts, max ids) before loading relationships.
+When it matches ``If-None-Match`` they answer 304 with no body; otherwise the
+tag is sent with the full response so the browser can revalidate next time.
+"""
+import hashlib
+
+from fastapi import Request, Response
+
+from app.core.config import settings
+
+# Cached by the browser only, and always revalidated
+CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(*parts) -> str:
+    """Weak ETag from watermark values; the API version is part of every tag"""
+    source = "|".join(str(part) for part in (settings.APP_VERSION, *parts))
+    return f'W/"{hashlib.blake2b(source.encode("utf-8"), digest_size=12).hexdigest()}"'
+
+
+def _opaque(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether ``If-None-Match`` names ``etag`` (weak comparison)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(_opaque(tag.strip()) == _opaque(etag) for tag in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_etag(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -0,0 +1,262 @@
+"""
+Opt-in per-request profiling.
+
+An admin can send ``X-Profile: 1`` (or ``?profile=1``) with any request. The
+request is then served while a background thread samples the Python stacks of
+the event loop and of the threadpool workers running calls of that request
+(sync endpoints and dependencies), and every SQL statement is timed. Coroutines
+of other requests running on the event loop at the same time still show up
+under ``event_loop``. The
+result is stored in ``PROFILE_DIR`` as a collapsed-stack file (input for
+flamegraph.pl, speedscope or inferno) plus a JSON summary, and the response
+carries an ``X-Profile-Id`` header to fetch them from ``/api/v1/profiles``.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextvars import Context, ContextVar
+from datetime import datetime
+from typing import List, Optional
+from urllib.parse import parse_qs
+
+from jose import JWTError, jwt
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import User, UserRole
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ID_PATTERN = "0123456789abcdef"
+
+_active_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("active_profile", default=None)
+_profiling_lock = threading.Lock()
+
+
+class StackSampler(threading.Thread):
+    """Samples the stacks of the event loop and of one request's threadpool calls"""
+
+    def __init__(self, loop_thread_id: int, interval: float, profile: "RequestProfile"):
+        super().__init__(name="request-profiler", daemon=True)
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        self.profile = profile
+        self.samples: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def _watched_threads(self):
+        watched = {self.loop_thread_id: "event_loop"}
+        for thread in threading.enumerate():
+            if thread.name.startswith("AnyIO worker thread"):
+                watched[thread.ident] = "worker"
+        return watched
+
+    def _runs_profiled_call(self, frame) -> bool:
+        """Whether a worker is running a call made by the profiled request"""
+        # The threadpool runs each call with ``context.run`` on a copy of the
+        # caller's context, which holds the active profile
+        while frame is not None:
+            if frame.f_code.co_name == "run":
+                context = frame.f_locals.get("context")
+                if isinstance(context, Context):
+                    return context.get(_active_profile) is self.profile
+            frame = frame.f_back
+        return False
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            watched = self._watched_threads()
+            for thread_id, frame in sys._current_frames().items():
+                label = watched.get(thread_id)
+                if label is None:
+                    continue
+                if label == "worker" and not self._runs_profiled_call(frame):
+                    # Idle, or serving another request
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(label)
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class RequestProfile:
+    """Profiling data collected for a single request"""
+
+    def __init__(self, method: str, path: str, user_id: int):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.user_id = user_id
+        self.statements: List[dict] = []
+        self.started_at = datetime.utcnow()
+        self.status_code: Optional[int] = None
+        self.duration_ms = 0.0
+
+    def add_statement(self, statement: str, duration: float, executemany: bool):
+        self.statements.append({
+            "statement": statement,
+            "duration_ms": round(duration * 1000, 3),
+            "executemany": executemany
+        })
+
+    def save(self, samples: Counter, interval: float):
+        os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+        base = os.path.join(settings.PROFILE_DIR, self.id)
+
+        with open(f"{base}.folded", "w") as folded:
+            for stack, count in samples.most_common():
+                folded.write(f"{stack} {count}\n")
+
+        summary = {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "user_id": self.user_id,
+            "status_code": self.status_code,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 3),
+            "sample_interval_ms": interval * 1000,
+            "sample_count": sum(samples.values()),
+            "sql_statement_count": len(self.statements),
+            "sql_total_ms": round(sum(s["duration_ms"] for s in self.statements), 3),
+            "sql_statements": self.statements
+        }
+        with open(f"{base}.json", "w") as summary_file:
+            json.dump(summary, summary_file, indent=2)
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_profile.get() is not None:
+        conn.info.setdefault("profile_start", []).append(time.perf_counter())
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active_profile.get()
+    if profile is not None and conn.info.get("profile_start"):
+        start = conn.info["profile_start"].pop()
+        profile.add_statement(statement, time.perf_counter() - start, executemany)
+
+
+def instrument_engine(engine):
+    """Time statements executed through ``engine`` while a request is profiled"""
+    if not event.contains(engine, "before_cursor_execute", _before_execute):
+        event.listen(engine, "before_cursor_execute", _before_execute)
+        event.listen(engine, "after_cursor_execute", _after_execute)
+
+
+def _load_admin_id(token: str) -> Optional[int]:
+    """Return the user id if ``token`` belongs to an active admin"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    username = payload.get("sub")
+    if not username:
+        return None
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == username).first()
+        if user and user.is_active and user.role == UserRole.admin:
+            return user.id
+        return None
+    finally:
+        db.close()
+
+
+def _profiling_requested(scope) -> bool:
+    for name, value in scope.get("headers", []):
+        if name == PROFILE_HEADER:
+            return value == b"1"
+    query = scope.get("query_string", b"")
+    if b"profile=" in query:
+        return parse_qs(query.decode("latin-1")).get("profile") == ["1"]
+    return False
+
+
+def _bearer_token(scope) -> Optional[str]:
+    for name, value in scope.get("headers", []):
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return token
+    return None
+
+
+def profile_path(profile_id: str, extension: str) -> Optional[str]:
+    """Path of a stored profile file, or None if the id is invalid or missing"""
+    if len(profile_id) != 32 or any(char not in PROFILE_ID_PATTERN for char in profile_id):
+        return None
+    path = os.path.join(settings.PROFILE_DIR, f"{profile_id}.{extension}")
+    return path if os.path.exists(path) else None
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles admin requests carrying ``X-Profile: 1``"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _profiling_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        token = _bearer_token(scope)
+        user_id = await run_in_threadpool(_load_admin_id, token) if token else None
+        if user_id is None or not _profiling_lock.acquire(blocking=False):
+            # Not an admin, or another request is already being profiled
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self._profile(scope, receive, send, user_id)
+        finally:
+            _profiling_lock.release()
+
+    async def _profile(self, scope, receive, send, user_id: int):
+        profile = RequestProfile(scope["method"], scope["path"], user_id)
+        interval = settings.PROFILE_SAMPLE_INTERVAL_MS / 1000
+        sampler = StackSampler(threading.get_ident(), interval, profile)
+        context_token = _active_profile.set(profile)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile.id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            profile.duration_ms = (time.perf_counter() - start) * 1000
+            _active_profile.reset(context_token)
+            try:
+                await run_in_threadpool(profile.save, sampler.samples, interval)
+                logger.info(
+                    "Stored profile %s for %s %s",
+                    profile.id, profile.method, profile.path,
+                    extra={"duration_ms": round(profile.duration_ms, 3), "sql_statements": len(profile.statements)}
+                )
+            except OSError:
+                logger.exception("Could not store profile %s", profile.id)
@@ -1,59 +1,35 @@
+import time
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from app.api.api_v1.api import api_router
 from app.core.config import settings
+from app.core.logging_config import setup_logging
 import logging
 import os
-import json
-from app.core.database import engine
-from app.models import models
+from app.core.database import ReadYourWritesMiddleware, engine, replica_engines
+from app.core.metrics import MetricsMiddleware, instrument_engine, registry as metrics_registry
+from app.core import profiling
+from app.core.boot import ensure_schema
 from app.websocket.manager import manager
+from app.services.jobs import job_queue
+from app.services.dashboard_counters import dashboard_counters
+from app.services.derived_state import derived_state
+from app.services.escalation import escalation_scheduler
+from app.services.similarity import similarity_index
+from app.services.solutions import solution_index
 
-# Create tables
-models.Base.metadata.create_all(bind=engine)
+setup_logging()
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title=settings.APP_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json"
 )
 
-# Middleware removed - was consuming request body and preventing endpoint execution
-
-# Debug middleware to trace requests
-@app.middleware("http")
-async def debug_requests(request: Request, call_next):
-    if "/users/profile" in str(request.url) and request.method == "PUT":
-        print(f"=== MIDDLEWARE DEBUG: PUT /users/profile ===")
-        print(f"Request URL: {request.url}")
-        print(f"Request method: {request.method}")
-        print(f"Authorization header: {request.headers.get('authorization', 'MISSING')}")
-        
-        # Check all registered routes
-        print(f"=== CHECKING ALL ROUTES ===")
-        for route in app.routes:
-            if hasattr(route, 'path') and hasattr(route, 'methods'):
-                if '/users/profile' in route.path or 'profile' in route.path:
-                    print(f"FOUND ROUTE: {route.path} - Methods: {route.methods}")
-                    if hasattr(route, 'dependant') and route.dependant:
-                        print(f"  Dependencies count: {len(route.dependant.dependencies)}")
-                        for i, dep in enumerate(route.dependant.dependencies):
-                            print(f"    Dep {i}: {dep.call}")
-                            if hasattr(dep, 'call') and hasattr(dep.call, '__name__'):
-                                print(f"      Function name: {dep.call.__name__}")
-                            if hasattr(dep, 'call') and hasattr(dep.call, '__module__'):
-                                print(f"      Module: {dep.call.__module__}")
-        
-        # Call the endpoint
-        response = await call_next(request)
-        
-        print(f"Response status: {response.status_code}")
-        print(f"=== END MIDDLEWARE DEBUG ===")
-        return response
-    
-    return await call_next(request)
-
 # CORS middleware - Explicit configuration
 app.add_middleware(
     CORSMiddleware,
@@ -79,6 +55,22 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Reads of a client that just wrote go to the primary, not a lagging replica
+if replica_engines:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Opt-in profiling of single admin requests (X-Profile: 1)
+if settings.PROFILING_ENABLED:
+    for instrumented in [engine, *replica_engines]:
+        profiling.instrument_engine(instrumented)
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+# Per-route latency, status and DB statement metrics
+if settings.METRICS_ENABLED:
+    for instrumented in [engine, *replica_engines]:
+        instrument_engine(instrumented)
+    app.add_middleware(MetricsMiddleware)
+
 # Mount static files for uploads
 if not os.path.exists("uploads"):
     os.makedirs("uploads")
@@ -89,70 +81,82 @@ from fastapi.exceptions import RequestValidationError
 
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    print(f"=== 422 VALIDATION ERROR DETAILED ===")
-    print(f"Request URL: {request.url}")
-    print(f"Request method: {request.method}")
-    print(f"Request headers: {dict(request.headers)}")
-    
-    # Try to get body from different sources
-    body_content = None
-    try:
-        # Try to get body directly
-        body_content = await request.body()
-        if body_content:
-            print(f"Request body (raw): {body_content}")
-            try:
-                parsed_body = json.loads(body_content)
-                print(f"Request body (parsed): {parsed_body}")
-            except:
-                print(f"Request body (as string): {body_content.decode()}")
-    except Exception as e:
-        print(f"Could not read request body: {e}")
-    
-    # Log detailed validation errors
-    print(f"Validation errors count: {len(exc.errors())}")
-    print(f"Full exception details: {exc}")
-    print(f"Exception type: {type(exc)}")
-    
-    for i, error in enumerate(exc.errors()):
-        print(f"=== Error {i+1} Details ===")
-        print(f"  Full error: {error}")
-        if 'loc' in error:
-            print(f"  Location: {error['loc']}")
-        if 'msg' in error:
-            print(f"  Message: {error['msg']}")
-        if 'type' in error:
-            print(f"  Type: {error['type']}")
-        if 'input' in error:
-            print(f"  Input: {error['input']}")
-        if 'ctx' in error:
-            print(f"  Context: {error['ctx']}")
-    
-    # Check if this is our profile endpoint
-    if "/users/profile" in str(request.url):
-        print(f"=== PROFILE ENDPOINT SPECIFIC DEBUG ===")
-        print(f"Path params: {request.path_params}")
-        print(f"Query params: {dict(request.query_params)}")
-        
-        # Try to understand what FastAPI is trying to validate
-        try:
-            from fastapi.routing import APIRoute
-            for route in app.routes:
-                if hasattr(route, 'path') and '/users/profile' in route.path:
-                    print(f"Found matching route: {route.path}")
-                    print(f"Route methods: {route.methods}")
-                    if hasattr(route, 'dependant'):
-                        print(f"Route dependant: {route.dependant}")
-        except Exception as route_error:
-            print(f"Error inspecting routes: {route_error}")
+    errors = exc.errors()
+    # Client errors: recorded only when debugging, not on every malformed request
+    logger.debug(
+        "Validation error on %s %s",
+        request.method, request.url.path,
+        extra={"errors": [{"loc": error.get("loc"), "type": error.get("type")} for error in errors]}
+    )
     
     return JSONResponse(
         status_code=422,
-        content={"detail": exc.errors()}
+        content={"detail": errors}
     )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.on_event("startup")
+def check_schema():
+    ensure_schema(engine)
+
+@app.on_event("startup")
+async def start_derived_state():
+    await derived_state.start()
+
+@app.on_event("startup")
+async def start_job_workers():
+    await job_queue.start()
+
+@app.on_event("startup")
+async def start_escalation_scheduler():
+    if settings.ESCALATION_SCHEDULER:
+        await escalation_scheduler.start()
+
+@app.on_event("startup")
+async def start_similarity_index():
+    if settings.SIMILARITY_INDEX:
+        await similarity_index.start()
+
+@app.on_event("startup")
+async def start_solution_index():
+    if settings.SOLUTION_INDEX:
+        await solution_index.start()
+
+@app.on_event("startup")
+async def start_dashboard_counters():
+    if settings.DASHBOARD_STREAM:
+        await dashboard_counters.start()
+
+@app.on_event("shutdown")
+async def stop_derived_state():
+    await derived_state.stop()
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    await job_queue.stop()
+
+@app.on_event("shutdown")
+async def stop_escalation_scheduler():
+    await escalation_scheduler.stop()
+
+@app.on_event("shutdown")
+async def stop_similarity_index():
+    await similarity_index.stop()
+
+@app.on_event("shutdown")
+async def stop_solution_index():
+    await solution_index.stop()
+
+@app.on_event("shutdown")
+async def stop_dashboard_counters():
+    await dashboard_counters.stop()
+
+logger.info(
+    "Application imported",
+    extra={"duration_ms": round((time.perf_counter() - _import_started) * 1000, 1)}
+)
+
 @app.get("/")
 async def root():
     return {
@@ -161,6 +165,15 @@ async def root():
         "docs": "/docs"
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(
+        metrics_registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": settings.APP_NAME}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum, Float
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum, Float, Index, LargeBinary, Table, bindparam
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -17,6 +17,11 @@ class TicketStatus(str, enum.Enum):
     CLOSED = "closed"
     REOPENED = "reopened"
 
+# Statuses of tickets still waiting for work (used by the partial index below)
+ACTIVE_TICKET_STATUSES = (
+    TicketStatus.OPEN, TicketStatus.IN_PROGRESS, TicketStatus.WAITING_USER, TicketStatus.REOPENED
+)
+
 class TicketPriority(str, enum.Enum):
     LOW = "low"
     MEDIUM = "medium"
@@ -25,6 +30,16 @@ class TicketPriority(str, enum.Enum):
     CRITICAL = "critical"
 
 
+# Categories a technician handles, used by automatic assignment
+technician_skills = Table(
+    "technician_skills",
+    Base.metadata,
+    Column("user_id", Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+    Column("category_id", Integer, ForeignKey("categories.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_technician_skills_category_id", "category_id"),
+)
+
+
 class User(Base):
     __tablename__ = "users"
     
@@ -46,6 +61,7 @@ class User(Base):
     assigned_tickets = relationship("Ticket", foreign_keys="Ticket.assigned_to_id", back_populates="assigned_to")
     comments = relationship("TicketComment", back_populates="user")
     evaluations = relationship("TicketEvaluation", back_populates="user")
+    skills = relationship("Category", secondary=technician_skills)
 
 class Category(Base):
     __tablename__ = "categories"
@@ -56,6 +72,7 @@ class Category(Base):
     color = Column(String(7), default="#6B7280")  # Hex color
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     tickets = relationship("Ticket", back_populates="category")
@@ -80,6 +97,15 @@ class Ticket(Base):
     resolved_at = Column(DateTime(timezone=True))
     closed_at = Column(DateTime(timezone=True))
     
+    # SLA deadlines, computed on create and priority change (app.services.sla)
+    response_due_at = Column(DateTime(timezone=True))
+    resolve_due_at = Column(DateTime(timezone=True))
+    first_response_at = Column(DateTime(timezone=True))
+    
+    # Automatic escalation (app.services.escalation): 1 = no response, 2 = resolution overdue
+    escalation_level = Column(Integer, nullable=False, default=0, server_default="0")
+    escalated_at = Column(DateTime(timezone=True))
+    
     # Solution
     solution = Column(Text)
     
@@ -92,6 +118,33 @@ class Ticket(Base):
     activities = relationship("TicketActivity", back_populates="ticket", cascade="all, delete-orphan")
     evaluation = relationship("TicketEvaluation", back_populates="ticket", uselist=False)
 
+    # Indexes matched to the list/dashboard filters (role filter + newest first)
+    __table_args__ = (
+        Index("ix_tickets_assigned_to_created", assigned_to_id, created_at.desc()),
+        Index("ix_tickets_created_by_created", created_by_id, created_at.desc()),
+        Index("ix_tickets_status_created", status, created_at.desc()),
+        Index("ix_tickets_priority", priority),
+        Index("ix_tickets_category_id", category_id),
+        Index("ix_tickets_created_at", created_at),
+        Index("ix_tickets_updated_at", updated_at),
+        Index(
+            "ix_tickets_active_assigned", assigned_to_id, priority,
+            postgresql_where=status.in_(ACTIVE_TICKET_STATUSES),
+            sqlite_where=status.in_(ACTIVE_TICKET_STATUSES)
+        ),
+        Index(
+            "ix_tickets_active_resolve_due", resolve_due_at,
+            postgresql_where=status.in_(ACTIVE_TICKET_STATUSES),
+            sqlite_where=status.in_(ACTIVE_TICKET_STATUSES)
+        ),
+    )
+
+# ``status IN (active statuses)`` with the values rendered inline, so the
+# planner can match it against the partial index even with bound parameters
+ACTIVE_TICKET_FILTER = Ticket.status.in_(
+    bindparam("active_statuses", list(ACTIVE_TICKET_STATUSES), expanding=True, literal_execute=True)
+)
+
 class TicketComment(Base):
     __tablename__ = "ticket_comments"
     
@@ -111,6 +164,10 @@ class TicketComment(Base):
     ticket = relationship("Ticket", back_populates="comments")
     user = relationship("User", back_populates="comments")
 
+    __table_args__ = (
+        Index("ix_ticket_comments_ticket_created", ticket_id, created_at),
+    )
+
 class TicketAttachment(Base):
     __tablename__ = "ticket_attachments"
     
@@ -132,6 +189,10 @@ class TicketAttachment(Base):
     ticket = relationship("Ticket", back_populates="attachments")
     uploaded_by = relationship("User")
 
+    __table_args__ = (
+        Index("ix_ticket_attachments_ticket_id", ticket_id),
+    )
+
 class TicketActivity(Base):
     __tablename__ = "ticket_activities"
     
@@ -143,7 +204,7 @@ class TicketActivity(Base):
     
     # Foreign Keys
     ticket_id = Column(Integer, ForeignKey("tickets.id"), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # None for automatic actions (escalation)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -152,6 +213,11 @@ class TicketActivity(Base):
     ticket = relationship("Ticket", back_populates="activities")
     user = relationship("User")
 
+    __table_args__ = (
+        Index("ix_ticket_activities_ticket_created", ticket_id, created_at),
+        Index("ix_ticket_activities_created_at", created_at),
+    )
+
 
 
 class TicketEvaluation(Base):
@@ -177,6 +243,52 @@ class TicketEvaluation(Base):
     ticket = relationship("Ticket", back_populates="evaluation")
     user = relationship("User", back_populates="evaluations")
 
+class ArchivedTicket(Base):
+    """Closed ticket moved out of the hot tables (app.services.archive)"""
+    __tablename__ = "archived_tickets"
+    
+    # Original ticket id
+    id = Column(Integer, primary_key=True)
+    
+    # Kept as columns for listing, visibility and search
+    title = Column(String(255), nullable=False)
+    description = Column(Text, nullable=False)
+    solution = Column(Text)
+    status = Column(Enum(TicketStatus), nullable=False)
+    priority = Column(Enum(TicketPriority), nullable=False)
+    category_id = Column(Integer)
+    created_by_id = Column(Integer, nullable=False)
+    assigned_to_id = Column(Integer)
+    created_at = Column(DateTime(timezone=True))
+    closed_at = Column(DateTime(timezone=True))
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # zlib-compressed JSON of the ticket with its comments, activities,
+    # attachment metadata and evaluation
+    payload = Column(LargeBinary, nullable=False)
+
+    __table_args__ = (
+        Index("ix_archived_tickets_created_by_created", created_by_id, created_at.desc()),
+        Index("ix_archived_tickets_assigned_to_created", assigned_to_id, created_at.desc()),
+        Index("ix_archived_tickets_created_at", created_at),
+    )
+
+class TicketTombstone(Base):
+    """Ticket removed from someone's list, for GET /tickets/changes (app.services.ticket_changes)"""
+    __tablename__ = "ticket_tombstones"
+    
+    id = Column(Integer, primary_key=True)
+    ticket_id = Column(Integer, nullable=False)
+    # deleted, archived, or reassigned (only the previous assignee lost it)
+    reason = Column(String(20), nullable=False)
+    created_by_id = Column(Integer)
+    assigned_to_id = Column(Integer)
+    removed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_ticket_tombstones_removed_at", removed_at),
+    )
+
 class SystemSettings(Base):
     __tablename__ = "system_settings"
     
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Union
 from datetime import datetime
 from enum import Enum
 from app.models.models import UserRole, TicketStatus, TicketPriority
@@ -31,6 +31,9 @@ class ProfileUpdate(BaseModel):
     department: Optional[str] = None
     phone: Optional[str] = None
 
+class TechnicianSkillsUpdate(BaseModel):
+    category_ids: List[int] = []
+
 class User(UserBase):
     id: int
     role: UserRole
@@ -72,6 +75,7 @@ class Category(CategoryBase):
     id: int
     is_active: bool
     created_at: datetime
+    updated_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
@@ -125,7 +129,7 @@ class TicketActivity(BaseModel):
     description: str
     old_value: Optional[str]
     new_value: Optional[str]
-    user: User
+    user: Optional[User] = None  # None for automatic actions
     created_at: datetime
     
     class Config:
@@ -150,6 +154,11 @@ class Ticket(TicketBase):
     updated_at: Optional[datetime]
     resolved_at: Optional[datetime]
     closed_at: Optional[datetime]
+    first_response_at: Optional[datetime] = None
+    response_due_at: Optional[datetime] = None
+    resolve_due_at: Optional[datetime] = None
+    escalation_level: int = 0
+    escalated_at: Optional[datetime] = None
     solution: Optional[str]
     status: TicketStatus
     
@@ -165,6 +174,27 @@ class Ticket(TicketBase):
     class Config:
         from_attributes = True
 
+class SimilarTicket(BaseModel):
+    id: int
+    title: str
+    status: TicketStatus
+    priority: TicketPriority
+    category_id: Optional[int] = None
+    assigned_to_id: Optional[int] = None
+    created_at: datetime
+    similarity: float
+
+class SolutionSuggestion(BaseModel):
+    ticket_id: int
+    title: str
+    solution: str
+    category_id: Optional[int] = None
+    resolved_at: Optional[datetime] = None
+    score: float
+
+class TicketCreated(Ticket):
+    suggested_duplicates: List[SimilarTicket] = []
+
 class TicketUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
@@ -174,6 +204,18 @@ class TicketUpdate(BaseModel):
     assigned_to_id: Optional[int] = None
     solution: Optional[str] = None
 
+class TicketBulkUpdate(BaseModel):
+    ticket_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    status: Optional[TicketStatus] = None
+    priority: Optional[TicketPriority] = None
+    assigned_to_id: Optional[int] = None
+    solution: Optional[str] = None
+
+class TicketBulkResult(BaseModel):
+    updated: int
+    unchanged: int
+    ticket_ids: List[int]
+
 # Comment Schemas
 class CommentCreate(BaseModel):
     content: str
@@ -305,6 +347,46 @@ class TechnicianSatisfactionMetrics(BaseModel):
     average_rating: float
     satisfaction_percentage: float
 
+# Background report jobs
+class ReportJobCreate(BaseModel):
+    report_type: str = Field(..., description="performance, department, timeline, sla")
+    days: int = Field(30, ge=1, le=3650)
+    format: str = Field("csv", description="json, csv, xlsx")
+    technician_id: Optional[int] = None
+    interval: str = Field("daily", description="Timeline interval: daily, weekly, monthly")
+
+# Data imports (one row of a CSV/NDJSON file; empty cells are dropped first)
+class TicketImportRow(BaseModel):
+    title: str = Field(..., min_length=1, max_length=255)
+    description: str = Field(..., min_length=1)
+    status: TicketStatus = TicketStatus.OPEN
+    priority: TicketPriority = TicketPriority.MEDIUM
+    category: Optional[Union[int, str]] = Field(None, description="Category id or name")
+    created_by: Union[int, str] = Field(..., description="User id, username or email")
+    assigned_to: Optional[Union[int, str]] = Field(None, description="User id, username or email")
+    solution: Optional[str] = None
+    created_at: Optional[datetime] = None
+    resolved_at: Optional[datetime] = None
+    closed_at: Optional[datetime] = None
+
+    @validator("status", "priority", pre=True)
+    def lowercase_enum(cls, value):
+        return value.lower() if isinstance(value, str) else value
+
+class UserImportRow(BaseModel):
+    username: str = Field(..., min_length=1, max_length=100)
+    email: str = Field(..., min_length=3, max_length=255)
+    full_name: str = Field(..., min_length=1, max_length=255)
+    department: Optional[str] = Field(None, max_length=100)
+    phone: Optional[str] = Field(None, max_length=20)
+    role: UserRole = UserRole.user
+    password: Optional[str] = None
+    is_active: bool = True
+
+    @validator("role", pre=True)
+    def lowercase_role(cls, value):
+        return value.lower() if isinstance(value, str) else value
+
 # WebSocket Messages (non-chat)
 class WebSocketMessage(BaseModel):
     type: str
@@ -0,0 +1,90 @@
+"""
+Ticket activity log.
+
+Activities are not added to the session one by one: ``record`` appends them
+to a buffer kept in ``Session.info`` and the whole buffer is written as one
+multi-row INSERT right before the session commits, inside the same
+transaction. A rollback discards the buffer. Tickets not yet flushed may be
+passed as objects; their id is read after the flush that precedes the insert.
+
+With ``ACTIVITY_COMPACT_DIFF`` an update touching several fields is logged as
+a single row whose old_value/new_value hold JSON objects of the changed
+fields, instead of one row per field.
+"""
+import json
+from typing import Any, Dict, List, Optional, Union
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import Ticket, TicketActivity
+
+BUFFER_KEY = "pending_activities"
+
+# Labels of ticket fields in activity descriptions
+FIELD_NAMES = {
+    'status': 'Status',
+    'priority': 'Prioridade',
+    'assigned_to_id': 'Responsável',
+    'title': 'Título',
+    'description': 'Descrição',
+    'category_id': 'Categoria',
+    'solution': 'Solução'
+}
+
+
+def record(
+    db: Session, ticket: Union[Ticket, int], user_id: Optional[int], action: str, description: str,
+    old_value: Optional[str] = None, new_value: Optional[str] = None
+):
+    """Queue an activity row to be inserted when ``db`` commits; ``user_id`` is None for automatic actions"""
+    if not db.in_transaction():
+        # So that a rollback before any query still discards the buffer
+        db.begin()
+    db.info.setdefault(BUFFER_KEY, []).append({
+        'ticket': ticket,
+        'user_id': user_id,
+        'action': action,
+        'description': description,
+        'old_value': old_value,
+        'new_value': new_value
+    })
+
+
+def record_changes(db: Session, ticket: Union[Ticket, int], user_id: int, changes: List[Dict[str, Any]]):
+    """Queue the log of an update; changes are {'field', 'old_value', 'new_value'}"""
+    if settings.ACTIVITY_COMPACT_DIFF and len(changes) > 1:
+        record(
+            db, ticket, user_id, "updated",
+            "Alterado: " + ", ".join(FIELD_NAMES.get(change['field'], change['field']) for change in changes),
+            json.dumps({change['field']: change['old_value'] for change in changes}, ensure_ascii=False),
+            json.dumps({change['field']: change['new_value'] for change in changes}, ensure_ascii=False)
+        )
+        return
+    for change in changes:
+        record(
+            db, ticket, user_id, "updated",
+            f"{FIELD_NAMES.get(change['field'], change['field'])} alterado",
+            change['old_value'], change['new_value']
+        )
+
+
+@event.listens_for(SessionLocal, "before_commit")
+def _write_activities(session: Session):
+    pending = session.info.pop(BUFFER_KEY, None)
+    if not pending:
+        return
+    # Assigns ids to tickets created in this transaction
+    session.flush()
+    rows = []
+    for entry in pending:
+        ticket = entry.pop('ticket')
+        rows.append(dict(entry, ticket_id=ticket if isinstance(ticket, int) else ticket.id))
+    session.execute(insert(TicketActivity), rows)
+
+
+@event.listens_for(SessionLocal, "after_soft_rollback")
+def _discard_activities(session: Session, previous_transaction):
+    session.info.pop(BUFFER_KEY, None)
@@ -0,0 +1,273 @@
+"""
+Cold storage for old closed tickets.
+
+Closed tickets older than ``ARCHIVE_AFTER_DAYS`` are moved, in batches, from
+``tickets`` and its history tables into ``archived_tickets``: one row per
+ticket with the columns needed for listing, visibility and search, plus a
+zlib-compressed JSON payload holding the full ticket as served by the API
+with its comments, activities, attachment metadata and evaluation.
+Attachment files stay where they are.
+
+The hot tables, and every index the ticket lists and dashboards use, then
+only hold the working set. Reading an archived ticket or its comments goes
+through ``get``; ``search`` lists archived tickets. Reports and the solution
+suggestions only cover tickets still in the hot tables. Archived tickets
+leave tombstones for the ticket changes feed, whose expired tombstones each
+archive run prunes. API workers drop archived tickets from their in-memory
+indexes on their next derived state check.
+
+Archiving runs from the command line, e.g. monthly from cron:
+
+    python -m app.services.archive
+    python -m app.services.archive --days 1095
+"""
+import argparse
+import json
+import logging
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, or_
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import (
+    ArchivedTicket, Ticket, TicketActivity, TicketAttachment, TicketComment, TicketEvaluation, TicketStatus, User
+)
+from app.services import derived_state, ticket_changes
+from app.services.partitions import history_since
+
+logger = logging.getLogger(__name__)
+
+# Tickets moved per transaction
+BATCH_SIZE = 500
+
+# zlib level of the payloads: written once, read rarely
+COMPRESSION_LEVEL = 9
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _person(user: Optional[User]) -> Optional[Dict[str, Any]]:
+    if user is None:
+        return None
+    return {"id": user.id, "username": user.username, "full_name": user.full_name, "email": user.email}
+
+
+def serialize(ticket: Ticket) -> Dict[str, Any]:
+    """Full ticket in the shape of ``GET /tickets/{id}``, plus its history"""
+    evaluation = ticket.evaluation
+    return {
+        "id": ticket.id,
+        "title": ticket.title or "",
+        "description": ticket.description or "",
+        "status": ticket.status.value,
+        "priority": ticket.priority.value,
+        "category_id": ticket.category_id,
+        "created_by_id": ticket.created_by_id,
+        "assigned_to_id": ticket.assigned_to_id,
+        "created_at": _iso(ticket.created_at),
+        "updated_at": _iso(ticket.updated_at),
+        "resolved_at": _iso(ticket.resolved_at),
+        "closed_at": _iso(ticket.closed_at),
+        "first_response_at": _iso(ticket.first_response_at),
+        "response_due_at": _iso(ticket.response_due_at),
+        "resolve_due_at": _iso(ticket.resolve_due_at),
+        "solution": ticket.solution or "",
+        "created_by": _person(ticket.created_by),
+        "assigned_to": _person(ticket.assigned_to),
+        "category": {
+            "id": ticket.category.id,
+            "name": ticket.category.name,
+            "color": ticket.category.color
+        } if ticket.category else None,
+        "attachments": [
+            {
+                "id": attachment.id,
+                "filename": attachment.filename,
+                "original_filename": attachment.original_filename,
+                "file_size": attachment.file_size,
+                "content_type": attachment.content_type,
+                "uploaded_by_id": attachment.uploaded_by_id,
+                "created_at": _iso(attachment.created_at)
+            }
+            for attachment in ticket.attachments
+        ],
+        "comments": [
+            {
+                "id": comment.id,
+                "content": comment.content or "",
+                "is_internal": comment.is_internal,
+                "created_at": _iso(comment.created_at),
+                "user": {
+                    "id": comment.user.id,
+                    "username": comment.user.username,
+                    "full_name": comment.user.full_name,
+                    "role": comment.user.role.value.lower()
+                } if comment.user else None
+            }
+            for comment in sorted(ticket.comments, key=lambda comment: (comment.created_at or datetime.min, comment.id))
+        ],
+        "activities": [
+            {
+                "id": activity.id,
+                "action": activity.action,
+                "description": activity.description,
+                "old_value": activity.old_value,
+                "new_value": activity.new_value,
+                "user_id": activity.user_id,
+                "created_at": _iso(activity.created_at)
+            }
+            for activity in sorted(ticket.activities, key=lambda activity: activity.id)
+        ],
+        "evaluation": {
+            "rating": evaluation.rating,
+            "feedback": evaluation.feedback,
+            "resolution_quality": evaluation.resolution_quality,
+            "response_time_rating": evaluation.response_time_rating,
+            "technician_rating": evaluation.technician_rating,
+            "user_id": evaluation.user_id,
+            "created_at": _iso(evaluation.created_at)
+        } if evaluation else None,
+    }
+
+
+def compress(document: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(document, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def decompress(payload: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(payload))
+
+
+class ArchiveService:
+    # Moving tickets
+
+    def archive_batch(self, db: Session, cutoff: datetime, limit: int = BATCH_SIZE) -> int:
+        """Move up to ``limit`` tickets closed before ``cutoff``; returns how many were moved"""
+        closed_at = func.coalesce(Ticket.closed_at, Ticket.updated_at, Ticket.created_at)
+        tickets = db.query(Ticket).options(
+            joinedload(Ticket.created_by),
+            joinedload(Ticket.assigned_to),
+            joinedload(Ticket.category),
+            joinedload(Ticket.evaluation),
+            selectinload(Ticket.attachments),
+            selectinload(Ticket.comments).joinedload(TicketComment.user),
+            selectinload(Ticket.activities)
+        ).filter(Ticket.status == TicketStatus.CLOSED, closed_at < cutoff).order_by(Ticket.id).limit(limit).all()
+        if not tickets:
+            return 0
+
+        db.execute(insert(ArchivedTicket), [
+            {
+                "id": ticket.id,
+                "title": ticket.title,
+                "description": ticket.description,
+                "solution": ticket.solution,
+                "status": ticket.status,
+                "priority": ticket.priority,
+                "category_id": ticket.category_id,
+                "created_by_id": ticket.created_by_id,
+                "assigned_to_id": ticket.assigned_to_id,
+                "created_at": ticket.created_at,
+                "closed_at": ticket.closed_at or ticket.updated_at or ticket.created_at,
+                "payload": compress(serialize(ticket)),
+            }
+            for ticket in tickets
+        ])
+
+        ids = [ticket.id for ticket in tickets]
+        ticket_changes.record_removals(db, [
+            ticket_changes.removal(ticket.id, ticket_changes.ARCHIVED, ticket.created_by_id, ticket.assigned_to_id)
+            for ticket in tickets
+        ])
+        since = history_since(min((ticket.created_at for ticket in tickets if ticket.created_at), default=None))
+        for model in (TicketActivity, TicketComment):
+            db.execute(
+                delete(model).where(model.ticket_id.in_(ids), model.created_at >= since)
+                .execution_options(synchronize_session=False)
+            )
+        for model in (TicketAttachment, TicketEvaluation):
+            db.execute(delete(model).where(model.ticket_id.in_(ids)).execution_options(synchronize_session=False))
+        db.execute(delete(Ticket).where(Ticket.id.in_(ids)).execution_options(synchronize_session=False))
+        db.commit()
+        db.expunge_all()
+        return len(ids)
+
+    def archive(self, older_than_days: Optional[int] = None) -> int:
+        """Move every ticket closed more than ``older_than_days`` ago; returns how many were moved"""
+        if older_than_days is None:
+            older_than_days = settings.ARCHIVE_AFTER_DAYS
+        cutoff = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+        started = time.perf_counter()
+        moved = 0
+        db = SessionLocal()
+        try:
+            while True:
+                count = self.archive_batch(db, cutoff)
+                moved += count
+                if count < BATCH_SIZE:
+                    break
+            # Same maintenance window: tombstones past the changes feed retention
+            ticket_changes.prune_tombstones(db)
+        finally:
+            db.close()
+        if moved:
+            # Runs outside the API workers: they rebuild on their next check
+            derived_state.announce(derived_state.TICKETS)
+        logger.info(
+            "Archived closed tickets",
+            extra={"tickets": moved, "duration_ms": round((time.perf_counter() - started) * 1000, 1)}
+        )
+        return moved
+
+    # Reading
+
+    def get(self, db: Session, ticket_id: int) -> Optional[Tuple[ArchivedTicket, Dict[str, Any]]]:
+        """Archived row and full document of a ticket, or None"""
+        archived = db.get(ArchivedTicket, ticket_id)
+        if archived is None:
+            return None
+        return archived, decompress(archived.payload)
+
+    def search(
+        self, db: Session, current_user: User, search: Optional[str] = None,
+        category_id: Optional[int] = None, skip: int = 0, limit: int = 50
+    ) -> List[ArchivedTicket]:
+        """Archived tickets visible to the user, newest first"""
+        query = db.query(ArchivedTicket)
+        role = current_user.role.value.lower()
+        if role == "user":
+            query = query.filter(ArchivedTicket.created_by_id == current_user.id)
+        elif role == "technician":
+            query = query.filter(ArchivedTicket.assigned_to_id == current_user.id)
+        if category_id:
+            query = query.filter(ArchivedTicket.category_id == category_id)
+        if search and search.strip():
+            query = query.filter(or_(
+                ArchivedTicket.title.ilike(f"%{search}%"),
+                ArchivedTicket.description.ilike(f"%{search}%"),
+                ArchivedTicket.solution.ilike(f"%{search}%")
+            ))
+        return query.order_by(ArchivedTicket.created_at.desc()).offset(skip).limit(limit).all()
+
+
+archive_service = ArchiveService()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move old closed tickets to the archive")
+    parser.add_argument("--days", type=int, help="Closed more than this many days ago; defaults to ARCHIVE_AFTER_DAYS")
+    args = parser.parse_args(argv)
+
+    moved = archive_service.archive(args.days)
+    print(f"{moved} tickets archived")
+
+
+if __name__ == "__main__":
+    main()
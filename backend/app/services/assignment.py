@@ -0,0 +1,137 @@
+"""
+Load-aware automatic assignment.
+
+Each API worker keeps the workload of every active technician in memory: the
+open tickets assigned to them, weighted by priority. The counters are seeded
+from one grouped query over the active-ticket index and then follow ticket
+change events, so choosing an assignee is a dictionary scan and never counts
+tickets per technician.
+
+Candidates are the technicians skilled in the ticket's category (all
+technicians when nobody is), narrowed to those connected to this worker's
+notification WebSocket when any is online. Ties go to the lowest user id.
+
+Changes made by other workers are not seen as events; the counters are
+re-read every ``ASSIGNMENT_RESEED_SECONDS`` and whenever technicians or skills
+change here.
+"""
+import logging
+import threading
+import time
+from typing import Dict, Optional, Set
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import (
+    ACTIVE_TICKET_FILTER, ACTIVE_TICKET_STATUSES, Ticket, TicketPriority, User, UserRole, technician_skills
+)
+from app.services.ticket_events import CREATED, DELETED, UPDATED, TicketSnapshot, snapshot, ticket_events
+from app.websocket.manager import manager
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_WEIGHTS = {
+    TicketPriority.LOW: 1,
+    TicketPriority.MEDIUM: 2,
+    TicketPriority.HIGH: 3,
+    TicketPriority.URGENT: 5,
+    TicketPriority.CRITICAL: 8,
+}
+
+
+def ticket_weight(state: TicketSnapshot) -> int:
+    """Workload a ticket adds to its assignee"""
+    if state["assigned_to_id"] is None or state["status"] not in ACTIVE_TICKET_STATUSES:
+        return 0
+    return PRIORITY_WEIGHTS.get(state["priority"], 1)
+
+
+class AssignmentEngine:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Weighted open tickets per active technician
+        self._load: Dict[int, int] = {}
+        # Skilled technicians per category
+        self._skills: Dict[int, Set[int]] = {}
+        self._seeded_at: Optional[float] = None
+        ticket_events.subscribe(self.on_ticket_event)
+
+    # Counters
+
+    def seed(self, db: Session):
+        """Re-read technicians, skills and workload from the database"""
+        technicians = db.execute(
+            select(User.id).where(User.role == UserRole.technician, User.is_active.is_(True))
+        ).scalars().all()
+        load = {user_id: 0 for user_id in technicians}
+
+        skills: Dict[int, Set[int]] = {}
+        for user_id, category_id in db.execute(select(technician_skills.c.user_id, technician_skills.c.category_id)):
+            if user_id in load:
+                skills.setdefault(category_id, set()).add(user_id)
+
+        # Grouped on the partial index of active tickets
+        rows = db.execute(
+            select(Ticket.assigned_to_id, Ticket.priority, func.count())
+            .where(ACTIVE_TICKET_FILTER, Ticket.assigned_to_id.isnot(None))
+            .group_by(Ticket.assigned_to_id, Ticket.priority)
+        )
+        for user_id, priority, count in rows:
+            if user_id in load:
+                load[user_id] += PRIORITY_WEIGHTS.get(priority, 1) * count
+
+        with self._lock:
+            self._load = load
+            self._skills = skills
+            self._seeded_at = time.monotonic()
+        logger.info("Assignment workload loaded", extra={"technicians": len(load)})
+
+    def reset(self):
+        """Reload on next use, after technicians or skills changed"""
+        with self._lock:
+            self._seeded_at = None
+
+    def _ensure_seeded(self, db: Session):
+        seeded_at = self._seeded_at
+        if seeded_at is None or time.monotonic() - seeded_at > settings.ASSIGNMENT_RESEED_SECONDS:
+            self.seed(db)
+
+    def _add(self, state: TicketSnapshot, sign: int):
+        weight = ticket_weight(state)
+        if not weight:
+            return
+        with self._lock:
+            user_id = state["assigned_to_id"]
+            if user_id in self._load:
+                self._load[user_id] = max(self._load[user_id] + sign * weight, 0)
+
+    def on_ticket_event(self, event: str, ticket: Ticket, previous: Optional[TicketSnapshot]):
+        if event == CREATED:
+            self._add(snapshot(ticket), 1)
+        elif event == DELETED:
+            self._add(previous or snapshot(ticket), -1)
+        elif event == UPDATED and previous is not None:
+            self._add(previous, -1)
+            self._add(snapshot(ticket), 1)
+
+    def workload(self) -> Dict[int, int]:
+        with self._lock:
+            return dict(self._load)
+
+    # Decisions
+
+    def choose(self, db: Session, category_id: Optional[int] = None) -> Optional[int]:
+        """Technician to assign a new ticket of this category to, or None"""
+        self._ensure_seeded(db)
+        with self._lock:
+            candidates = self._skills.get(category_id) or self._load.keys()
+            online = [user_id for user_id in candidates if user_id in manager.active_connections]
+            pool = online or candidates
+            if not pool:
+                return None
+            return min(pool, key=lambda user_id: (self._load[user_id], user_id))
+
+
+assignment_engine = AssignmentEngine()
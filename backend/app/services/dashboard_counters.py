@@ -0,0 +1,285 @@
+"""
+Live dashboard counters (``GET /dashboard/stream``).
+
+Each API worker keeps ticket counts (total, per status, per priority and per
+category) for every dashboard scope: all tickets for admins, the tickets
+assigned to each technician and the tickets created by each user. The counts
+are seeded from one grouped query and then follow ticket change events; each
+change is pushed as a delta to the open streams of the scopes it touches, so
+an open dashboard costs an idle connection and no queries.
+
+Changes made by other workers are not seen as events. While streams are
+open, the counts are re-read every ``DASHBOARD_RESEED_SECONDS`` and the
+differences are pushed as deltas too.
+
+Counter keys are ``total``, ``status.<status>``, ``priority.<priority>`` and
+``category.<id>``; payloads nest them as
+``{"total": n, "status": {...}, "priority": {...}, "category": {...}}``, with
+categories by name as in ``/dashboard/stats``.
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import Category, Ticket, User
+from app.services.ticket_events import CREATED, DELETED, UPDATED, TicketSnapshot, snapshot, ticket_events
+
+logger = logging.getLogger(__name__)
+
+Scope = Tuple[str, Optional[int]]
+Counts = Dict[str, int]
+
+ALL: Scope = ("all", None)
+
+# Deltas a stream may fall behind by before it is closed (clients reconnect)
+STREAM_QUEUE_SIZE = 256
+
+
+def scope_for(user: User) -> Scope:
+    """Tickets counted on the user's dashboard, as in /dashboard/stats"""
+    role = user.role.value.lower()
+    if role == "admin":
+        return ALL
+    if role == "technician":
+        return ("assigned", user.id)
+    return ("created", user.id)
+
+
+def _scopes(state: TicketSnapshot) -> List[Scope]:
+    scopes = [ALL, ("created", state["created_by_id"])]
+    if state["assigned_to_id"] is not None:
+        scopes.append(("assigned", state["assigned_to_id"]))
+    return scopes
+
+
+def _keys(state: TicketSnapshot) -> List[str]:
+    keys = ["total", f"status.{state['status'].value}", f"priority.{state['priority'].value}"]
+    if state["category_id"] is not None:
+        keys.append(f"category.{state['category_id']}")
+    return keys
+
+
+def nest(counts: Counts) -> Dict[str, Any]:
+    """Payload form of flat counter keys"""
+    payload: Dict[str, Any] = {}
+    for key, value in counts.items():
+        if "." in key:
+            group, name = key.split(".", 1)
+            payload.setdefault(group, {})[name] = value
+        else:
+            payload[key] = value
+    return payload
+
+
+def _diff(old: Optional[Counts], new: Optional[Counts]) -> Counts:
+    old, new = old or {}, new or {}
+    return {key: new.get(key, 0) - old.get(key, 0) for key in old.keys() | new.keys() if new.get(key, 0) != old.get(key, 0)}
+
+
+class Stream:
+    """Deltas waiting to be sent to one open dashboard"""
+
+    def __init__(self, scope: Scope):
+        self.scope = scope
+        self.queue: "asyncio.Queue[Counts]" = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+        self.overflowed = False
+
+    def put(self, delta: Counts):
+        try:
+            self.queue.put_nowait(delta)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class DashboardCounters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[Scope, Counts] = {}
+        self._category_names: Dict[int, str] = {}
+        self._seeded = False
+        self._streams: Dict[Scope, Set[Stream]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    # Counters
+
+    def _read(self, db: Session) -> Dict[Scope, Counts]:
+        counts: Dict[Scope, Counts] = defaultdict(lambda: defaultdict(int))
+        rows = db.execute(
+            select(
+                Ticket.created_by_id, Ticket.assigned_to_id, Ticket.status, Ticket.priority, Ticket.category_id,
+                func.count()
+            ).group_by(
+                Ticket.created_by_id, Ticket.assigned_to_id, Ticket.status, Ticket.priority, Ticket.category_id
+            )
+        )
+        for created_by_id, assigned_to_id, status, priority, category_id, count in rows:
+            state = {
+                "created_by_id": created_by_id,
+                "assigned_to_id": assigned_to_id,
+                "status": status,
+                "priority": priority,
+                "category_id": category_id
+            }
+            for scope in _scopes(state):
+                for key in _keys(state):
+                    counts[scope][key] += count
+        return {scope: dict(scope_counts) for scope, scope_counts in counts.items()}
+
+    def _read_category_names(self, db: Session) -> Dict[int, str]:
+        return dict(db.execute(select(Category.id, Category.name)).all())
+
+    def _load_category_names(self):
+        db = SessionLocal()
+        try:
+            category_names = self._read_category_names(db)
+        finally:
+            db.close()
+        with self._lock:
+            self._category_names = category_names
+
+    def seed(self):
+        """Re-read the counts and push what changed to the open streams"""
+        db = SessionLocal()
+        try:
+            counts = self._read(db)
+            category_names = self._read_category_names(db)
+        finally:
+            db.close()
+        with self._lock:
+            self._category_names = category_names
+            previous, self._counts = self._counts, counts
+            seeded, self._seeded = self._seeded, True
+            if seeded:
+                for scope, streams in self._streams.items():
+                    delta = _diff(previous.get(scope), counts.get(scope))
+                    if delta:
+                        self._push(streams, delta)
+        logger.debug("Dashboard counters loaded", extra={"scopes": len(counts)})
+
+    def _apply(self, deltas: Dict[Scope, Counts], state: TicketSnapshot, sign: int):
+        for scope in _scopes(state):
+            scope_delta = deltas.setdefault(scope, {})
+            for key in _keys(state):
+                scope_delta[key] = scope_delta.get(key, 0) + sign
+
+    def on_ticket_event(self, event: str, ticket: Ticket, previous: Optional[TicketSnapshot]):
+        deltas: Dict[Scope, Counts] = {}
+        if event == CREATED:
+            self._apply(deltas, snapshot(ticket), 1)
+        elif event == DELETED:
+            self._apply(deltas, previous or snapshot(ticket), -1)
+        elif event == UPDATED and previous is not None:
+            self._apply(deltas, previous, -1)
+            self._apply(deltas, snapshot(ticket), 1)
+
+        with self._lock:
+            if not self._seeded:
+                return
+            for scope, scope_delta in deltas.items():
+                scope_delta = {key: value for key, value in scope_delta.items() if value}
+                if not scope_delta:
+                    continue
+                counts = self._counts.setdefault(scope, {})
+                for key, value in scope_delta.items():
+                    counts[key] = counts.get(key, 0) + value
+                if scope in self._streams:
+                    self._push(self._streams[scope], scope_delta)
+
+    async def payload(self, counts: Counts) -> Dict[str, Any]:
+        """Nested form of ``counts`` with categories by name"""
+        category_ids = {int(key.split(".", 1)[1]) for key in counts if key.startswith("category.")}
+        if not category_ids <= self._category_names.keys():
+            # Created since the counters were seeded
+            await run_in_threadpool(self._load_category_names)
+        named: Counts = {}
+        for key, value in counts.items():
+            if key.startswith("category."):
+                category_id = int(key.split(".", 1)[1])
+                key = f"category.{self._category_names.get(category_id, category_id)}"
+            named[key] = named.get(key, 0) + value
+        return nest(named)
+
+    def _push(self, streams: Set[Stream], delta: Counts):
+        # Events are published from request threads and the threadpool
+        if self._loop is not None:
+            for stream in streams:
+                self._loop.call_soon_threadsafe(stream.put, delta)
+
+    # Streams
+
+    async def subscribe(self, scope: Scope) -> Tuple[Stream, Counts]:
+        """Register a stream and return it with the current counts of its scope"""
+        stream = Stream(scope)
+        while True:
+            if not self._seeded:
+                await run_in_threadpool(self.seed)
+            # Counts and registration under one lock: each change is either in
+            # the counts returned or pushed to the stream, never both
+            with self._lock:
+                if not self._seeded:
+                    # The last stream closed meanwhile and dropped the counts
+                    continue
+                self._streams.setdefault(scope, set()).add(stream)
+                return stream, dict(self._counts.get(scope, {}))
+
+    def unsubscribe(self, stream: Stream):
+        with self._lock:
+            streams = self._streams.get(stream.scope)
+            if streams is not None:
+                streams.discard(stream)
+                if not streams:
+                    del self._streams[stream.scope]
+            if not self._streams:
+                # Unwatched counts miss other workers' changes: reseed on next use
+                self._seeded = False
+                self._counts = {}
+
+    def stream_count(self) -> int:
+        with self._lock:
+            return sum(len(streams) for streams in self._streams.values())
+
+    # Lifecycle
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        ticket_events.subscribe(self.on_ticket_event)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        ticket_events.unsubscribe(self.on_ticket_event)
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        with self._lock:
+            self._seeded = False
+            self._counts = {}
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.DASHBOARD_RESEED_SECONDS)
+            if not self.stream_count():
+                continue
+            try:
+                await run_in_threadpool(self.seed)
+            except Exception:
+                logger.exception("Dashboard counters reseed failed")
+
+
+dashboard_counters = DashboardCounters()
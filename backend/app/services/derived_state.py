@@ -0,0 +1,107 @@
+"""
+Cross-worker refresh of the in-memory state derived from tickets and users.
+
+The similarity and solution indexes, the escalation schedule and the
+assignment engine follow ticket events, which are only seen by the worker
+that published them. Bulk writes that publish no events (imports, and the
+archive command, which runs in its own process) call ``announce`` instead: it
+bumps a counter row in ``system_settings``. Every API worker reads the
+counters every ``DERIVED_STATE_CHECK_SECONDS`` and rebuilds its own state when
+one moved.
+"""
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.settings_service import settings_service
+
+logger = logging.getLogger(__name__)
+
+USERS = "users"
+TICKETS = "tickets"
+
+COUNTER_KEYS = {
+    USERS: "_meta.users_version",
+    TICKETS: "_meta.tickets_version",
+}
+
+
+def announce(entity: str):
+    """Tell every worker that ``entity`` rows were written without events"""
+    db = SessionLocal()
+    try:
+        settings_service.increment(db, COUNTER_KEYS[entity])
+        db.commit()
+    finally:
+        db.close()
+
+
+def refresh_local(entity: str):
+    """Rebuild the state of this worker that normally follows ticket events"""
+    from app.services.assignment import assignment_engine
+    from app.services.escalation import escalation_scheduler
+    from app.services.similarity import similarity_index
+    from app.services.solutions import solution_index
+
+    assignment_engine.reset()
+    if entity == TICKETS:
+        escalation_scheduler.invalidate()
+        similarity_index.refresh()
+        solution_index.refresh()
+
+
+class DerivedStateWatcher:
+    def __init__(self):
+        self._seen: Optional[Dict[str, int]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _read(self) -> Dict[str, int]:
+        db = SessionLocal()
+        try:
+            return settings_service.read_counters(db, list(COUNTER_KEYS.values()))
+        finally:
+            db.close()
+
+    def check(self):
+        """Refresh for every counter moved since the last check"""
+        counters = self._read()
+        seen, self._seen = self._seen, counters
+        if seen is None:
+            return
+        changed = [entity for entity, key in COUNTER_KEYS.items() if counters[key] != seen[key]]
+        if not changed:
+            return
+        # A ticket refresh includes the user one
+        entity = TICKETS if TICKETS in changed else USERS
+        logger.info("Refreshing state written by another process", extra={"entity": entity})
+        refresh_local(entity)
+
+    async def start(self):
+        if self._task is not None:
+            return
+        # Baseline before the indexes are built, so later writes are not missed
+        await run_in_threadpool(self.check)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._seen = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(settings.DERIVED_STATE_CHECK_SECONDS)
+            try:
+                await run_in_threadpool(self.check)
+            except Exception:
+                logger.exception("Derived state check failed")
+
+
+derived_state = DerivedStateWatcher()
@@ -0,0 +1,302 @@
+"""
+Automatic SLA escalation.
+
+Each API worker keeps a min-heap of the next escalation moment of every
+active ticket. The heap is loaded once from the active-ticket indexes and then
+kept current by ticket change events, so the tickets table is never polled:
+scheduling is O(log n) per event and the loop sleeps until the earliest
+deadline.
+
+A ticket escalates when nobody but the requester reacted within
+``sla.escalation_hours`` (business calendar), and again when its resolution
+deadline passes. Deadlines missed more than ``ESCALATION_CATCHUP_HOURS`` ago
+(backlog at first deploy, long downtime) are not escalated. Escalating raises the priority one step, assigns unassigned
+tickets through the assignment engine and notifies the assignee and admins.
+The change is a conditional UPDATE on the escalation level, so when several
+workers fire for the same ticket only one of them escalates it.
+
+Rescheduling replaces the ticket's entry in ``_due``; superseded heap entries
+are skipped when popped and the heap is rebuilt when they pile up.
+"""
+import asyncio
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import ACTIVE_TICKET_FILTER, ACTIVE_TICKET_STATUSES, Ticket, TicketPriority
+from app.services import activity
+from app.services.assignment import assignment_engine
+from app.services.settings_service import settings_service
+from app.services.sla import as_utc, sla_service
+from app.services.ticket_events import DELETED, UPDATED, TicketSnapshot, snapshot, ticket_events
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_ESCALATED = 1
+RESOLUTION_ESCALATED = 2
+
+PRIORITY_STEPS = [
+    TicketPriority.LOW, TicketPriority.MEDIUM, TicketPriority.HIGH,
+    TicketPriority.URGENT, TicketPriority.CRITICAL
+]
+
+# Upper bound on a sleep, so settings changes are noticed without events
+MAX_SLEEP_SECONDS = 60
+
+# Due tickets escalated per threadpool call (one session)
+BATCH_SIZE = 200
+
+# Rebuild the heap when stale entries outnumber live ones by this much
+COMPACT_SLACK = 1024
+
+
+def next_priority(priority: TicketPriority) -> TicketPriority:
+    index = PRIORITY_STEPS.index(priority) if priority in PRIORITY_STEPS else 0
+    return PRIORITY_STEPS[min(index + 1, len(PRIORITY_STEPS) - 1)]
+
+
+class EscalationScheduler:
+    def __init__(self):
+        self._heap: List[Tuple[datetime, int]] = []
+        self._due: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._policy = None
+        self._sla: Dict[str, Any] = {}
+        self._version: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # Deadlines
+
+    def next_due(self, ticket) -> Optional[datetime]:
+        """Next escalation moment of a ticket (ORM object or row), or None"""
+        if self._policy is None or not self._sla.get("auto_escalation"):
+            return None
+        if ticket.status not in ACTIVE_TICKET_STATUSES:
+            return None
+        level = ticket.escalation_level or 0
+        candidates = []
+        if level < RESPONSE_ESCALATED and ticket.first_response_at is None and ticket.created_at is not None:
+            candidates.append(self._policy.calendar.add_hours(ticket.created_at, float(self._sla["escalation_hours"])))
+        if level < RESOLUTION_ESCALATED and ticket.resolve_due_at is not None:
+            candidates.append(as_utc(ticket.resolve_due_at))
+        cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.ESCALATION_CATCHUP_HOURS)
+        return min((due for due in candidates if due >= cutoff), default=None)
+
+    def schedule(self, ticket_id: int, due: Optional[datetime]):
+        with self._lock:
+            if due is None:
+                self._due.pop(ticket_id, None)
+                return
+            earliest = self._heap[0][0] if self._heap else None
+            self._due[ticket_id] = due
+            heapq.heappush(self._heap, (due, ticket_id))
+            if len(self._heap) > 2 * len(self._due) + COMPACT_SLACK:
+                self._heap = [(when, key) for key, when in self._due.items()]
+                heapq.heapify(self._heap)
+        if earliest is None or due < earliest:
+            self._wake()
+
+    def on_ticket_event(self, event: str, ticket: Ticket, previous: Optional[TicketSnapshot]):
+        if event == DELETED:
+            self.schedule(ticket.id, None)
+        else:
+            self.schedule(ticket.id, self.next_due(ticket))
+
+    def _pop_due(self, now: datetime) -> List[int]:
+        ready = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due, ticket_id = heapq.heappop(self._heap)
+                if self._due.get(ticket_id) == due:
+                    del self._due[ticket_id]
+                    ready.append(ticket_id)
+        return ready
+
+    def _seconds_to_next(self, now: datetime) -> float:
+        with self._lock:
+            if not self._heap:
+                return MAX_SLEEP_SECONDS
+            return min(max((self._heap[0][0] - now).total_seconds(), 0), MAX_SLEEP_SECONDS)
+
+    def _wake(self):
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # Loading
+
+    def _reload_if_changed(self) -> bool:
+        """Rebuild the heap from the database when the settings version changed"""
+        db = SessionLocal()
+        try:
+            snapshot = settings_service.get_snapshot(db)
+            if snapshot.version == self._version:
+                return False
+            self._policy = sla_service.get_policy(db)
+            self._sla = snapshot.section("sla")
+            self._version = snapshot.version
+
+            entries = []
+            if self._sla.get("auto_escalation"):
+                rows = db.execute(
+                    select(
+                        Ticket.id, Ticket.status, Ticket.created_at, Ticket.first_response_at,
+                        Ticket.resolve_due_at, Ticket.escalation_level
+                    ).where(ACTIVE_TICKET_FILTER, Ticket.escalation_level < RESOLUTION_ESCALATED)
+                )
+                for row in rows:
+                    due = self.next_due(row)
+                    if due is not None:
+                        entries.append((due, row.id))
+        finally:
+            db.close()
+
+        heapq.heapify(entries)
+        with self._lock:
+            self._heap = entries
+            self._due = {ticket_id: due for due, ticket_id in entries}
+        logger.info("Escalation schedule loaded", extra={"tickets": len(entries)})
+        return True
+
+    def invalidate(self):
+        """Reload the schedule on the next iteration (tickets written without events)"""
+        self._version = None
+        self._wake()
+
+    # Escalation
+
+    def _escalate(self, db, ticket_id: int, now: datetime) -> Optional[Dict[str, Any]]:
+        ticket = db.get(Ticket, ticket_id)
+        if ticket is None:
+            return None
+        due = self.next_due(ticket)
+        if due is None:
+            return None
+        if due > now:
+            # Changed in another worker since it was scheduled here
+            self.schedule(ticket_id, due)
+            return None
+
+        previous = snapshot(ticket)
+        level = ticket.escalation_level or 0
+        overdue = ticket.resolve_due_at is not None and as_utc(ticket.resolve_due_at) <= now
+        reason = "resolution" if overdue else "response"
+        old_priority = ticket.priority
+        new_priority = next_priority(old_priority)
+        assigned_to_id = ticket.assigned_to_id
+        if assigned_to_id is None:
+            assigned_to_id = assignment_engine.choose(db, ticket.category_id)
+
+        result = db.execute(
+            update(Ticket)
+            .where(Ticket.id == ticket_id, Ticket.escalation_level == level, ACTIVE_TICKET_FILTER)
+            .values(
+                priority=new_priority,
+                assigned_to_id=assigned_to_id,
+                escalation_level=RESOLUTION_ESCALATED if overdue else RESPONSE_ESCALATED,
+                escalated_at=now,
+                # Database clock, as the changes feed watermark
+                updated_at=func.now()
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            db.rollback()
+            return None
+
+        # Done by the system, not by the assignee or the requester
+        activity.record(
+            db, ticket_id, None, "escalated",
+            "Escalado automaticamente: " + (
+                "prazo de resolução estourado" if overdue else "sem resposta no prazo"
+            ),
+            old_priority.value, new_priority.value
+        )
+        db.commit()
+        db.refresh(ticket)
+        # Detach so later commits of the batch do not expire it
+        db.expunge(ticket)
+        ticket_events.publish(UPDATED, ticket, previous)
+        return {"ticket": ticket, "reason": reason, "old_priority": old_priority}
+
+    def _escalate_batch(self, ticket_ids: List[int], now: datetime) -> List[Dict[str, Any]]:
+        """Escalate the tickets that are still due; runs in the threadpool"""
+        escalations = []
+        db = SessionLocal()
+        try:
+            for ticket_id in ticket_ids:
+                try:
+                    escalation = self._escalate(db, ticket_id, now)
+                except Exception:
+                    db.rollback()
+                    logger.exception("Escalation of ticket %s failed", ticket_id)
+                    continue
+                if escalation is not None:
+                    escalations.append(escalation)
+        finally:
+            db.close()
+        return escalations
+
+    async def _fire(self, ticket_ids: List[int], now: datetime):
+        from app.websocket.notifications import notification_service
+
+        for start in range(0, len(ticket_ids), BATCH_SIZE):
+            escalations = await run_in_threadpool(self._escalate_batch, ticket_ids[start:start + BATCH_SIZE], now)
+            for escalation in escalations:
+                ticket = escalation["ticket"]
+                logger.info(
+                    "Ticket %s escalated", ticket.id,
+                    extra={"reason": escalation["reason"], "priority": ticket.priority.value}
+                )
+                try:
+                    await notification_service.notify_ticket_escalated(
+                        ticket, escalation["reason"], escalation["old_priority"]
+                    )
+                except Exception:
+                    logger.exception("Escalation notification for ticket %s failed", ticket.id)
+
+    # Lifecycle
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        ticket_events.subscribe(self.on_ticket_event)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        ticket_events.unsubscribe(self.on_ticket_event)
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await run_in_threadpool(self._reload_if_changed)
+                now = datetime.now(timezone.utc)
+                await self._fire(self._pop_due(now), now)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Escalation loop iteration failed")
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._seconds_to_next(datetime.now(timezone.utc)))
+            except asyncio.TimeoutError:
+                pass
+
+
+escalation_scheduler = EscalationScheduler()
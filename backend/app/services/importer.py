@@ -0,0 +1,357 @@
+"""
+Bulk import of tickets and users from CSV or NDJSON files.
+
+The file is streamed row by row and handled in batches of ``BATCH_SIZE``:
+each row is validated (``TicketImportRow`` / ``UserImportRow``), category and
+user references are resolved through dictionaries loaded once per import,
+and the valid rows of a batch are written in one go, with ``COPY`` on
+PostgreSQL and a Core executemany insert elsewhere. Each batch commits on its
+own. A row that fails validation, or a batch rejected by the database (which
+is then retried row by row), only adds lines to the error report; the rest of
+the file is still imported.
+
+Imports run as background jobs (kind ``import``), and the error report
+(CSV: line, field, error) is the job result. They can also be run from the
+command line, for example for a migration:
+
+    python -m app.services.importer tickets legacy_tickets.csv
+    python -m app.services.importer users users.ndjson --errors errors.csv
+
+Imported tickets publish no ticket events; once the import finishes every
+API worker rebuilds its in-memory indexes and schedules
+(``app.services.derived_state``).
+"""
+import argparse
+import csv
+import enum
+import io
+import json
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.security import get_password_hash
+from app.models.models import Category, Ticket, TicketStatus, User
+from app.services import derived_state, ticket_changes
+from app.schemas.schemas import TicketImportRow, UserImportRow
+from app.services.jobs import job_queue
+from app.services.sla import as_utc, sla_service
+
+logger = logging.getLogger(__name__)
+
+IMPORT_ENTITIES = ("tickets", "users")
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Rows validated and written per transaction
+BATCH_SIZE = 5000
+
+ERROR_COLUMNS = ("line", "field", "error")
+
+RowError = Tuple[int, str, str]
+
+
+def read_rows(path: str, fmt: str) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+    """Yield (line number, row, parse error) from a CSV or NDJSON file"""
+    with open(path, newline="", encoding="utf-8-sig") as source:
+        if fmt == "csv":
+            reader = csv.DictReader(source)
+            for row in reader:
+                yield reader.line_num, row, None
+            return
+        for line_number, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield line_number, None, f"Invalid JSON: {exc}"
+                continue
+            if isinstance(row, dict):
+                yield line_number, row, None
+            else:
+                yield line_number, None, "Line is not a JSON object"
+
+
+def _clean(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop empty cells so the schema defaults apply"""
+    cleaned = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+        elif value is None:
+            continue
+        cleaned[key.strip().lower()] = value
+    return cleaned
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    return as_utc(value).replace(tzinfo=None) if value is not None else None
+
+
+class Importer:
+    def __init__(self, db: Session, entity: str):
+        if entity not in IMPORT_ENTITIES:
+            raise ValueError(f"Unknown import entity: {entity}")
+        self.db = db
+        self.entity = entity
+        self.errors: List[RowError] = []
+        self.rows = 0
+        self.imported = 0
+        self._postgres = db.get_bind().dialect.name == "postgresql"
+        if entity == "tickets":
+            self._load_ticket_lookups()
+        else:
+            self._load_user_lookups()
+
+    # Lookup maps
+
+    def _load_ticket_lookups(self):
+        self.categories: Dict[str, int] = {}
+        for category_id, name in self.db.execute(select(Category.id, Category.name)):
+            self.categories[str(category_id)] = category_id
+            self.categories[name.strip().lower()] = category_id
+        self.users: Dict[str, int] = {}
+        for user_id, username, email in self.db.execute(select(User.id, User.username, User.email)):
+            self.users[str(user_id)] = user_id
+            self.users[username.lower()] = user_id
+            self.users[email.lower()] = user_id
+        self.policy = sla_service.get_policy(self.db)
+
+    def _load_user_lookups(self):
+        self.usernames = set()
+        self.emails = set()
+        for username, email in self.db.execute(select(User.username, User.email)):
+            self.usernames.add(username.lower())
+            self.emails.add(email.lower())
+
+    # Row conversion
+
+    def _ticket_values(self, row: TicketImportRow, line: int) -> Optional[Dict[str, Any]]:
+        values = {}
+        for field, reference, lookup in (
+            ("category_id", row.category, self.categories),
+            ("created_by_id", row.created_by, self.users),
+            ("assigned_to_id", row.assigned_to, self.users),
+        ):
+            if reference is None:
+                values[field] = None
+                continue
+            resolved = lookup.get(str(reference).strip().lower())
+            if resolved is None:
+                self.errors.append((line, field.replace("_id", ""), f"Unknown reference: {reference}"))
+                return None
+            values[field] = resolved
+
+        created_at = as_utc(row.created_at) if row.created_at else datetime.now(timezone.utc)
+        response_due_at, resolve_due_at = self.policy.due_dates(row.priority, created_at)
+        # Solved tickets without dates count as solved when they were opened
+        resolved_at, closed_at = row.resolved_at, row.closed_at
+        if row.status in (TicketStatus.RESOLVED, TicketStatus.CLOSED) and resolved_at is None:
+            resolved_at = closed_at or created_at
+        if row.status == TicketStatus.CLOSED and closed_at is None:
+            closed_at = resolved_at
+        values.update(
+            title=row.title,
+            description=row.description,
+            status=row.status,
+            priority=row.priority,
+            solution=row.solution,
+            created_at=_naive_utc(created_at),
+            resolved_at=_naive_utc(resolved_at),
+            closed_at=_naive_utc(closed_at),
+            response_due_at=_naive_utc(response_due_at),
+            resolve_due_at=_naive_utc(resolve_due_at),
+            escalation_level=0,
+        )
+        return values
+
+    def _user_values(self, row: UserImportRow, line: int) -> Optional[Dict[str, Any]]:
+        username, email = row.username.lower(), row.email.lower()
+        if username in self.usernames:
+            self.errors.append((line, "username", f"Username already registered: {row.username}"))
+            return None
+        if email in self.emails:
+            self.errors.append((line, "email", f"Email already registered: {row.email}"))
+            return None
+        self.usernames.add(username)
+        self.emails.add(email)
+        return {
+            "username": row.username,
+            "email": row.email,
+            "full_name": row.full_name,
+            "department": row.department,
+            "phone": row.phone,
+            "role": row.role,
+            "is_active": row.is_active,
+            # bcrypt is deliberately slow: rows with passwords import far slower
+            "hashed_password": get_password_hash(row.password) if row.password else None,
+            "is_ldap_user": not row.password,
+            "created_at": datetime.utcnow(),
+        }
+
+    # Writing
+
+    @property
+    def table(self):
+        return Ticket.__table__ if self.entity == "tickets" else User.__table__
+
+    def _copy(self, rows: List[Dict[str, Any]]):
+        """PostgreSQL COPY of a batch through the session's connection"""
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for values in rows:
+            writer.writerow([self._copy_value(values[column]) for column in columns])
+        buffer.seek(0)
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {self.table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _copy_value(value):
+        if value is None:
+            return None
+        if isinstance(value, bool):
+            return "t" if value else "f"
+        if isinstance(value, datetime):
+            return value.isoformat()
+        if isinstance(value, enum.Enum):
+            # SQLAlchemy Enum columns store the member name
+            return value.name
+        return value
+
+    def _write(self, batch: List[Tuple[int, Dict[str, Any]]]):
+        rows = [values for _, values in batch]
+        if self.entity == "tickets":
+            # Written now on the database clock, so the changes feed picks them up
+            updated_at = ticket_changes.database_now(self.db)
+            for values in rows:
+                values["updated_at"] = updated_at
+        try:
+            if self._postgres:
+                self._copy(rows)
+            else:
+                self.db.execute(insert(self.table), rows)
+            self.db.commit()
+            self.imported += len(rows)
+            return
+        except SQLAlchemyError:
+            self.db.rollback()
+        except Exception:
+            if not self._postgres:
+                raise
+            self.db.rollback()
+
+        # Find the offending rows one by one
+        for line, values in batch:
+            try:
+                self.db.execute(insert(self.table), [values])
+                self.db.commit()
+                self.imported += 1
+            except SQLAlchemyError as exc:
+                self.db.rollback()
+                self.errors.append((line, "", str(getattr(exc, "orig", exc)).splitlines()[0]))
+
+    # Driver
+
+    def run(self, rows: Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]) -> Dict[str, int]:
+        schema = TicketImportRow if self.entity == "tickets" else UserImportRow
+        convert = self._ticket_values if self.entity == "tickets" else self._user_values
+        batch: List[Tuple[int, Dict[str, Any]]] = []
+        for line, raw, parse_error in rows:
+            self.rows += 1
+            if parse_error is not None:
+                self.errors.append((line, "", parse_error))
+                continue
+            try:
+                row = schema.model_validate(_clean(raw))
+            except ValidationError as exc:
+                for error in exc.errors():
+                    self.errors.append((line, ".".join(str(part) for part in error["loc"]), error["msg"]))
+                continue
+            values = convert(row, line)
+            if values is not None:
+                batch.append((line, values))
+            if len(batch) >= BATCH_SIZE:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+        return {"rows": self.rows, "imported": self.imported, "failed": self.rows - self.imported}
+
+
+def import_file(path: str, fmt: str, entity: str, errors_path: str) -> Dict[str, int]:
+    """Import a file and write its error report; returns the row counts"""
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        importer = Importer(db, entity)
+        summary = importer.run(read_rows(path, fmt))
+    finally:
+        db.close()
+
+    with open(errors_path, "w", newline="", encoding="utf-8") as report:
+        writer = csv.writer(report)
+        writer.writerow(ERROR_COLUMNS)
+        writer.writerows(importer.errors)
+
+    # Imported rows publish no events: every worker rebuilds on its next check
+    derived_state.announce(entity)
+    logger.info(
+        "Imported %s", entity,
+        extra={**summary, "duration_ms": round((time.perf_counter() - started) * 1000, 1)}
+    )
+    return summary
+
+
+@job_queue.handler("import", "Importação concluída", "Falha na importação")
+def run_import_job(params: Dict[str, Any], result_prefix: str) -> Dict[str, Any]:
+    errors_path = f"{result_prefix}.csv"
+    upload_path = os.path.join(settings.JOB_DIR, params["upload"])
+    try:
+        summary = import_file(upload_path, params["format"], params["entity"], errors_path)
+    finally:
+        try:
+            os.remove(upload_path)
+        except FileNotFoundError:
+            pass
+    return {
+        "filename": f"import_{params['entity']}_errors.csv",
+        "media_type": "text/csv",
+        "path": errors_path,
+        "summary": summary,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import tickets or users from a CSV or NDJSON file")
+    parser.add_argument("entity", choices=IMPORT_ENTITIES)
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, help="Defaults to the file extension")
+    parser.add_argument("--errors", default="import_errors.csv", help="Where to write the error report")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    summary = import_file(args.path, fmt, args.entity, args.errors)
+    print(f"{summary['imported']} of {summary['rows']} rows imported, {summary['failed']} failed (see {args.errors})")
+
+
+if __name__ == "__main__":
+    main()
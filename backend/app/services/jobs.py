@@ -0,0 +1,283 @@
+"""
+In-process background job queue.
+
+Long-running work (year-long reports, large exports, data imports) is submitted as a job
+and answered immediately with a job id. Jobs wait in an ``asyncio.Queue`` and
+are executed by a fixed pool of worker tasks (``JOB_WORKERS``), each running
+the handler in the threadpool so the event loop stays free.
+
+Job state and results are plain files in ``JOB_DIR`` (``<id>.json`` plus the
+result file), so any API worker process sharing the directory can answer a
+status poll or serve the download. Finished jobs are removed after
+``JOB_RESULT_TTL_SECONDS``. The owner is notified over the WebSocket when a
+job finishes.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+JOB_ID_CHARS = "0123456789abcdef"
+
+# A handler receives the job parameters and the path prefix for its result
+# file (``<JOB_DIR>/<id>.result``), writes the result next to it and returns
+# {"filename": ..., "media_type": ..., "path": ...} plus an optional "summary"
+JobHandler = Callable[[Dict[str, Any], str], Dict[str, str]]
+
+
+class JobLimitError(Exception):
+    """The user already has the maximum number of active jobs"""
+
+
+class JobQueue:
+    def __init__(self, directory: str, workers: int, result_ttl: int, max_active_per_user: int):
+        self.directory = directory
+        self.workers = workers
+        self.result_ttl = result_ttl
+        self.max_active_per_user = max_active_per_user
+        self._handlers: Dict[str, JobHandler] = {}
+        self._messages: Dict[str, Tuple[str, str]] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._hostname = socket.gethostname()
+
+    def handler(self, kind: str, done_message: str = "Tarefa concluída", failed_message: str = "Falha na tarefa"):
+        """Register the function that runs jobs of ``kind``"""
+        def register(func: JobHandler) -> JobHandler:
+            self._handlers[kind] = func
+            self._messages[kind] = (done_message, failed_message)
+            return func
+        return register
+
+    # Storage
+
+    def _meta_path(self, job_id: str) -> str:
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def _save(self, job: Dict[str, Any]):
+        path = self._meta_path(job["id"])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as meta_file:
+            json.dump(job, meta_file, default=str)
+        os.replace(tmp_path, path)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job metadata, or None for unknown, invalid or expired ids"""
+        if len(job_id) != 32 or any(char not in JOB_ID_CHARS for char in job_id):
+            return None
+        try:
+            with open(self._meta_path(job_id)) as meta_file:
+                job = json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+
+        if self._is_orphaned(job):
+            job.update(status=FAILED, error="Job interrupted by a server restart", finished_at=time.time())
+            self._save(job)
+        if self._is_expired(job):
+            self._remove(job)
+            return None
+        return job
+
+    def list_for_user(self, user_id: int) -> List[Dict[str, Any]]:
+        jobs = []
+        for name in os.listdir(self.directory) if os.path.isdir(self.directory) else []:
+            if name.endswith(".json"):
+                job = self.get(name[:-5])
+                if job and job["user_id"] == user_id:
+                    jobs.append(job)
+        return sorted(jobs, key=lambda job: job["created_at"], reverse=True)
+
+    def _is_orphaned(self, job: Dict[str, Any]) -> bool:
+        # Queued/running in a process of this host that no longer exists
+        if job["status"] not in ACTIVE_STATUSES or job.get("host") != self._hostname:
+            return False
+        try:
+            os.kill(job["pid"], 0)
+        except ProcessLookupError:
+            return True
+        except OSError:
+            return False
+        return False
+
+    def _is_expired(self, job: Dict[str, Any]) -> bool:
+        finished_at = job.get("finished_at")
+        return finished_at is not None and time.time() - finished_at > self.result_ttl
+
+    def _remove(self, job: Dict[str, Any]):
+        for path in (job.get("result_path"), self._meta_path(job["id"])):
+            if path:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def cleanup(self) -> int:
+        """Delete expired jobs and their results; returns how many were removed"""
+        removed = 0
+        if not os.path.isdir(self.directory):
+            return removed
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                with open(path) as meta_file:
+                    job = json.load(meta_file)
+            except (OSError, ValueError):
+                continue
+            if self._is_expired(job):
+                self._remove(job)
+                removed += 1
+        return removed
+
+    # Execution
+
+    async def start(self):
+        if self._tasks:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._cleanup_loop()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, kind: str, params: Dict[str, Any], user_id: int) -> Dict[str, Any]:
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        await self.start()
+
+        active = [job for job in self.list_for_user(user_id) if job["status"] in ACTIVE_STATUSES]
+        if len(active) >= self.max_active_per_user:
+            raise JobLimitError()
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "params": params,
+            "user_id": user_id,
+            "status": QUEUED,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "error": None,
+            "filename": None,
+            "media_type": None,
+            "result_path": None,
+            "host": self._hostname,
+            "pid": os.getpid(),
+        }
+        self._save(job)
+        await self._queue.put(job["id"])
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception:
+                logger.exception("Job %s crashed the worker loop", job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = self.get(job_id)
+        if job is None:
+            return
+        job.update(status=RUNNING, started_at=time.time())
+        self._save(job)
+
+        handler = self._handlers[job["kind"]]
+        try:
+            result = await run_in_threadpool(handler, job["params"], os.path.join(self.directory, f"{job['id']}.result"))
+            job.update(
+                status=COMPLETED,
+                filename=result["filename"],
+                media_type=result["media_type"],
+                result_path=result["path"],
+                summary=result.get("summary")
+            )
+        except Exception as exc:
+            logger.exception("Job %s (%s) failed", job["id"], job["kind"])
+            job.update(status=FAILED, error=str(exc) or exc.__class__.__name__)
+        job["finished_at"] = time.time()
+        self._save(job)
+
+        logger.info(
+            "Job %s finished", job["id"],
+            extra={"kind": job["kind"], "status": job["status"],
+                   "duration_ms": round((job["finished_at"] - job["started_at"]) * 1000, 1)}
+        )
+        await self._notify(job)
+
+    async def _notify(self, job: Dict[str, Any]):
+        from app.websocket.manager import manager
+
+        done_message, failed_message = self._messages.get(job["kind"], ("Tarefa concluída", "Falha na tarefa"))
+        message = {
+            "type": "job_finished",
+            "job": public_view(job),
+            "message": done_message if job["status"] == COMPLETED else failed_message,
+            "timestamp": datetime.now().isoformat()
+        }
+        await manager.send_to_user(message, job["user_id"])
+
+    async def _cleanup_loop(self):
+        while True:
+            await asyncio.sleep(max(60, self.result_ttl // 4))
+            try:
+                removed = await run_in_threadpool(self.cleanup)
+                if removed:
+                    logger.info("Removed %s expired jobs", removed)
+            except Exception:
+                logger.exception("Job cleanup failed")
+
+
+def public_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job fields exposed to clients"""
+    def iso(timestamp):
+        return datetime.fromtimestamp(timestamp).isoformat() if timestamp else None
+
+    return {
+        "id": job["id"],
+        "kind": job["kind"],
+        "params": job["params"],
+        "status": job["status"],
+        "created_at": iso(job["created_at"]),
+        "started_at": iso(job["started_at"]),
+        "finished_at": iso(job["finished_at"]),
+        "error": job["error"],
+        "filename": job["filename"],
+        "summary": job.get("summary"),
+    }
+
+
+job_queue = JobQueue(
+    directory=settings.JOB_DIR,
+    workers=settings.JOB_WORKERS,
+    result_ttl=settings.JOB_RESULT_TTL_SECONDS,
+    max_active_per_user=settings.JOB_MAX_ACTIVE_PER_USER
+)
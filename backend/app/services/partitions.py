@@ -0,0 +1,297 @@
+"""
+Monthly partitions of the ticket history tables (PostgreSQL only).
+
+``ticket_activities`` and ``ticket_comments`` grow with every ticket and are
+never updated in bulk, so on PostgreSQL they are range-partitioned by
+``created_at`` month. Each month is a table of its own (``<table>_y2026m10``)
+with its own indexes, so vacuum and index maintenance work on the recent
+months only, and queries bounded by ``created_at`` skip older partitions. A
+DEFAULT partition catches rows outside the months created so far.
+
+Partitions are created ``PARTITION_MONTHS_AHEAD`` months in advance when a
+worker starts and by the maintenance command, which also archives months
+older than ``PARTITION_RETENTION_MONTHS`` (0 keeps everything): the partition
+is detached, copied to ``<PARTITION_ARCHIVE_DIR>/<partition>.csv.gz`` and
+dropped. Run it monthly, e.g. from cron:
+
+    python -m app.services.partitions
+    python -m app.services.partitions --retention-months 24
+
+On other databases the tables stay plain and everything here is a no-op.
+"""
+import argparse
+import gzip
+import logging
+import os
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("ticket_activities", "ticket_comments")
+
+# Arbitrary key shared by every worker for pg_advisory_lock
+PARTITION_LOCK_KEY = 7351902215
+
+_MONTH_SUFFIX = re.compile(r"_y(\d{4})m(\d{2})$")
+
+# History rows are never older than their ticket; the slack absorbs clock and
+# storage format differences (SQLite compares timestamps as text)
+HISTORY_SLACK = timedelta(days=1)
+
+
+def history_since(ticket_created_at: Optional[datetime]) -> datetime:
+    """Lower bound on ``created_at`` for the history rows of a ticket
+
+    Filtering on it lets PostgreSQL skip the partitions older than the ticket.
+    """
+    if ticket_created_at is None:
+        return datetime.min
+    return ticket_created_at - HISTORY_SLACK
+
+
+def month_start(value: datetime, months: int = 0) -> datetime:
+    """First instant (UTC) of the month of ``value`` shifted by ``months``"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def is_partitioned(connection: Connection, table: str) -> bool:
+    return connection.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"), {"table": table}
+    ).first() is not None
+
+
+def monthly_partitions(connection: Connection, table: str) -> List[Tuple[str, datetime]]:
+    """(name, month) of the monthly partitions of ``table``, oldest first"""
+    names = connection.execute(
+        text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+             "WHERE i.inhparent = to_regclass(:table)"),
+        {"table": table}
+    ).scalars()
+    partitions = []
+    for name in names:
+        match = _MONTH_SUFFIX.search(name)
+        if match:
+            partitions.append((name, datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+# Creating partitions
+
+def _create_partition(connection: Connection, table: str, month: datetime):
+    name = partition_name(table, month)
+    bounds = {"lower": month, "upper": month_start(month, 1)}
+    default = f"{table}_default"
+    # A new partition may not overlap rows already kept by the DEFAULT partition;
+    # such rows are moved out and re-inserted through the parent
+    stray = connection.execute(
+        text(f"SELECT 1 FROM {default} WHERE created_at >= :lower AND created_at < :upper LIMIT 1"), bounds
+    ).first() is not None
+    if stray:
+        connection.execute(text(
+            f"CREATE TEMPORARY TABLE {name}_stray AS "
+            f"SELECT * FROM {default} WHERE created_at >= :lower AND created_at < :upper"
+        ), bounds)
+        connection.execute(text(f"DELETE FROM {default} WHERE created_at >= :lower AND created_at < :upper"), bounds)
+    connection.execute(text(
+        f"CREATE TABLE {name} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{bounds['lower'].isoformat()}') TO ('{bounds['upper'].isoformat()}')"
+    ))
+    if stray:
+        connection.execute(text(f"INSERT INTO {table} SELECT * FROM {name}_stray"))
+        connection.execute(text(f"DROP TABLE {name}_stray"))
+
+
+def _missing_months(connection: Connection, months_ahead: int) -> List[Tuple[str, datetime]]:
+    current = month_start(datetime.now(timezone.utc))
+    missing = []
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(connection, table):
+            continue
+        existing = {month for _, month in monthly_partitions(connection, table)}
+        missing.extend(
+            (table, month_start(current, offset)) for offset in range(months_ahead + 1)
+            if month_start(current, offset) not in existing
+        )
+    return missing
+
+
+def ensure_partitions(connection: Connection, months_ahead: Optional[int] = None) -> List[str]:
+    """Create the partitions of the current and the next months; returns their names"""
+    if connection.dialect.name != "postgresql":
+        return []
+    if months_ahead is None:
+        months_ahead = settings.PARTITION_MONTHS_AHEAD
+    if not _missing_months(connection, months_ahead):
+        return []
+
+    connection.commit()
+    connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": PARTITION_LOCK_KEY})
+    try:
+        # Another worker may have created them while we waited
+        missing = _missing_months(connection, months_ahead)
+        for table, month in missing:
+            _create_partition(connection, table, month)
+        connection.commit()
+    finally:
+        connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": PARTITION_LOCK_KEY})
+    created = [partition_name(table, month) for table, month in missing]
+    if created:
+        logger.info("Created history partitions", extra={"partitions": created})
+    return created
+
+
+def partition_table(connection: Connection, table: str, months_ahead: Optional[int] = None):
+    """Turn a plain history table into a partitioned one, keeping rows, ids and indexes"""
+    if months_ahead is None:
+        months_ahead = settings.PARTITION_MONTHS_AHEAD
+    if is_partitioned(connection, table):
+        return
+
+    inspector = inspect(connection)
+    columns = [column["name"] for column in inspector.get_columns(table)]
+    indexes = [index for index in inspector.get_indexes(table) if not index.get("unique")]
+    foreign_keys = inspector.get_foreign_keys(table)
+    column_list = ", ".join(columns)
+    legacy = f"{table}_unpartitioned"
+
+    connection.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+    connection.execute(text(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE"))
+    connection.execute(text(
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)"
+    ))
+    connection.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+
+    oldest = connection.execute(text(f"SELECT min(created_at) FROM {legacy}")).scalar()
+    current = month_start(datetime.now(timezone.utc))
+    month = month_start(oldest) if oldest is not None else current
+    while month <= month_start(current, months_ahead):
+        _create_partition(connection, table, month)
+        month = month_start(month, 1)
+
+    selected = ", ".join("COALESCE(created_at, now())" if column == "created_at" else column for column in columns)
+    connection.execute(text(f"INSERT INTO {table} ({column_list}) SELECT {selected} FROM {legacy}"))
+    connection.execute(text(f"DROP TABLE {legacy}"))
+
+    # The partition key has to be part of the primary key
+    connection.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY (id, created_at)"))
+    connection.execute(text(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id"))
+    _restore_foreign_keys(connection, table, foreign_keys)
+    _restore_indexes(connection, table, indexes)
+    logger.info("Partitioned %s by month", table)
+
+
+def unpartition_table(connection: Connection, table: str):
+    """Merge a partitioned history table back into a plain one"""
+    if not is_partitioned(connection, table):
+        return
+
+    inspector = inspect(connection)
+    indexes = [index for index in inspector.get_indexes(table) if not index.get("unique")]
+    foreign_keys = inspector.get_foreign_keys(table)
+    partitioned = f"{table}_partitioned"
+
+    connection.execute(text(f"ALTER TABLE {table} RENAME TO {partitioned}"))
+    connection.execute(text(f"ALTER SEQUENCE {table}_id_seq OWNED BY NONE"))
+    connection.execute(text(f"CREATE TABLE {table} (LIKE {partitioned} INCLUDING DEFAULTS)"))
+    connection.execute(text(f"INSERT INTO {table} SELECT * FROM {partitioned}"))
+    connection.execute(text(f"DROP TABLE {partitioned}"))
+
+    connection.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY (id)"))
+    connection.execute(text(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id"))
+    _restore_foreign_keys(connection, table, foreign_keys)
+    _restore_indexes(connection, table, indexes)
+
+
+def _restore_foreign_keys(connection: Connection, table: str, foreign_keys):
+    for foreign_key in foreign_keys:
+        ondelete = foreign_key.get("options", {}).get("ondelete")
+        connection.execute(text(
+            f"ALTER TABLE {table} ADD FOREIGN KEY ({', '.join(foreign_key['constrained_columns'])}) "
+            f"REFERENCES {foreign_key['referred_table']} ({', '.join(foreign_key['referred_columns'])})"
+            + (f" ON DELETE {ondelete}" if ondelete else "")
+        ))
+
+
+def _restore_indexes(connection: Connection, table: str, indexes):
+    for index in indexes:
+        connection.execute(text(f"CREATE INDEX {index['name']} ON {table} ({', '.join(index['column_names'])})"))
+
+
+# Archiving
+
+def archive_partitions(connection: Connection, retention_months: int, archive_dir: str) -> List[str]:
+    """Detach, export and drop the monthly partitions older than the retention; returns the files"""
+    if connection.dialect.name != "postgresql" or retention_months <= 0:
+        return []
+    cutoff = month_start(datetime.now(timezone.utc), -retention_months)
+    os.makedirs(archive_dir, exist_ok=True)
+
+    archived = []
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(connection, table):
+            continue
+        for name, month in monthly_partitions(connection, table):
+            if month >= cutoff:
+                break
+            path = os.path.join(archive_dir, f"{name}.csv.gz")
+            connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            # Export through the DBAPI cursor of this transaction; the drop only
+            # commits once the file is complete
+            cursor = connection.connection.cursor()
+            try:
+                with gzip.open(path, "wt", encoding="utf-8", newline="") as archive:
+                    cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", archive)
+            finally:
+                cursor.close()
+            connection.execute(text(f"DROP TABLE {name}"))
+            connection.commit()
+            archived.append(path)
+            logger.info("Archived partition %s", name, extra={"path": path})
+    return archived
+
+
+def maintain(engine: Engine, months_ahead: Optional[int] = None,
+             retention_months: Optional[int] = None, archive_dir: Optional[str] = None) -> Tuple[List[str], List[str]]:
+    """Create upcoming partitions and archive expired ones; returns (created, archived)"""
+    if retention_months is None:
+        retention_months = settings.PARTITION_RETENTION_MONTHS
+    with engine.connect() as connection:
+        created = ensure_partitions(connection, months_ahead)
+        archived = archive_partitions(connection, retention_months, archive_dir or settings.PARTITION_ARCHIVE_DIR)
+    return created, archived
+
+
+def main(argv=None):
+    from app.core.database import engine
+
+    parser = argparse.ArgumentParser(description="Create and archive monthly partitions of the ticket history")
+    parser.add_argument("--months-ahead", type=int, help="Defaults to PARTITION_MONTHS_AHEAD")
+    parser.add_argument("--retention-months", type=int, help="Defaults to PARTITION_RETENTION_MONTHS (0 keeps all)")
+    parser.add_argument("--archive-dir", help="Defaults to PARTITION_ARCHIVE_DIR")
+    args = parser.parse_args(argv)
+
+    if engine.dialect.name != "postgresql":
+        print("History tables are only partitioned on PostgreSQL; nothing to do")
+        return
+    created, archived = maintain(engine, args.months_ahead, args.retention_months, args.archive_dir)
+    print(f"{len(created)} partitions created, {len(archived)} archived")
+    for path in archived:
+        print(f"  {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Streaming export engines (CSV and XLSX).
+
+Both writers consume rows lazily and yield bytes, so an export can be fed by
+a server-side cursor and sent with ``StreamingResponse`` without holding the
+dataset in memory. CSV is written in chunks as rows arrive. XLSX uses the
+openpyxl write-only workbook (rows are flushed to disk as they are appended)
+and the finished file is then streamed from a temporary file.
+
+Only the standard library is imported here; openpyxl is imported inside the
+XLSX writer so API workers never load it unless an XLSX export is requested.
+"""
+import csv
+import io
+import os
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+EXPORT_FORMATS = ("csv", "xlsx")
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+# Bytes buffered before a chunk is yielded
+CHUNK_SIZE = 64 * 1024
+
+# Report type -> (key of the exported table in the report payload, sheet title)
+REPORT_TABLES = {
+    "performance": ("technicians", "Performance"),
+    "department": ("departments", "Departamentos"),
+    "timeline": ("timeline", "Timeline"),
+    "sla": ("priority_analysis", "SLA"),
+}
+
+
+def stream_csv(columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so Excel detects UTF-8 (accented names)
+    buffer.write("\ufeff")
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+def stream_xlsx(columns: Sequence[str], rows: Iterable[Sequence[Any]], sheet_title: str) -> Iterator[bytes]:
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title)
+    sheet.append(list(columns))
+    for row in rows:
+        sheet.append(_xlsx_row(row))
+
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        workbook.save(path)
+        with open(path, "rb") as xlsx_file:
+            while True:
+                chunk = xlsx_file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+def _xlsx_row(row: Sequence[Any]) -> List[Any]:
+    # Excel has no time zone support; openpyxl rejects aware datetimes
+    return [
+        value.replace(tzinfo=None) if getattr(value, "tzinfo", None) is not None else value
+        for value in row
+    ]
+
+
+def stream_rows(columns: Sequence[str], rows: Iterable[Sequence[Any]], export_format: str, sheet_title: str) -> Iterator[bytes]:
+    if export_format == "xlsx":
+        return stream_xlsx(columns, rows, sheet_title)
+    return stream_csv(columns, rows)
+
+
+def stream_report(report_type: str, data: Dict[str, Any], export_format: str) -> Iterator[bytes]:
+    """Stream the main table of a report payload"""
+    key, sheet_title = REPORT_TABLES[report_type]
+    records = data.get(key) or []
+    columns: List[str] = []
+    for record in records:
+        columns.extend(column for column in record if column not in columns)
+    rows = ([record.get(column) for column in columns] for record in records)
+    return stream_rows(columns, rows, export_format, sheet_title)
+
+
+def attachment_headers(filename: str) -> Dict[str, str]:
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
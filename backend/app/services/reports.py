@@ -0,0 +1,341 @@
+"""
+Report builders.
+
+Plain synchronous functions taking a session, shared by the report endpoints
+and by background report jobs.
+"""
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import Session
+
+from app.core.database import ReadSessionLocal, read_engine
+from app.models.models import (
+    ACTIVE_TICKET_STATUSES, Ticket, TicketEvaluation, TicketPriority, TicketStatus, User
+)
+from app.services import report_export
+from app.services.jobs import job_queue
+from app.services.sla import sla_service
+
+REPORT_TYPES = ("performance", "department", "timeline", "sla")
+
+# Most urgent first
+SLA_PRIORITY_ORDER = [
+    TicketPriority.CRITICAL, TicketPriority.URGENT, TicketPriority.HIGH,
+    TicketPriority.MEDIUM, TicketPriority.LOW
+]
+
+
+def _hours_between(db: Session, start, end):
+    """SQL expression for the hours between two timestamp columns"""
+    if db.get_bind().dialect.name == "sqlite":
+        return (func.julianday(end) - func.julianday(start)) * 24
+    return func.extract('epoch', end - start) / 3600
+
+
+def _period_start(db: Session, interval: str):
+    """SQL expression truncating Ticket.created_at to the start of its period"""
+    if db.get_bind().dialect.name == "sqlite":
+        if interval == "weekly":
+            return func.date(Ticket.created_at, 'weekday 1', '-7 days')
+        if interval == "monthly":
+            return func.strftime('%Y-%m-01', Ticket.created_at)
+        return func.date(Ticket.created_at)
+    if interval in ("weekly", "monthly"):
+        return func.date_trunc('week' if interval == "weekly" else 'month', Ticket.created_at)
+    return func.date(Ticket.created_at)
+
+
+def _format_period(value, date_format: str) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        # SQLite returns dates as ISO strings
+        value = datetime.strptime(value[:10], '%Y-%m-%d')
+    return value.strftime(date_format)
+
+
+def _percent(part: int, total: int) -> float:
+    return round(part / total * 100, 2) if total else 0
+
+
+def build_technician_performance(db: Session, days: int = 30, technician_id: Optional[int] = None) -> Dict[str, Any]:
+    """Performance metrics for technicians"""
+    
+    # Calculate date range
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+    
+    # Base query
+    query = db.query(
+        User.id,
+        User.full_name,
+        User.username,
+        User.department,
+        func.count(Ticket.id).label('total_tickets'),
+        func.count(case((Ticket.status == TicketStatus.RESOLVED, 1))).label('resolved_tickets'),
+        func.count(case((Ticket.status == TicketStatus.CLOSED, 1))).label('closed_tickets'),
+        func.avg(
+            case((Ticket.resolved_at.isnot(None), 
+                 _hours_between(db, Ticket.created_at, Ticket.resolved_at)))
+        ).label('avg_resolution_time_hours'),
+        func.avg(TicketEvaluation.rating).label('avg_rating')
+    ).join(
+        Ticket, User.id == Ticket.assigned_to_id
+    ).outerjoin(
+        TicketEvaluation, Ticket.id == TicketEvaluation.ticket_id
+    ).filter(
+        User.role.in_(['technician', 'admin']),
+        Ticket.created_at >= start_date,
+        Ticket.created_at <= end_date
+    )
+    
+    # Filter by specific technician if requested
+    if technician_id:
+        query = query.filter(User.id == technician_id)
+    
+    # Group by user
+    query = query.group_by(User.id, User.full_name, User.username, User.department)
+    
+    results = query.all()
+    
+    performance_data = []
+    for result in results:
+        resolution_rate = (result.resolved_tickets + result.closed_tickets) / result.total_tickets * 100 if result.total_tickets > 0 else 0
+        
+        performance_data.append({
+            'technician_id': result.id,
+            'name': result.full_name,
+            'username': result.username,
+            'department': result.department,
+            'total_tickets': result.total_tickets,
+            'resolved_tickets': result.resolved_tickets,
+            'closed_tickets': result.closed_tickets,
+            'resolution_rate': round(resolution_rate, 2),
+            'avg_resolution_time_hours': round(result.avg_resolution_time_hours or 0, 2),
+            'avg_rating': round(result.avg_rating or 0, 2)
+        })
+    
+    return {
+        'period': f'{days} days',
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'technicians': performance_data
+    }
+
+
+def build_department_metrics(db: Session, days: int = 30) -> Dict[str, Any]:
+    """Metrics grouped by the department of the ticket creator"""
+    
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+    
+    # Get tickets by department (based on creator's department)
+    query = db.query(
+        User.department,
+        func.count(Ticket.id).label('total_tickets'),
+        func.count(case((Ticket.status == TicketStatus.OPEN, 1))).label('open_tickets'),
+        func.count(case((Ticket.status == TicketStatus.IN_PROGRESS, 1))).label('in_progress_tickets'),
+        func.count(case((Ticket.status == TicketStatus.RESOLVED, 1))).label('resolved_tickets'),
+        func.count(case((Ticket.status == TicketStatus.CLOSED, 1))).label('closed_tickets'),
+        func.count(case((Ticket.priority == TicketPriority.URGENT, 1))).label('urgent_tickets'),
+        func.count(case((Ticket.priority == TicketPriority.HIGH, 1))).label('high_tickets'),
+        func.avg(
+            case((Ticket.resolved_at.isnot(None), 
+                 _hours_between(db, Ticket.created_at, Ticket.resolved_at)))
+        ).label('avg_resolution_time_hours')
+    ).join(
+        User, Ticket.created_by_id == User.id
+    ).filter(
+        Ticket.created_at >= start_date,
+        Ticket.created_at <= end_date,
+        User.department.isnot(None)
+    ).group_by(User.department)
+    
+    results = query.all()
+    
+    department_data = []
+    for result in results:
+        resolution_rate = (result.resolved_tickets + result.closed_tickets) / result.total_tickets * 100 if result.total_tickets > 0 else 0
+        
+        department_data.append({
+            'department': result.department,
+            'total_tickets': result.total_tickets,
+            'open_tickets': result.open_tickets,
+            'in_progress_tickets': result.in_progress_tickets,
+            'resolved_tickets': result.resolved_tickets,
+            'closed_tickets': result.closed_tickets,
+            'urgent_tickets': result.urgent_tickets,
+            'high_tickets': result.high_tickets,
+            'resolution_rate': round(resolution_rate, 2),
+            'avg_resolution_time_hours': round(result.avg_resolution_time_hours or 0, 2)
+        })
+    
+    return {
+        'period': f'{days} days',
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'departments': department_data
+    }
+
+
+def build_timeline_metrics(db: Session, days: int = 30, interval: str = "daily") -> Dict[str, Any]:
+    """Ticket counts over time"""
+    
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+    
+    # Determine grouping based on interval
+    date_trunc = _period_start(db, interval)
+    date_format = '%Y-%m' if interval == "monthly" else '%Y-%m-%d'
+    
+    query = db.query(
+        date_trunc.label('period'),
+        func.count(Ticket.id).label('created_tickets'),
+        func.count(case((Ticket.resolved_at.isnot(None), 1))).label('resolved_tickets'),
+        func.count(case((Ticket.status == TicketStatus.CLOSED, 1))).label('closed_tickets'),
+        func.count(case((Ticket.priority == TicketPriority.URGENT, 1))).label('urgent_tickets')
+    ).filter(
+        Ticket.created_at >= start_date,
+        Ticket.created_at <= end_date
+    ).group_by(date_trunc).order_by(date_trunc)
+    
+    results = query.all()
+    
+    timeline_data = []
+    for result in results:
+        timeline_data.append({
+            'period': _format_period(result.period, date_format),
+            'created_tickets': result.created_tickets,
+            'resolved_tickets': result.resolved_tickets,
+            'closed_tickets': result.closed_tickets,
+            'urgent_tickets': result.urgent_tickets
+        })
+    
+    return {
+        'interval': interval,
+        'period': f'{days} days',
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'timeline': timeline_data
+    }
+
+
+def build_sla_analysis(db: Session, days: int = 30) -> Dict[str, Any]:
+    """SLA compliance analysis against the deadlines stored on each ticket"""
+    
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+    now = datetime.now(timezone.utc)
+    
+    # Targets as configured now; each ticket keeps the deadlines it was given
+    policy = sla_service.get_policy(db)
+    sla_targets = {priority.value: hours for priority, hours in policy.resolve_hours.items()}
+    
+    resolution_hours = _hours_between(db, Ticket.created_at, Ticket.resolved_at)
+    
+    # One grouped pass over the period
+    results = db.query(
+        Ticket.priority,
+        func.count(Ticket.resolved_at).label('total_tickets'),
+        func.count(case((Ticket.resolved_at <= Ticket.resolve_due_at, 1))).label('within_sla'),
+        func.sum(case((Ticket.resolved_at.isnot(None), resolution_hours))).label('resolution_hours'),
+        func.count(Ticket.first_response_at).label('responded_tickets'),
+        func.count(case((Ticket.first_response_at <= Ticket.response_due_at, 1))).label('responded_within_sla'),
+        func.count(case((and_(
+                Ticket.status.in_(ACTIVE_TICKET_STATUSES),
+                Ticket.resolve_due_at < now
+            ), 1))).label('open_breached')
+    ).filter(
+        Ticket.created_at >= start_date,
+        Ticket.created_at <= end_date
+    ).group_by(Ticket.priority).all()
+    
+    totals = {'total_tickets': 0, 'within_sla': 0, 'resolution_hours': 0.0,
+              'responded_tickets': 0, 'responded_within_sla': 0, 'open_breached': 0}
+    sla_data = []
+    for result in sorted(results, key=lambda row: SLA_PRIORITY_ORDER.index(row.priority)):
+        for key in totals:
+            totals[key] += getattr(result, key) or 0
+        
+        if result.total_tickets > 0:
+            sla_data.append({
+                'priority': result.priority.value,
+                'target_hours': sla_targets.get(result.priority.value),
+                'response_target_hours': policy.response_hours.get(result.priority),
+                'total_tickets': result.total_tickets,
+                'within_sla': result.within_sla,
+                'sla_compliance_percent': _percent(result.within_sla, result.total_tickets),
+                'avg_resolution_time_hours': round((result.resolution_hours or 0) / result.total_tickets, 2),
+                'response_compliance_percent': _percent(result.responded_within_sla, result.responded_tickets),
+                'open_breached': result.open_breached
+            })
+    
+    return {
+        'period': f'{days} days',
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'business_hours_only': policy.calendar.business_hours_only,
+        'sla_targets': sla_targets,
+        'priority_analysis': sla_data,
+        'overall': {
+            'total_resolved_tickets': totals['total_tickets'],
+            'avg_resolution_time_hours': round(totals['resolution_hours'] / totals['total_tickets'], 2) if totals['total_tickets'] else 0,
+            'sla_compliance_percent': _percent(totals['within_sla'], totals['total_tickets']),
+            'response_compliance_percent': _percent(totals['responded_within_sla'], totals['responded_tickets']),
+            'open_breached': totals['open_breached']
+        }
+    }
+
+
+def build_report(db: Session, report_type: str, days: int = 30, **options) -> Dict[str, Any]:
+    """Build a report by type; options are passed to the builder"""
+    if report_type == "performance":
+        return build_technician_performance(db, days=days, technician_id=options.get("technician_id"))
+    if report_type == "department":
+        return build_department_metrics(db, days=days)
+    if report_type == "timeline":
+        return build_timeline_metrics(db, days=days, interval=options.get("interval") or "daily")
+    if report_type == "sla":
+        return build_sla_analysis(db, days=days)
+    raise ValueError(f"Invalid report type: {report_type}")
+
+
+def report_filename(report_type: str, export_format: str) -> str:
+    return f"relatorio-{report_type}-{datetime.now().strftime('%Y-%m-%d')}.{export_format}"
+
+
+@job_queue.handler("report", "Relatório pronto para download", "Falha ao gerar relatório")
+def run_report_job(params: Dict[str, Any], result_prefix: str) -> Dict[str, str]:
+    """Build a report in a background job and write it to ``<result_prefix>.<format>``"""
+    report_type = params["report_type"]
+    export_format = params["format"]
+
+    db = ReadSessionLocal(bind=read_engine())
+    try:
+        data = build_report(
+            db, report_type, days=params["days"],
+            technician_id=params.get("technician_id"), interval=params.get("interval")
+        )
+    finally:
+        db.close()
+
+    path = f"{result_prefix}.{export_format}"
+    with open(path, "wb") as result_file:
+        if export_format == "json":
+            payload = {
+                'report_type': report_type,
+                'format': export_format,
+                'generated_at': datetime.now().isoformat(),
+                'data': data
+            }
+            result_file.write(json.dumps(jsonable_encoder(payload)).encode("utf-8"))
+        else:
+            for chunk in report_export.stream_report(report_type, data, export_format):
+                result_file.write(chunk)
+
+    media_type = "application/json" if export_format == "json" else report_export.MEDIA_TYPES[export_format]
+    return {"filename": report_filename(report_type, export_format), "media_type": media_type, "path": path}
@@ -0,0 +1,305 @@
+"""
+System settings service with a per-process snapshot cache.
+
+All settings rows are loaded with a single query into an immutable snapshot.
+Workers share a version counter stored in ``system_settings`` so a change made
+by one worker is picked up by the others on their next version check.
+"""
+import json
+import threading
+import time
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional
+
+from sqlalchemy import Integer, Text, cast, func, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import SystemSettings
+
+# Default settings
+DEFAULT_SETTINGS = {
+    "general": {
+        "system_name": "Sistema de Tickets TI",
+        "company_name": "Empresa LTDA",
+        "support_email": "suporte@empresa.com",
+        "max_file_size": 10,
+        "allowed_file_types": ".pdf,.doc,.docx,.txt,.png,.jpg,.jpeg,.gif",
+        "timezone": "America/Sao_Paulo",
+        "language": "pt-BR"
+    },
+    "sla": {
+        "low_priority_hours": 72,
+        "medium_priority_hours": 24,
+        "high_priority_hours": 8,
+        "urgent_priority_hours": 2,
+        "critical_priority_hours": 1,
+        "low_response_hours": 24,
+        "medium_response_hours": 8,
+        "high_response_hours": 4,
+        "urgent_response_hours": 1,
+        "critical_response_hours": 0.5,
+        "auto_escalation": True,
+        "escalation_hours": 2,
+        "business_hours_only": False,
+        "business_start_hour": 8,
+        "business_end_hour": 18,
+        "business_days": [0, 1, 2, 3, 4],  # Monday = 0
+        # "MM-DD" repeats every year, "YYYY-MM-DD" is a single date
+        "holidays": ["01-01", "04-21", "05-01", "09-07", "10-12", "11-02", "11-15", "11-20", "12-25"]
+    },
+    "permissions": {
+        "user_can_view_all_tickets": False,
+        "user_can_edit_own_tickets": True,
+        "user_can_close_own_tickets": False,
+        "technician_can_view_reports": True,
+        "auto_assign_tickets": True,
+        "require_category": True,
+        "allow_guest_tickets": False,
+        "require_approval_for_closure": False
+    },
+    "integrations": {
+        "ldap_enabled": False,
+        "ldap_server": "",
+        "ldap_port": 389,
+        "ldap_base_dn": "",
+        "ldap_user_dn": "",
+        "ldap_bind_user": "",
+        "ldap_bind_password": "",
+        "smtp_enabled": False,
+        "smtp_server": "",
+        "smtp_port": 587,
+        "smtp_username": "",
+        "smtp_password": "",
+        "smtp_use_tls": True,
+        "smtp_from_email": "",
+        "email_notifications_enabled": True,
+        "webhook_enabled": False,
+        "webhook_url": ""
+    }
+}
+
+# Rows under this prefix are counters, not settings
+META_PREFIX = "_meta."
+
+# Row used as the cross-worker invalidation counter, created with the schema
+VERSION_KEY = "_meta.version"
+VERSION_DESCRIPTION = "Settings cache version"
+
+
+def create_version_row(connection):
+    """Insert the version row of a new database"""
+    connection.execute(
+        SystemSettings.__table__.insert().values(key=VERSION_KEY, value="0", description=VERSION_DESCRIPTION)
+    )
+
+
+def serialize_value(value: Any) -> str:
+    """Convert a setting value to the text stored in the database"""
+    if isinstance(value, (dict, list, bool, int, float)):
+        return json.dumps(value)
+    return str(value)
+
+
+def deserialize_value(value: str) -> Any:
+    """Convert a stored setting back to its Python value"""
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value
+
+
+class SettingsSnapshot:
+    """Immutable view of all settings at a given version"""
+
+    __slots__ = ("version", "_values")
+
+    def __init__(self, version: int, values: Dict[str, Any]):
+        self.version = version
+        self._values: Mapping[str, Any] = MappingProxyType(values)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get a setting by its full key (``section.name``)"""
+        if key in self._values:
+            return self._values[key]
+        section, _, name = key.partition(".")
+        return DEFAULT_SETTINGS.get(section, {}).get(name, default)
+
+    def section(self, section: str) -> Dict[str, Any]:
+        """Get one section merged over its defaults"""
+        return {
+            name: self._values.get(f"{section}.{name}", default_value)
+            for name, default_value in DEFAULT_SETTINGS.get(section, {}).items()
+        }
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Get every known section merged over its defaults"""
+        return {section: self.section(section) for section in DEFAULT_SETTINGS}
+
+
+class SettingsService:
+    """Loads, caches and updates system settings"""
+
+    def __init__(self, check_interval: float):
+        self.check_interval = check_interval
+        self._snapshot: Optional[SettingsSnapshot] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Drop the cached snapshot of this process"""
+        with self._lock:
+            self._snapshot = None
+            self._checked_at = 0.0
+
+    def get_snapshot(self, db: Session) -> SettingsSnapshot:
+        """Return the cached snapshot, reloading it if another worker changed settings"""
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked_at < self.check_interval:
+            return snapshot
+
+        # Other threads keep serving the current snapshot while this one checks;
+        # only the swap is done under the lock
+        self._checked_at = now
+        if snapshot is None or self._read_version(db) != snapshot.version:
+            loaded = self._load(db)
+            with self._lock:
+                # Concurrent reloads may finish out of order: keep the newest
+                if self._snapshot is None or loaded.version >= self._snapshot.version:
+                    self._snapshot = loaded
+                snapshot = self._snapshot
+        return snapshot
+
+    def get(self, db: Session, key: str, default: Any = None) -> Any:
+        """Get a single setting value"""
+        return self.get_snapshot(db).get(key, default)
+
+    def update(self, db: Session, values: Dict[str, Any], descriptions: Optional[Dict[str, str]] = None) -> SettingsSnapshot:
+        """Write many settings and bump the version in a single transaction"""
+        descriptions = descriptions or {}
+        try:
+            version = self._locked_version(db) + 1
+            rows = [
+                {
+                    "key": key,
+                    "value": serialize_value(value),
+                    "description": descriptions.get(key)
+                }
+                for key, value in values.items()
+            ]
+            rows.append({"key": VERSION_KEY, "value": str(version), "description": VERSION_DESCRIPTION})
+            self._upsert(db, rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        self.invalidate()
+        return self.get_snapshot(db)
+
+    def reset(self, db: Session):
+        """Delete every stored setting so defaults apply again"""
+        try:
+            version = self._locked_version(db) + 1
+            db.query(SystemSettings).filter(
+                ~SystemSettings.key.startswith(META_PREFIX, autoescape=True)
+            ).delete(synchronize_session=False)
+            self._upsert(db, [{"key": VERSION_KEY, "value": str(version), "description": VERSION_DESCRIPTION}])
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+        self.invalidate()
+
+    def _load(self, db: Session) -> SettingsSnapshot:
+        values = {}
+        version = 0
+        for key, value in db.query(SystemSettings.key, SystemSettings.value).all():
+            if key == VERSION_KEY:
+                version = int(value)
+            elif not key.startswith(META_PREFIX):
+                values[key] = deserialize_value(value)
+        return SettingsSnapshot(version, values)
+
+    def increment(self, db: Session, key: str):
+        """Add one to a ``_meta.`` counter row, creating it at 1; committed by the caller"""
+        bumped = cast(cast(SystemSettings.value, Integer) + 1, Text)
+        dialect = db.get_bind().dialect.name
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            # A single statement: concurrent increments and first writes cannot lose a bump
+            stmt = insert(SystemSettings).values(key=key, value="1")
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[SystemSettings.key], set_={"value": bumped, "updated_at": func.now()}
+            ))
+            return
+        result = db.execute(update(SystemSettings).where(SystemSettings.key == key).values(value=bumped))
+        if not result.rowcount:
+            db.add(SystemSettings(key=key, value="1"))
+
+    def read_counters(self, db: Session, keys) -> Dict[str, int]:
+        """Current value of ``_meta.`` counter rows; missing rows count as 0"""
+        stored = dict(db.query(SystemSettings.key, SystemSettings.value).filter(SystemSettings.key.in_(keys)).all())
+        return {key: int(stored.get(key, 0)) for key in keys}
+
+    def _read_version(self, db: Session) -> int:
+        value = db.query(SystemSettings.value).filter(SystemSettings.key == VERSION_KEY).scalar()
+        return int(value) if value is not None else 0
+
+    def _locked_version(self, db: Session) -> int:
+        """Current version, row-locked until commit so concurrent writers bump it in turn"""
+        value = db.query(SystemSettings.value).filter(SystemSettings.key == VERSION_KEY).with_for_update().scalar()
+        if value is None:
+            # Created by the schema (migration or boot); without it writers could not be serialized
+            raise RuntimeError("Settings version row missing; run the database migrations")
+        return int(value)
+
+    def _upsert(self, db: Session, rows):
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            self._upsert_generic(db, rows)
+            return
+
+        stmt = insert(SystemSettings).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SystemSettings.key],
+            set_={
+                "value": stmt.excluded.value,
+                "description": func.coalesce(stmt.excluded.description, SystemSettings.description),
+                "updated_at": func.now()
+            }
+        )
+        db.execute(stmt)
+
+    def _upsert_generic(self, db: Session, rows):
+        keys = [row["key"] for row in rows]
+        existing = dict(
+            db.query(SystemSettings.key, SystemSettings.id).filter(SystemSettings.key.in_(keys)).all()
+        )
+        updates = []
+        inserts = []
+        for row in rows:
+            if row["key"] in existing:
+                update = {"id": existing[row["key"]], "value": row["value"]}
+                if row["description"]:
+                    update["description"] = row["description"]
+                updates.append(update)
+            else:
+                inserts.append(row)
+        if updates:
+            db.bulk_update_mappings(SystemSettings, updates)
+        if inserts:
+            db.bulk_insert_mappings(SystemSettings, inserts)
+
+
+# Global instance
+settings_service = SettingsService(check_interval=settings.SETTINGS_CACHE_TTL_SECONDS)
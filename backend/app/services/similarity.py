@@ -0,0 +1,309 @@
+"""
+Near-duplicate ticket detection.
+
+Tickets are compared by the character 4-grams (shingles) of their normalized
+title and description. Every ticket gets a MinHash signature of ``NUM_PERM``
+values whose agreement estimates the Jaccard similarity of two shingle sets.
+Signatures are cut into ``BANDS`` bands and indexed by band (LSH): tickets
+sharing any band land in a common bucket, so a lookup only scores the tickets
+of its buckets instead of the whole index.
+
+The index covers active tickets and those created in the last
+``SIMILARITY_INDEX_DAYS``. It is built in bulk when the worker starts, with
+shingling and hashing vectorized over a whole batch of tickets, and then
+follows ticket events. numpy is imported on first use so importing the API
+stays light.
+"""
+import asyncio
+import logging
+import re
+import threading
+import unicodedata
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import or_, select
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.models import ACTIVE_TICKET_FILTER, Ticket
+from app.services.ticket_events import CREATED, DELETED, UPDATED, TicketSnapshot, ticket_events
+
+logger = logging.getLogger(__name__)
+
+# 32 bands of 3 rows: pairs from about 0.3 similarity share a bucket
+NUM_PERM = 96
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 4
+
+# Estimated Jaccard similarity from which tickets are reported
+DEFAULT_THRESHOLD = 0.4
+
+# Only the start of long descriptions is compared
+MAX_TEXT_LENGTH = 2000
+
+# Tickets hashed per vectorized step of a bulk build
+BUILD_BATCH = 5000
+
+# Most candidates returned by a lookup, best first
+MAX_RESULTS = 200
+
+# Rows added since the last sort that lookups scan linearly before re-sorting
+MAX_UNSORTED = 4096
+
+_SEED = 0x7A1C3E5B
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(title: Optional[str], description: Optional[str]) -> bytes:
+    """Lowercase ASCII words of a ticket's text, accents removed"""
+    text = unicodedata.normalize("NFKD", f"{title or ''} {description or ''}")
+    text = text.encode("ascii", "ignore").decode("ascii").lower()
+    data = _NON_ALNUM.sub(" ", text).strip().encode("ascii")[:MAX_TEXT_LENGTH]
+    return data.ljust(SHINGLE_SIZE)
+
+
+class _Hashing:
+    """Multiply-shift hash family and band mixers (numpy arrays)"""
+
+    def __init__(self):
+        import numpy as np
+
+        rng = np.random.default_rng(_SEED)
+        self.np = np
+        self.a = rng.integers(1, 2 ** 63, size=NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, size=NUM_PERM, dtype=np.uint64)
+        self.band_mult = rng.integers(1, 2 ** 63, size=ROWS, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.band_salt = rng.integers(0, 2 ** 63, size=BANDS, dtype=np.uint64)
+
+    def signatures(self, texts: Sequence[bytes]):
+        """MinHash signatures (len(texts) x NUM_PERM, uint32) of normalized texts"""
+        np = self.np
+        data = np.frombuffer(b"".join(texts), dtype=np.uint8).astype(np.uint64)
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        ends = np.cumsum(lengths)
+
+        # Shingle = 4 consecutive bytes packed in an integer; drop windows crossing documents
+        windows = (data[:-3] << np.uint64(24)) | (data[1:-2] << np.uint64(16)) | (data[2:-1] << np.uint64(8)) | data[3:]
+        counts = lengths - (SHINGLE_SIZE - 1)
+        keep = np.ones(len(windows), dtype=bool)
+        gaps = ends[:-1]
+        for offset in range(1, SHINGLE_SIZE):
+            keep[gaps - offset] = False
+        shingles = windows[keep]
+        offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+        result = np.empty((len(texts), NUM_PERM), dtype=np.uint32)
+        for start in range(0, NUM_PERM, 8):
+            block = slice(start, start + 8)
+            hashed = (self.a[block, None] * shingles[None, :] + self.b[block, None]) >> np.uint64(32)
+            result[:, block] = np.minimum.reduceat(hashed, offsets, axis=1).T
+        return result
+
+    def band_keys(self, signatures):
+        """LSH bucket keys (len(signatures) x BANDS, uint64) of signatures"""
+        np = self.np
+        bands = signatures.reshape(len(signatures), BANDS, ROWS).astype(np.uint64)
+        return (bands * self.band_mult).sum(axis=2, dtype=np.uint64) ^ self.band_salt
+
+
+class SimilarityIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._hashing: Optional[_Hashing] = None
+        # Per row: signature, band keys and ticket id (-1 once superseded)
+        self._sigs = None
+        self._keys = None
+        self._row_ids = None
+        self._size = 0
+        # Band keys of rows [0, _sorted_size) sorted per band, with their rows
+        self._sorted_keys = None
+        self._sorted_rows = None
+        self._sorted_size = 0
+        self._rows: Dict[int, int] = {}
+        self._digests: Dict[int, int] = {}
+        self._built = False
+        # Events received while a build is reading the database
+        self._pending: Optional[List[Tuple[str, int, bytes]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def hashing(self) -> _Hashing:
+        if self._hashing is None:
+            self._hashing = _Hashing()
+        return self._hashing
+
+    # Building
+
+    def _indexed_tickets(self, db):
+        since = datetime.now(timezone.utc) - timedelta(days=settings.SIMILARITY_INDEX_DAYS)
+        return db.execute(
+            select(Ticket.id, Ticket.title, Ticket.description)
+            .where(or_(ACTIVE_TICKET_FILTER, Ticket.created_at >= since))
+            .order_by(Ticket.id)
+            .execution_options(yield_per=BUILD_BATCH)
+        )
+
+    def build(self):
+        """Rebuild the whole index from the database"""
+        with self._build_lock:
+            self._build_locked()
+
+    def ensure_built(self):
+        if self._built:
+            return
+        with self._build_lock:
+            # Another thread may have finished the build meanwhile
+            if not self._built:
+                self._build_locked()
+
+    def _build_locked(self):
+        np = self.hashing.np
+        with self._lock:
+            self._pending = []
+        try:
+            ids: List[int] = []
+            digests: Dict[int, int] = {}
+            chunks = []
+            db = SessionLocal()
+            try:
+                for partition in self._indexed_tickets(db).partitions():
+                    batch = [normalize(title, description) for _, title, description in partition]
+                    for row, text in zip(partition, batch):
+                        ids.append(row[0])
+                        digests[row[0]] = zlib.crc32(text)
+                    chunks.append(self.hashing.signatures(batch))
+            finally:
+                db.close()
+
+            sigs = np.concatenate(chunks) if chunks else np.empty((0, NUM_PERM), dtype=np.uint32)
+            with self._lock:
+                self._sigs = sigs
+                self._keys = self.hashing.band_keys(sigs)
+                self._row_ids = np.array(ids, dtype=np.int64)
+                self._size = len(ids)
+                self._rows = {ticket_id: row for row, ticket_id in enumerate(ids)}
+                self._digests = digests
+                self._sort_locked()
+                self._built = True
+                pending, self._pending = self._pending, None
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        for event, ticket_id, text in pending:
+            self._apply(event, ticket_id, text)
+        logger.info("Similarity index built", extra={"tickets": len(ids)})
+
+    def _sort_locked(self):
+        np = self.hashing.np
+        keys = self._keys[:self._size].T
+        order = np.argsort(keys, axis=1, kind="stable")
+        self._sorted_keys = np.take_along_axis(keys, order, axis=1)
+        self._sorted_rows = order
+        self._sorted_size = self._size
+
+    def refresh(self):
+        """Rebuild after tickets were written without events (bulk imports)"""
+        if self._built:
+            self.build()
+
+    # Incremental updates
+
+    def _append_locked(self, ticket_id: int, text: bytes, sig):
+        np = self.hashing.np
+        row = self._size
+        if row == len(self._sigs):
+            capacity = max(2 * row, 1024)
+            self._sigs = np.resize(self._sigs, (capacity, NUM_PERM))
+            self._keys = np.resize(self._keys, (capacity, BANDS))
+            self._row_ids = np.resize(self._row_ids, capacity)
+        self._sigs[row] = sig[0]
+        self._keys[row] = self.hashing.band_keys(sig)[0]
+        self._row_ids[row] = ticket_id
+        self._size = row + 1
+        self._rows[ticket_id] = row
+        self._digests[ticket_id] = zlib.crc32(text)
+
+    def _apply(self, event: str, ticket_id: int, text: bytes):
+        # Most updates leave the text alone; skip hashing those
+        if event != DELETED and self._built and self._digests.get(ticket_id) == zlib.crc32(text):
+            return
+        sig = self.hashing.signatures([text]) if event != DELETED else None
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((event, ticket_id, text))
+                return
+            if not self._built:
+                return
+            if event != DELETED and self._digests.get(ticket_id) == zlib.crc32(text):
+                return
+            # The old row stays in the arrays, unused, until the next build
+            row = self._rows.pop(ticket_id, None)
+            self._digests.pop(ticket_id, None)
+            if row is not None:
+                self._row_ids[row] = -1
+            if event != DELETED:
+                self._append_locked(ticket_id, text, sig)
+
+    def on_ticket_event(self, event: str, ticket: Ticket, previous: Optional[TicketSnapshot]):
+        if not self._built and self._pending is None:
+            return
+        if event == DELETED:
+            self._apply(DELETED, ticket.id, b"")
+        elif event in (CREATED, UPDATED):
+            self._apply(event, ticket.id, normalize(ticket.title, ticket.description))
+
+    # Lookups
+
+    def similar(
+        self, title: Optional[str], description: Optional[str],
+        exclude_id: Optional[int] = None, threshold: float = DEFAULT_THRESHOLD
+    ) -> List[Tuple[int, float]]:
+        """(ticket id, estimated similarity) of indexed tickets, best first"""
+        self.ensure_built()
+        np = self.hashing.np
+        sig = self.hashing.signatures([normalize(title, description)])
+        keys = self.hashing.band_keys(sig)[0]
+        with self._lock:
+            if self._size - self._sorted_size > MAX_UNSORTED:
+                self._sort_locked()
+            lower = [np.searchsorted(self._sorted_keys[band], keys[band], "left") for band in range(BANDS)]
+            upper = [np.searchsorted(self._sorted_keys[band], keys[band], "right") for band in range(BANDS)]
+            parts = [self._sorted_rows[band, lower[band]:upper[band]] for band in range(BANDS) if upper[band] > lower[band]]
+            # Rows added since the last sort
+            tail = self._keys[self._sorted_size:self._size]
+            parts.append(self._sorted_size + np.flatnonzero((tail == keys).any(axis=1)))
+            rows = np.unique(np.concatenate(parts))
+            ids = self._row_ids[rows]
+            live = (ids >= 0) & (ids != (exclude_id if exclude_id is not None else -1))
+            rows, ids = rows[live], ids[live]
+            scores = (self._sigs[rows] == sig[0]).mean(axis=1)
+
+        selected = np.flatnonzero(scores >= threshold)
+        order = selected[np.lexsort((ids[selected], -scores[selected]))][:MAX_RESULTS]
+        return [(int(ids[i]), round(float(scores[i]), 3)) for i in order]
+
+    # Lifecycle
+
+    async def start(self):
+        if self._task is not None:
+            return
+        ticket_events.subscribe(self.on_ticket_event)
+        self._task = asyncio.create_task(run_in_threadpool(self.ensure_built))
+
+    async def stop(self):
+        if self._task is None:
+            return
+        ticket_events.unsubscribe(self.on_ticket_event)
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+
+similarity_index = SimilarityIndex()
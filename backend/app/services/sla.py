@@ -0,0 +1,203 @@
+"""
+SLA engine.
+
+Deadlines are computed once, when a ticket is created or its priority changes,
+and stored on the ticket (``response_due_at`` / ``resolve_due_at``). Reports,
+exports and escalation then compare timestamps in SQL instead of redoing
+calendar math for every row on every request.
+
+Targets, business hours, working days and holidays come from the ``sla``
+section of the system settings. The policy is rebuilt only when the settings
+version changes.
+"""
+import bisect
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy.orm import Session
+
+from app.models.models import Ticket, TicketPriority, User
+from app.services.settings_service import settings_service
+
+
+def as_utc(value: datetime) -> datetime:
+    """Aware UTC datetime; naive values are stored UTC timestamps"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+class BusinessCalendar:
+    """Working-time arithmetic over business hours, working days and holidays
+
+    Holidays are ``YYYY-MM-DD`` (a single date) or ``MM-DD`` (every year).
+    Whole weeks are skipped arithmetically, so adding a long target costs
+    a handful of steps regardless of its size.
+    """
+
+    def __init__(
+        self,
+        start_hour: float = 8,
+        end_hour: float = 18,
+        workdays: Iterable[int] = (0, 1, 2, 3, 4),
+        holidays: Iterable[str] = (),
+        tz: str = "UTC",
+        business_hours_only: bool = True
+    ):
+        if not 0 <= start_hour < end_hour <= 24:
+            start_hour, end_hour = 0, 24
+        self.opens = timedelta(hours=start_hour)
+        self.closes = timedelta(hours=end_hour)
+        self.day_length = self.closes - self.opens
+        self.workdays = frozenset(int(day) for day in workdays) or frozenset(range(7))
+        self.week_length = self.day_length * len(self.workdays)
+        self.business_hours_only = business_hours_only
+        try:
+            self.tz = ZoneInfo(tz)
+        except (ZoneInfoNotFoundError, ValueError):
+            self.tz = timezone.utc
+
+        self._dates = set()
+        self._yearly = set()
+        for holiday in holidays:
+            parts = [int(part) for part in str(holiday).split("-")]
+            if len(parts) == 3:
+                self._dates.add(date(*parts))
+            elif len(parts) == 2:
+                self._yearly.add((parts[0], parts[1]))
+        self._holidays_by_year: Dict[int, List[date]] = {}
+        self._lock = threading.Lock()
+
+    def is_business_day(self, day: date) -> bool:
+        return (
+            day.weekday() in self.workdays
+            and day not in self._dates
+            and (day.month, day.day) not in self._yearly
+        )
+
+    def _year_holidays(self, year: int) -> List[date]:
+        """Sorted holidays of a year that fall on working days"""
+        holidays = self._holidays_by_year.get(year)
+        if holidays is None:
+            days = {day for day in self._dates if day.year == year}
+            for month, day in self._yearly:
+                try:
+                    days.add(date(year, month, day))
+                except ValueError:
+                    pass  # 02-29 outside leap years
+            holidays = sorted(day for day in days if day.weekday() in self.workdays)
+            with self._lock:
+                self._holidays_by_year[year] = holidays
+        return holidays
+
+    def _holidays_in(self, first: date, last: date) -> int:
+        """Working-day holidays in [first, last)"""
+        count = 0
+        for year in range(first.year, last.year + 1):
+            holidays = self._year_holidays(year)
+            count += bisect.bisect_left(holidays, last) - bisect.bisect_left(holidays, first)
+        return count
+
+    def _opening(self, day: date) -> datetime:
+        return datetime(day.year, day.month, day.day, tzinfo=self.tz) + self.opens
+
+    def add_hours(self, start: datetime, hours: float) -> datetime:
+        """The moment ``hours`` of working time after ``start`` (aware UTC)"""
+        start = as_utc(start)
+        if not self.business_hours_only:
+            return start + timedelta(hours=hours)
+
+        remaining = timedelta(hours=hours)
+        current = start.astimezone(self.tz)
+        day = current.date()
+        while True:
+            if self.is_business_day(day):
+                opens = self._opening(day)
+                current = max(current, opens)
+                available = opens + self.day_length - current
+                if available > timedelta(0):
+                    if remaining <= available:
+                        return (current + remaining).astimezone(timezone.utc)
+                    remaining -= available
+            day += timedelta(days=1)
+            current = self._opening(day)
+
+            # Jump over whole weeks, giving back the holidays inside them
+            if remaining > self.week_length:
+                weeks = (remaining - timedelta(microseconds=1)) // self.week_length
+                next_day = day + timedelta(weeks=weeks)
+                remaining -= self.week_length * weeks
+                remaining += self.day_length * self._holidays_in(day, next_day)
+                day = next_day
+                current = self._opening(day)
+
+
+class SlaPolicy:
+    """Response and resolution targets per priority over a business calendar"""
+
+    def __init__(self, calendar: BusinessCalendar, resolve_hours: Dict[TicketPriority, float],
+                 response_hours: Dict[TicketPriority, float]):
+        self.calendar = calendar
+        self.resolve_hours = resolve_hours
+        self.response_hours = response_hours
+
+    @classmethod
+    def from_settings(cls, sla: Dict[str, Any], tz: str = "UTC") -> "SlaPolicy":
+        calendar = BusinessCalendar(
+            start_hour=sla.get("business_start_hour", 8),
+            end_hour=sla.get("business_end_hour", 18),
+            workdays=sla.get("business_days") or (0, 1, 2, 3, 4),
+            holidays=sla.get("holidays") or (),
+            tz=tz,
+            business_hours_only=bool(sla.get("business_hours_only"))
+        )
+        resolve_hours = {}
+        response_hours = {}
+        for priority in TicketPriority:
+            resolve = sla.get(f"{priority.value}_priority_hours")
+            response = sla.get(f"{priority.value}_response_hours")
+            if resolve is not None:
+                resolve_hours[priority] = float(resolve)
+            if response is not None:
+                response_hours[priority] = float(response)
+        return cls(calendar, resolve_hours, response_hours)
+
+    def due_dates(self, priority: TicketPriority, start: datetime) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """(response_due_at, resolve_due_at) for a ticket opened at ``start``"""
+        response = self.response_hours.get(priority)
+        resolve = self.resolve_hours.get(priority)
+        return (
+            self.calendar.add_hours(start, response) if response is not None else None,
+            self.calendar.add_hours(start, resolve) if resolve is not None else None
+        )
+
+
+class SlaService:
+    """Applies the current SLA policy to tickets"""
+
+    def __init__(self):
+        self._policy: Optional[SlaPolicy] = None
+        self._version: Optional[int] = None
+
+    def get_policy(self, db: Session) -> SlaPolicy:
+        snapshot = settings_service.get_snapshot(db)
+        policy = self._policy
+        if policy is None or self._version != snapshot.version:
+            policy = SlaPolicy.from_settings(snapshot.section("sla"), snapshot.get("general.timezone", "UTC"))
+            self._policy, self._version = policy, snapshot.version
+        return policy
+
+    def apply(self, db: Session, ticket: Ticket, start: Optional[datetime] = None):
+        """Set the deadlines of a new ticket or of one whose priority changed"""
+        start = start or ticket.created_at or datetime.now(timezone.utc)
+        ticket.response_due_at, ticket.resolve_due_at = self.get_policy(db).due_dates(ticket.priority, start)
+
+    def record_response(self, ticket: Ticket, user: User):
+        """Mark the first reaction of anyone other than the requester"""
+        if ticket.first_response_at is None and user.id != ticket.created_by_id:
+            ticket.first_response_at = datetime.now(timezone.utc)
+
+
+sla_service = SlaService()
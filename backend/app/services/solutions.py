@@ -0,0 +1,327 @@
+"""
+Solution suggestions from resolved tickets.
+
+Resolved and closed tickets with a ``solution`` are indexed with BM25 over the
+words of their title, description and solution. The index is a sparse
+term x ticket matrix of precomputed BM25 term weights (CSR, float32), so a
+query is one sparse vector-matrix product over the postings of its words
+followed by an ``argpartition`` top-k; only the inverse document frequencies
+are applied at query time.
+
+Tickets resolved after the build are appended to a small delta matrix that is
+merged into the main one once it grows past ``MAX_DELTA``. Reopened, deleted
+or re-solved tickets are masked out instead of being removed from the
+matrices. numpy and scipy are imported on first use.
+"""
+import asyncio
+import logging
+import re
+import threading
+import unicodedata
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from app.core.database import SessionLocal
+from app.models.models import Ticket, TicketStatus
+from app.services.ticket_events import DELETED, TicketSnapshot, ticket_events
+
+logger = logging.getLogger(__name__)
+
+SOLVED_STATUSES = (TicketStatus.RESOLVED, TicketStatus.CLOSED)
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Tickets read per database round trip while building
+BUILD_BATCH = 10000
+
+# Tickets kept in the delta matrix before it is merged into the main one
+MAX_DELTA = 2000
+
+_WORD = re.compile(r"[a-z0-9]{2,}")
+
+# Portuguese words too common to tell tickets apart
+STOPWORDS = frozenset("""
+    a o e de da do das dos em no na nos nas um uma uns umas para por com sem que se nao sim ao aos
+    as os ou mas mais muito muita ja foi esta estao ser ter tem sao era como quando onde desde ate
+    meu minha seu sua nosso nossa isso este esta esse essa ele ela eles elas eu voce apos pelo pela
+""".split())
+
+
+def tokenize(*texts: Optional[str]) -> List[str]:
+    """Lowercase ASCII words of the texts, accents and stopwords removed"""
+    text = unicodedata.normalize("NFKD", " ".join(text for text in texts if text))
+    text = text.encode("ascii", "ignore").decode("ascii").lower()
+    return [word for word in _WORD.findall(text) if word not in STOPWORDS]
+
+
+def _digest(*texts: Optional[str]) -> int:
+    return zlib.crc32("\0".join(text or "" for text in texts).encode("utf-8"))
+
+
+class SolutionIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._vocab: Dict[str, int] = {}
+        # Tickets per term; masked tickets keep counting until the next build
+        self._df = None
+        # Main matrix (terms x tickets) and the postings added since it was built
+        self._main = None
+        self._main_size = 0
+        self._delta = None
+        self._delta_postings: Tuple[List[int], List[int], List[float]] = ([], [], [])
+        # Per column: ticket id and whether it is still current
+        self._doc_ids: List[int] = []
+        self._alive = None
+        self._docs: Dict[int, int] = {}
+        self._digests: Dict[int, int] = {}
+        self._avgdl = 1.0
+        self._built = False
+        # Events received while a build is reading the database
+        self._pending: Optional[List[Tuple[int, Optional[Tuple[str, str, str]]]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # Building
+
+    def build(self):
+        """Rebuild the whole index from the database"""
+        with self._build_lock:
+            self._build_locked()
+
+    def ensure_built(self):
+        if self._built:
+            return
+        with self._build_lock:
+            # Another thread may have finished the build meanwhile
+            if not self._built:
+                self._build_locked()
+
+    def _build_locked(self):
+        import numpy as np
+        from scipy import sparse
+
+        with self._lock:
+            self._pending = []
+        try:
+            vocab: Dict[str, int] = {}
+            doc_ids: List[int] = []
+            digests: Dict[int, int] = {}
+            terms: List[int] = []
+            counts: List[int] = []
+            distinct: List[int] = []
+            db = SessionLocal()
+            try:
+                rows = db.execute(
+                    select(Ticket.id, Ticket.title, Ticket.description, Ticket.solution)
+                    .where(Ticket.status.in_(SOLVED_STATUSES), Ticket.solution.isnot(None), Ticket.solution != "")
+                    .order_by(Ticket.id)
+                    .execution_options(yield_per=BUILD_BATCH)
+                )
+                for ticket_id, title, description, solution in rows:
+                    words = Counter(tokenize(title, description, solution))
+                    doc_ids.append(ticket_id)
+                    digests[ticket_id] = _digest(title, description, solution)
+                    distinct.append(len(words))
+                    for word, count in words.items():
+                        terms.append(vocab.setdefault(word, len(vocab)))
+                        counts.append(count)
+            finally:
+                db.close()
+
+            # BM25 term weights for all postings at once
+            docs = np.repeat(np.arange(len(doc_ids), dtype=np.int32), np.array(distinct, dtype=np.int64))
+            tf = np.array(counts, dtype=np.float32)
+            doc_length = np.bincount(docs, weights=tf, minlength=len(doc_ids)).astype(np.float32)
+            avgdl = float(doc_length.mean()) if len(doc_ids) else 1.0
+            weights = self._weights(tf, doc_length[docs], avgdl)
+            matrix = sparse.csr_matrix(
+                (weights, (np.array(terms, dtype=np.int32), docs)),
+                shape=(len(vocab), len(doc_ids)), dtype=np.float32
+            )
+            df = np.diff(matrix.indptr).astype(np.int32)
+
+            with self._lock:
+                self._vocab = vocab
+                self._df = df
+                self._main = matrix
+                self._main_size = len(doc_ids)
+                self._delta = None
+                self._delta_postings = ([], [], [])
+                self._doc_ids = doc_ids
+                self._alive = np.ones(len(doc_ids), dtype=bool)
+                self._docs = {ticket_id: column for column, ticket_id in enumerate(doc_ids)}
+                self._digests = digests
+                self._avgdl = avgdl
+                self._built = True
+                pending, self._pending = self._pending, None
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        for ticket_id, texts in pending:
+            self._apply(ticket_id, texts)
+        logger.info("Solution index built", extra={"tickets": len(doc_ids), "terms": len(vocab)})
+
+    def refresh(self):
+        """Rebuild after tickets were written without events (bulk imports)"""
+        if self._built:
+            self.build()
+
+    @staticmethod
+    def _weights(tf, doc_length, avgdl):
+        return (tf * (K1 + 1) / (tf + K1 * (1 - B + B * doc_length / avgdl))).astype("float32")
+
+    # Incremental updates
+
+    def _apply(self, ticket_id: int, texts: Optional[Tuple[str, str, str]]):
+        """Index a solved ticket's texts, or drop the ticket when texts is None"""
+        import numpy as np
+
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((ticket_id, texts))
+                return
+            if not self._built:
+                return
+            digest = _digest(*texts) if texts is not None else None
+            if digest is not None and self._digests.get(ticket_id) == digest:
+                return
+
+            column = self._docs.pop(ticket_id, None)
+            self._digests.pop(ticket_id, None)
+            if column is not None:
+                self._alive[column] = False
+            if texts is None:
+                return
+
+            words = Counter(tokenize(*texts))
+            column = len(self._doc_ids)
+            self._doc_ids.append(ticket_id)
+            self._docs[ticket_id] = column
+            self._digests[ticket_id] = digest
+            if column >= len(self._alive):
+                self._alive = np.resize(self._alive, max(2 * column, 1024))
+            self._alive[column] = True
+
+            term_ids = [self._vocab.setdefault(word, len(self._vocab)) for word in words]
+            if len(self._vocab) > len(self._df):
+                self._df = np.concatenate((self._df, np.zeros(max(len(self._vocab) - len(self._df), 1024), dtype=np.int32)))
+            self._df[term_ids] += 1
+            tf = np.fromiter(words.values(), dtype=np.float32, count=len(words))
+            weights = self._weights(tf, np.float32(tf.sum()), self._avgdl)
+            postings_terms, postings_docs, postings_weights = self._delta_postings
+            postings_terms.extend(term_ids)
+            postings_docs.extend([column - self._main_size] * len(term_ids))
+            postings_weights.extend(weights.tolist())
+            self._delta = None
+
+    def on_ticket_event(self, event: str, ticket: Ticket, previous: Optional[TicketSnapshot]):
+        if not self._built and self._pending is None:
+            return
+        solved = event != DELETED and ticket.status in SOLVED_STATUSES and bool(ticket.solution)
+        if solved:
+            self._apply(ticket.id, (ticket.title or "", ticket.description or "", ticket.solution))
+        elif ticket.id in self._docs:
+            self._apply(ticket.id, None)
+
+    # Lookups
+
+    def search(self, title: Optional[str], description: Optional[str], limit: int = 5) -> List[Tuple[int, float]]:
+        """(ticket id, BM25 score) of the best matching solved tickets"""
+        import numpy as np
+        from scipy import sparse
+
+        self.ensure_built()
+        words = set(tokenize(title, description))
+        with self._lock:
+            term_ids = np.array(sorted(self._vocab[word] for word in words if word in self._vocab), dtype=np.int32)
+            if not len(term_ids):
+                return []
+            total = len(self._doc_ids)
+            df = self._df[term_ids].astype(np.float32)
+            idf = np.log1p((total - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+            if self._delta is None and self._delta_postings[0]:
+                if len(self._doc_ids) - self._main_size > MAX_DELTA:
+                    self._merge_locked()
+                else:
+                    terms, docs, weights = self._delta_postings
+                    self._delta = sparse.csr_matrix(
+                        (np.array(weights, dtype=np.float32), (np.array(terms, dtype=np.int32), np.array(docs, dtype=np.int32))),
+                        shape=(len(self._vocab), len(self._doc_ids) - self._main_size)
+                    )
+
+            # Rows of the query words times their idf, summed per ticket; only
+            # tickets containing a query word come out of the sparse products
+            columns, scores = [], []
+            # term_ids is sorted, so words known to the main matrix come first
+            main_terms = term_ids[term_ids < self._main.shape[0]]
+            if len(main_terms):
+                query = sparse.csr_matrix(
+                    (idf[:len(main_terms)], main_terms, [0, len(main_terms)]), shape=(1, self._main.shape[0])
+                )
+                result = query @ self._main
+                columns.append(result.indices)
+                scores.append(result.data)
+            if self._delta is not None:
+                query = sparse.csr_matrix((idf, term_ids, [0, len(term_ids)]), shape=(1, self._delta.shape[0]))
+                result = query @ self._delta
+                columns.append(result.indices + self._main_size)
+                scores.append(result.data)
+            if not columns:
+                return []
+            columns = np.concatenate(columns)
+            scores = np.concatenate(scores)
+            live = self._alive[columns]
+            columns, scores = columns[live], scores[live]
+            doc_ids = self._doc_ids
+
+        limit = min(limit, len(scores))
+        if limit <= 0:
+            return []
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.lexsort((columns[top], -scores[top]))]
+        return [(doc_ids[columns[i]], round(float(scores[i]), 3)) for i in top]
+
+    def _merge_locked(self):
+        """Fold the delta postings into the main matrix"""
+        import numpy as np
+        from scipy import sparse
+
+        terms, docs, weights = self._delta_postings
+        delta = sparse.csr_matrix(
+            (np.array(weights, dtype=np.float32), (np.array(terms, dtype=np.int32), np.array(docs, dtype=np.int32))),
+            shape=(len(self._vocab), len(self._doc_ids) - self._main_size)
+        )
+        main = self._main.copy()
+        main.resize((len(self._vocab), self._main_size))
+        self._main = sparse.hstack((main, delta), format="csr", dtype=np.float32)
+        self._main_size = len(self._doc_ids)
+        self._delta = None
+        self._delta_postings = ([], [], [])
+
+    # Lifecycle
+
+    async def start(self):
+        if self._task is not None:
+            return
+        ticket_events.subscribe(self.on_ticket_event)
+        self._task = asyncio.create_task(run_in_threadpool(self.ensure_built))
+
+    async def stop(self):
+        if self._task is None:
+            return
+        ticket_events.unsubscribe(self.on_ticket_event)
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+
+solution_index = SolutionIndex()
@@ -0,0 +1,85 @@
+"""
+Change feed of the ticket list (``GET /tickets/changes``).
+
+A client keeps its ticket list locally and asks for what changed since the
+watermark of its previous call: tickets created or updated since then, and
+the ids of tickets that left its list. Those are tombstones written in the
+same transaction as the removal: the ticket was deleted, archived, or, for
+the previous assignee only, reassigned to someone else.
+
+The watermark is the database clock when the feed is read. Ticket timestamps
+are taken inside transactions that may commit a little later, so each read
+starts ``CHANGES_OVERLAP_SECONDS`` before ``since``: clients apply the
+removals first, then upsert the tickets by id. A ``since`` older than
+``CHANGES_RETENTION_DAYS``, or more changes than a call returns, means the
+client must reload the full list. Older tombstones are pruned by the archive
+run (``python -m app.services.archive``).
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.models import TicketTombstone, User
+from app.services.sla import as_utc
+
+DELETED = "deleted"
+ARCHIVED = "archived"
+REASSIGNED = "reassigned"
+
+
+def removal(
+    ticket_id: int, reason: str, created_by_id: Optional[int] = None, assigned_to_id: Optional[int] = None
+) -> Dict[str, Any]:
+    """Tombstone row; a reassignment only names the assignee who lost the ticket"""
+    return {
+        "ticket_id": ticket_id,
+        "reason": reason,
+        "created_by_id": created_by_id,
+        "assigned_to_id": assigned_to_id
+    }
+
+
+def record_removals(db: Session, rows: List[Dict[str, Any]]):
+    """Write tombstones in the caller's transaction"""
+    if rows:
+        db.execute(insert(TicketTombstone), rows)
+
+
+def database_now(db: Session) -> datetime:
+    """Current time on the database clock, as aware UTC"""
+    return as_utc(db.scalar(select(func.now())))
+
+
+def window_start(since: datetime) -> datetime:
+    return as_utc(since) - timedelta(seconds=settings.CHANGES_OVERLAP_SECONDS)
+
+
+def is_expired(since: datetime, now: datetime) -> bool:
+    """Whether tombstones since ``since`` may already be pruned"""
+    return as_utc(since) < now - timedelta(days=settings.CHANGES_RETENTION_DAYS)
+
+
+def removed_since(db: Session, current_user: User, start: datetime) -> List[int]:
+    """Ids of tickets that left the user's list since ``start``"""
+    query = db.query(TicketTombstone.ticket_id).filter(TicketTombstone.removed_at >= start)
+    role = current_user.role.value.lower()
+    if role == "user":
+        query = query.filter(TicketTombstone.created_by_id == current_user.id)
+    elif role == "technician":
+        query = query.filter(TicketTombstone.assigned_to_id == current_user.id)
+    else:
+        query = query.filter(TicketTombstone.reason != REASSIGNED)
+    return sorted({ticket_id for ticket_id, in query})
+
+
+def prune_tombstones(db: Session, days: Optional[int] = None) -> int:
+    """Delete tombstones past the retention window; returns how many"""
+    if days is None:
+        days = settings.CHANGES_RETENTION_DAYS
+    cutoff = datetime.now(timezone.utc) - timedelta(days=days)
+    result = db.execute(delete(TicketTombstone).where(TicketTombstone.removed_at < cutoff))
+    db.commit()
+    return result.rowcount
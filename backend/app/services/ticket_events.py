@@ -0,0 +1,58 @@
+"""
+In-process ticket change events.
+
+Endpoints publish after a ticket change is committed; services that keep
+derived state in memory (such as the escalation scheduler) subscribe instead
+of re-reading the tickets table. Handlers run inline in the publisher's thread
+and must be quick and non-blocking.
+
+Publishers pass a ``snapshot`` of the ticket taken before the change when
+subscribers need the previous state (workload counters subtract it).
+"""
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from app.models.models import Ticket
+
+logger = logging.getLogger(__name__)
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+
+TicketSnapshot = Dict[str, Any]
+TicketEventHandler = Callable[[str, Ticket, Optional[TicketSnapshot]], None]
+
+
+def snapshot(ticket: Ticket) -> TicketSnapshot:
+    """Fields of a ticket that derived state depends on"""
+    return {
+        "status": ticket.status,
+        "priority": ticket.priority,
+        "assigned_to_id": ticket.assigned_to_id,
+        "category_id": ticket.category_id,
+        "created_by_id": ticket.created_by_id
+    }
+
+
+class TicketEventBus:
+    def __init__(self):
+        self._subscribers: List[TicketEventHandler] = []
+
+    def subscribe(self, handler: TicketEventHandler) -> TicketEventHandler:
+        self._subscribers.append(handler)
+        return handler
+
+    def unsubscribe(self, handler: TicketEventHandler):
+        if handler in self._subscribers:
+            self._subscribers.remove(handler)
+
+    def publish(self, event: str, ticket: Ticket, previous: Optional[TicketSnapshot] = None):
+        for handler in list(self._subscribers):
+            try:
+                handler(event, ticket, previous)
+            except Exception:
+                logger.exception("Ticket event handler failed for %s on ticket %s", event, ticket.id)
+
+
+ticket_events = TicketEventBus()
@@ -1,22 +1,110 @@
 """
 WebSocket Manager para notificações em tempo real
+
+Clients choose the wire format with the ``encoding`` connection parameter:
+
+- ``json`` (default): text frames with the messages as built, users as
+  nested ``{"id", "username", "full_name"}`` objects.
+- ``compact``: text frames; user objects are replaced by ``<field>_id``
+  references. The client keeps a user cache, primed by a ``users`` message
+  at connect and extended by a ``users`` message sent just before the first
+  message that references a user it has not seen.
+- ``msgpack``: the compact messages as MessagePack binary frames. Falls back
+  to ``compact`` when msgpack is not installed; ``connection_established``
+  reports the encoding in use.
+
+Each message is encoded once per format, however many connections receive
+it. Frames are further compressed by permessage-deflate when the client
+offers it (uvicorn's websockets implementation negotiates it by default).
 """
 import json
-from typing import Dict, List, Set, Optional
+from typing import Any, Dict, List, Set, Optional, Union
 from fastapi import WebSocket, WebSocketDisconnect
 from app.models.models import User, UserRole
+from app.core.metrics import websocket_connections, websocket_connected_users
 import logging
 
+try:
+    import msgpack
+except ImportError:  # optional: msgpack clients get compact JSON instead
+    msgpack = None
+
 logger = logging.getLogger(__name__)
 
+JSON = "json"
+COMPACT = "compact"
+MSGPACK = "msgpack"
+ENCODINGS = (JSON, COMPACT, MSGPACK)
+
+# Message fields holding a user object, sent as ``<field>_id`` by compact encodings
+USER_FIELDS = ("created_by", "assigned_to", "assigned_by", "changed_by", "commented_by", "resolved_by", "updated_by")
+
+Frame = Union[str, bytes]
+
+
+def negotiate_encoding(requested: Optional[str]) -> str:
+    """Encoding served for the ``encoding`` connection parameter"""
+    encoding = (requested or JSON).lower()
+    if encoding not in ENCODINGS:
+        return JSON
+    if encoding == MSGPACK and msgpack is None:
+        return COMPACT
+    return encoding
+
+
+def user_ref(user: User) -> Dict[str, Any]:
+    """User object as carried by notifications and ``users`` messages"""
+    return {"id": user.id, "username": user.username, "full_name": user.full_name}
+
+
+def encode(message: Dict[str, Any], encoding: str) -> Frame:
+    if encoding == MSGPACK:
+        return msgpack.packb(message, use_bin_type=True)
+    if encoding == COMPACT:
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+    return json.dumps(message)
+
+
+class OutgoingMessage:
+    """A message and its frames, encoded on first use for each format"""
+
+    def __init__(self, message: Dict[str, Any]):
+        self.message = message
+        self.users: Dict[int, Dict[str, Any]] = {}
+        self._compact: Optional[Dict[str, Any]] = None
+        self._frames: Dict[str, Frame] = {}
+
+    def compact(self) -> Dict[str, Any]:
+        if self._compact is None:
+            compact = {}
+            for key, value in self.message.items():
+                if key in USER_FIELDS and isinstance(value, dict) and "id" in value:
+                    self.users[value["id"]] = value
+                    compact[f"{key}_id"] = value["id"]
+                else:
+                    compact[key] = value
+            self._compact = compact
+        return self._compact
+
+    def frame(self, encoding: str) -> Frame:
+        if encoding not in self._frames:
+            self._frames[encoding] = encode(self.message if encoding == JSON else self.compact(), encoding)
+        return self._frames[encoding]
+
+
 class ConnectionManager:
     def __init__(self):
         # Armazena conexões ativas por user_id
         self.active_connections: Dict[int, Set[WebSocket]] = {}
         # Armazena informações do usuário por WebSocket
         self.connection_users: Dict[WebSocket, User] = {}
+        # Formato de cada conexão e usuários já enviados ao cache do cliente
+        self.connection_encodings: Dict[WebSocket, str] = {}
+        self.known_users: Dict[WebSocket, Set[int]] = {}
 
-    async def connect(self, websocket: WebSocket, user: User):
+    async def connect(
+        self, websocket: WebSocket, user: User, encoding: str = JSON, users: Optional[List[User]] = None
+    ):
         """Aceita uma nova conexão WebSocket"""
         await websocket.accept()
         
@@ -26,16 +114,27 @@ class ConnectionManager:
         
         self.active_connections[user.id].add(websocket)
         self.connection_users[websocket] = user
+        self.connection_encodings[websocket] = encoding
+        if encoding != JSON:
+            self.known_users[websocket] = set()
+        self._update_connection_metrics()
         
-        logger.info(f"User {user.username} connected via WebSocket")
+        logger.info(f"User {user.username} connected via WebSocket ({encoding})")
         
         # Envia mensagem de boas-vindas
         await self.send_personal_message({
             "type": "connection_established",
             "message": "Conectado às notificações em tempo real",
-            "user_id": user.id
+            "user_id": user.id,
+            "encoding": encoding
         }, websocket)
 
+        # Prepara o cache de usuários do cliente
+        if encoding != JSON:
+            primer = {user.id: user}
+            primer.update((other.id, other) for other in users or [])
+            await self._send_users(websocket, [user_ref(other) for other in primer.values()])
+
     def disconnect(self, websocket: WebSocket):
         """Remove uma conexão WebSocket"""
         user = self.connection_users.get(websocket)
@@ -50,24 +149,66 @@ class ConnectionManager:
             
             # Remove do mapeamento de usuários
             del self.connection_users[websocket]
+            self.connection_encodings.pop(websocket, None)
+            self.known_users.pop(websocket, None)
+            self._update_connection_metrics()
             
             logger.info(f"User {user.username} disconnected from WebSocket")
 
+    def _update_connection_metrics(self):
+        """Atualiza as métricas de conexões abertas"""
+        websocket_connections.set(len(self.connection_users))
+        websocket_connected_users.set(len(self.active_connections))
+
+    async def receive(self, websocket: WebSocket) -> Any:
+        """Recebe e decodifica uma mensagem do cliente (texto JSON ou MessagePack binário)"""
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+        if message.get("bytes") is not None:
+            if msgpack is None:
+                raise ValueError("Binary frames require msgpack")
+            return msgpack.unpackb(message["bytes"], raw=False)
+        return json.loads(message.get("text") or "")
+
+    async def _write(self, websocket: WebSocket, frame: Frame):
+        if isinstance(frame, bytes):
+            await websocket.send_bytes(frame)
+        else:
+            await websocket.send_text(frame)
+
+    async def _send_users(self, websocket: WebSocket, users: List[Dict[str, Any]]):
+        encoding = self.connection_encodings.get(websocket, COMPACT)
+        await self._write(websocket, encode({"type": "users", "users": users}, encoding))
+        self.known_users.setdefault(websocket, set()).update(user["id"] for user in users)
+
+    async def _send(self, websocket: WebSocket, outgoing: OutgoingMessage):
+        """Envia a mensagem no formato da conexão, precedida dos usuários que o cliente ainda não conhece"""
+        encoding = self.connection_encodings.get(websocket, JSON)
+        frame = outgoing.frame(encoding)
+        if encoding != JSON:
+            known = self.known_users.get(websocket, set())
+            missing = [user for user_id, user in outgoing.users.items() if user_id not in known]
+            if missing:
+                await self._send_users(websocket, missing)
+        await self._write(websocket, frame)
+
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         """Envia mensagem para uma conexão específica"""
         try:
-            await websocket.send_text(json.dumps(message))
+            await self._send(websocket, OutgoingMessage(message))
         except Exception as e:
             logger.error(f"Error sending message to WebSocket: {e}")
 
     async def send_to_user(self, message: dict, user_id: int):
         """Envia mensagem para todas as conexões de um usuário específico"""
         if user_id in self.active_connections:
+            outgoing = OutgoingMessage(message)
             disconnected_connections = []
             
             for connection in self.active_connections[user_id].copy():
                 try:
-                    await connection.send_text(json.dumps(message))
+                    await self._send(connection, outgoing)
                 except Exception as e:
                     logger.error(f"Error sending message to user {user_id}: {e}")
                     disconnected_connections.append(connection)
@@ -78,21 +219,23 @@ class ConnectionManager:
 
     async def send_to_role(self, message: dict, role: str):
         """Envia mensagem para todos os usuários de um role específico"""
-        for websocket, user in self.connection_users.items():
+        outgoing = OutgoingMessage(message)
+        for websocket, user in list(self.connection_users.items()):
             if user.role.value.lower() == role.lower():
                 try:
-                    await websocket.send_text(json.dumps(message))
+                    await self._send(websocket, outgoing)
                 except Exception as e:
                     logger.error(f"Error sending message to role {role}: {e}")
 
     async def broadcast(self, message: dict):
         """Envia mensagem para todas as conexões ativas"""
+        outgoing = OutgoingMessage(message)
         disconnected_connections = []
         
-        for user_id, connections in self.active_connections.items():
+        for user_id, connections in list(self.active_connections.items()):
             for connection in connections.copy():
                 try:
-                    await connection.send_text(json.dumps(message))
+                    await self._send(connection, outgoing)
                 except Exception as e:
                     logger.error(f"Error broadcasting message: {e}")
                     disconnected_connections.append(connection)
@@ -111,10 +254,11 @@ class ConnectionManager:
             await self.broadcast(message)
             return
             
-        for websocket, user in self.connection_users.items():
+        outgoing = OutgoingMessage(message)
+        for websocket, user in list(self.connection_users.items()):
             if user.role in roles:
                 try:
-                    await websocket.send_text(json.dumps(message))
+                    await self._send(websocket, outgoing)
                 except Exception as e:
                     logger.error(f"Error sending message to role users: {e}")
 
@@ -3,8 +3,8 @@ Sistema de notificações para WebSocket
 """
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from app.websocket.manager import manager
-from app.models.models import Ticket, User, TicketStatus, UserRole
+from app.websocket.manager import manager, user_ref
+from app.models.models import Ticket, User, TicketStatus, TicketPriority, UserRole
 import logging
 
 logger = logging.getLogger(__name__)
@@ -21,11 +21,7 @@ class NotificationService:
             "title": ticket.title,
             "priority": ticket.priority.value,
             "status": ticket.status.value,
-            "created_by": {
-                "id": created_by.id,
-                "username": created_by.username,
-                "full_name": created_by.full_name
-            },
+            "created_by": user_ref(created_by),
             "created_at": ticket.created_at.isoformat(),
             "message": f"Novo ticket criado: {ticket.title}",
             "timestamp": datetime.now().isoformat()
@@ -45,16 +41,8 @@ class NotificationService:
             "ticket_id": ticket.id,
             "title": ticket.title,
             "priority": ticket.priority.value,
-            "assigned_to": {
-                "id": assigned_to.id,
-                "username": assigned_to.username,
-                "full_name": assigned_to.full_name
-            },
-            "assigned_by": {
-                "id": assigned_by.id,
-                "username": assigned_by.username,
-                "full_name": assigned_by.full_name
-            },
+            "assigned_to": user_ref(assigned_to),
+            "assigned_by": user_ref(assigned_by),
             "message": f"Ticket #{ticket.id} foi atribuído para você",
             "timestamp": datetime.now().isoformat()
         }
@@ -88,11 +76,7 @@ class NotificationService:
             "title": ticket.title,
             "old_status": old_status.value,
             "new_status": ticket.status.value,
-            "changed_by": {
-                "id": changed_by.id,
-                "username": changed_by.username,
-                "full_name": changed_by.full_name
-            },
+            "changed_by": user_ref(changed_by),
             "message": f"Status do ticket #{ticket.id} alterado para {status_messages.get(ticket.status, ticket.status.value)}",
             "timestamp": datetime.now().isoformat()
         }
@@ -124,11 +108,7 @@ class NotificationService:
             "ticket_id": ticket.id,
             "title": ticket.title,
             "comment_preview": comment_text[:100] + "..." if len(comment_text) > 100 else comment_text,
-            "commented_by": {
-                "id": commented_by.id,
-                "username": commented_by.username,
-                "full_name": commented_by.full_name
-            },
+            "commented_by": user_ref(commented_by),
             "message": f"Novo comentário no ticket #{ticket.id} por {commented_by.full_name}",
             "timestamp": datetime.now().isoformat()
         }
@@ -159,11 +139,7 @@ class NotificationService:
             "type": "ticket_resolved",
             "ticket_id": ticket.id,
             "title": ticket.title,
-            "resolved_by": {
-                "id": resolved_by.id,
-                "username": resolved_by.username,
-                "full_name": resolved_by.full_name
-            },
+            "resolved_by": user_ref(resolved_by),
             "message": f"Ticket #{ticket.id} foi resolvido por {resolved_by.full_name}",
             "timestamp": datetime.now().isoformat()
         }
@@ -173,6 +149,62 @@ class NotificationService:
         
         logger.info(f"Notification sent for ticket resolution {ticket.id}")
 
+    @staticmethod
+    async def notify_ticket_escalated(ticket: Ticket, reason: str, old_priority: TicketPriority):
+        """Notifica sobre escalação automática do ticket (SLA)"""
+        reasons = {
+            "response": "sem resposta no prazo",
+            "resolution": "prazo de resolução estourado"
+        }
+        message = {
+            "type": "ticket_escalated",
+            "ticket_id": ticket.id,
+            "title": ticket.title,
+            "reason": reason,
+            "old_priority": old_priority.value,
+            "new_priority": ticket.priority.value,
+            "assigned_to_id": ticket.assigned_to_id,
+            "message": f"Ticket #{ticket.id} escalado: {reasons.get(reason, reason)}",
+            "timestamp": datetime.now().isoformat()
+        }
+        
+        # Responsável (ou novo responsável) e administradores
+        if ticket.assigned_to_id:
+            await manager.send_to_user(message, ticket.assigned_to_id)
+        await manager.send_to_role(message, "admin")
+        
+        logger.info(f"Notification sent for escalation of ticket {ticket.id} ({reason})")
+
+    @staticmethod
+    async def notify_tickets_bulk_updated(tickets: List[Ticket], changes: Dict[str, Any], updated_by: User):
+        """Notifica uma alteração em lote com uma mensagem por usuário"""
+        # Tickets de cada usuário interessado (criador e responsável)
+        tickets_by_user: Dict[int, List[int]] = {}
+        for ticket in tickets:
+            for user_id in {ticket.created_by_id, ticket.assigned_to_id}:
+                if user_id and user_id != updated_by.id:
+                    tickets_by_user.setdefault(user_id, []).append(ticket.id)
+        
+        values = {
+            field: value.value if hasattr(value, "value") else value
+            for field, value in changes.items() if field != "solution"
+        }
+        for user_id, ticket_ids in tickets_by_user.items():
+            message = {
+                "type": "tickets_bulk_updated",
+                "ticket_ids": ticket_ids,
+                "changes": values,
+                "updated_by": user_ref(updated_by),
+                "message": (
+                    f"Ticket #{ticket_ids[0]} atualizado por {updated_by.full_name}" if len(ticket_ids) == 1
+                    else f"{len(ticket_ids)} tickets atualizados por {updated_by.full_name}"
+                ),
+                "timestamp": datetime.now().isoformat()
+            }
+            await manager.send_to_user(message, user_id)
+        
+        logger.info(f"Bulk update notification sent for {len(tickets)} tickets to {len(tickets_by_user)} users")
+
     @staticmethod
     async def send_system_notification(message: str, users: Optional[List[int]] = None, roles: Optional[List[str]] = None):
         """Envia notificação do sistema"""
@@ -0,0 +1,7 @@
+"""
+Reproducible benchmarks for the tickets API.
+
+- ``python -m benchmarks.seed``: bulk synthetic data generator
+- ``python -m benchmarks.scenarios``: HTTP/WebSocket load scenarios against a
+  running server, reporting latency percentiles and DB statements per request
+"""
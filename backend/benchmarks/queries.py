@@ -0,0 +1,107 @@
+"""
+Time the hot-path query shapes directly against the database.
+
+Runs the statements behind the ticket list role filters, the dashboard and the
+ticket timeline, printing the median/p95 time and the query plan of each one.
+Useful to check an index change without the HTTP stack in the way.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.queries --database-url sqlite:///./bench.db
+    python -m benchmarks.queries --repeat 50 --output before.json
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import create_engine, desc, func, select, text
+from sqlalchemy.engine import Connection
+
+from app.core.config import settings
+from app.models.models import (
+    ACTIVE_TICKET_FILTER, Ticket, TicketActivity, TicketComment, TicketStatus
+)
+
+
+def build_queries(conn: Connection) -> Dict[str, object]:
+    """Hot-path statements, parameterised with the busiest rows in the dataset"""
+    technician_id = conn.execute(
+        select(Ticket.assigned_to_id).where(Ticket.assigned_to_id.isnot(None))
+        .group_by(Ticket.assigned_to_id).order_by(desc(func.count())).limit(1)
+    ).scalar()
+    user_id = conn.execute(
+        select(Ticket.created_by_id).group_by(Ticket.created_by_id).order_by(desc(func.count())).limit(1)
+    ).scalar()
+    ticket_id = conn.execute(
+        select(TicketActivity.ticket_id).order_by(desc(TicketActivity.id)).limit(1)
+    ).scalar()
+    since = datetime.utcnow() - timedelta(days=30)
+
+    return {
+        "technician_list": select(Ticket.id).where(Ticket.assigned_to_id == technician_id)
+        .order_by(desc(Ticket.created_at)).limit(50),
+        "user_list": select(Ticket.id).where(Ticket.created_by_id == user_id)
+        .order_by(desc(Ticket.created_at)).limit(50),
+        "status_list": select(Ticket.id).where(Ticket.status == TicketStatus.OPEN)
+        .order_by(desc(Ticket.created_at)).limit(50),
+        "dashboard_recent_count": select(func.count()).select_from(Ticket).where(Ticket.created_at >= since),
+        "dashboard_technician_active": select(Ticket.priority, func.count()).where(
+            Ticket.assigned_to_id == technician_id, ACTIVE_TICKET_FILTER
+        ).group_by(Ticket.priority),
+        "ticket_activities": select(TicketActivity.id).where(TicketActivity.ticket_id == ticket_id)
+        .order_by(TicketActivity.created_at),
+        "ticket_comments": select(TicketComment.id).where(TicketComment.ticket_id == ticket_id)
+        .order_by(TicketComment.created_at),
+        "recent_activities": select(TicketActivity.id).order_by(desc(TicketActivity.created_at)).limit(10),
+    }
+
+
+def explain(conn: Connection, statement) -> List[str]:
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    return [" ".join(str(value) for value in row) for row in conn.execute(text(prefix + str(compiled)))]
+
+
+def time_statement(conn: Connection, statement, repeat: int) -> List[float]:
+    conn.execute(statement).fetchall()  # warm caches
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(statement).fetchall()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time hot-path queries and show their plans")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--no-plan", action="store_true", help="Skip printing query plans")
+    parser.add_argument("--output", help="Write timings as JSON")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.database_url)
+    results = {}
+    with engine.connect() as conn:
+        for name, statement in build_queries(conn).items():
+            timings = sorted(time_statement(conn, statement, args.repeat))
+            results[name] = {
+                "median_ms": round(statistics.median(timings), 3),
+                "p95_ms": round(timings[int(0.95 * (len(timings) - 1))], 3),
+            }
+            print(f"{name:<30}{results[name]['median_ms']:>10.3f} ms median{results[name]['p95_ms']:>10.3f} ms p95")
+            if not args.no_plan:
+                for line in explain(conn, statement):
+                    print(f"    {line}")
+    engine.dispose()
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
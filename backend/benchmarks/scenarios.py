@@ -0,0 +1,361 @@
+"""
+Load scenarios against a running API server.
+
+Each scenario fires ``--requests`` requests with ``--concurrency`` workers and
+reports throughput, p50/p95/p99 latency and the average number of database
+statements per request (read from the server's ``/metrics`` endpoint before
+and after the run). Tokens are minted locally, so the server must share this
+process's SECRET_KEY, and data is expected to come from ``benchmarks.seed``.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.scenarios --base-url http://localhost:8000
+    python -m benchmarks.scenarios --scenario list,detail --requests 500 --output run.json
+    python -m benchmarks.scenarios --baseline run.json --tolerance 0.2
+
+With ``--baseline`` the exit status is 1 when any scenario's p95 regressed by
+more than ``--tolerance`` compared to a previous ``--output`` file.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy import create_engine, func, select
+
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.models.models import Ticket, User, UserRole
+
+API = settings.API_V1_STR
+SEARCH_TERMS = ["VPN", "impressora", "senha", "backup", "ERP", "monitor", "rede"]
+
+_METRIC_LINE = re.compile(r"^http_request_db_statements_(sum|count)\{.*\} (\S+)$")
+
+
+@dataclass
+class ScenarioResult:
+    scenario: str
+    requests: int
+    errors: int
+    duration_s: float
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    statements_per_request: Optional[float] = None
+    extra: Dict[str, float] = field(default_factory=dict)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+class Context:
+    """Tokens and ids sampled from the benchmark dataset"""
+
+    def __init__(self, database_url: str, rng: random.Random):
+        self.rng = rng
+        engine = create_engine(database_url)
+        with engine.connect() as conn:
+            self.usernames = {
+                role: [row[0] for row in conn.execute(
+                    select(User.username).where(User.role == role, User.username.like("bench_%")).limit(200)
+                )]
+                for role in (UserRole.admin, UserRole.technician, UserRole.user)
+            }
+            max_id = conn.execute(select(func.max(Ticket.id))).scalar() or 0
+            self.ticket_ids = [row[0] for row in conn.execute(
+                select(Ticket.id).where(Ticket.id > max(0, max_id - 50000)).limit(5000)
+            )]
+        engine.dispose()
+
+        missing = [role.value for role, names in self.usernames.items() if not names]
+        if missing or not self.ticket_ids:
+            raise SystemExit(f"Benchmark data missing (roles: {missing}); run python -m benchmarks.seed first")
+        self._tokens: Dict[str, str] = {}
+
+    def headers(self, role: UserRole) -> Dict[str, str]:
+        username = self.rng.choice(self.usernames[role])
+        if username not in self._tokens:
+            self._tokens[username] = create_access_token(username)
+        return {"Authorization": f"Bearer {self._tokens[username]}"}
+
+    def token(self, role: UserRole) -> str:
+        return self.headers(role)["Authorization"].split(" ", 1)[1]
+
+
+RequestFactory = Callable[[Context, httpx.AsyncClient], httpx.Request]
+SCENARIOS: Dict[str, RequestFactory] = {}
+
+
+def scenario(name: str):
+    def register(func: RequestFactory):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+def _any_role(ctx: Context) -> UserRole:
+    return ctx.rng.choice([UserRole.admin, UserRole.technician, UserRole.user])
+
+
+@scenario("list")
+def list_tickets(ctx: Context, client: httpx.AsyncClient) -> httpx.Request:
+    return client.build_request("GET", f"{API}/tickets/", params={"limit": 50}, headers=ctx.headers(_any_role(ctx)))
+
+
+@scenario("detail")
+def ticket_detail(ctx: Context, client: httpx.AsyncClient) -> httpx.Request:
+    ticket_id = ctx.rng.choice(ctx.ticket_ids)
+    return client.build_request("GET", f"{API}/tickets/{ticket_id}", headers=ctx.headers(UserRole.admin))
+
+
+@scenario("search")
+def search_tickets(ctx: Context, client: httpx.AsyncClient) -> httpx.Request:
+    params = {"search": ctx.rng.choice(SEARCH_TERMS), "limit": 50}
+    return client.build_request("GET", f"{API}/tickets/", params=params, headers=ctx.headers(_any_role(ctx)))
+
+
+@scenario("dashboard")
+def dashboard_stats(ctx: Context, client: httpx.AsyncClient) -> httpx.Request:
+    params = {"days": ctx.rng.choice([7, 30, 90])}
+    return client.build_request("GET", f"{API}/dashboard/stats", params=params, headers=ctx.headers(_any_role(ctx)))
+
+
+@scenario("reports")
+def reports(ctx: Context, client: httpx.AsyncClient) -> httpx.Request:
+    path = ctx.rng.choice(["/reports/sla/analysis", "/reports/performance/technicians", "/reports/metrics/department"])
+    return client.build_request("GET", f"{API}{path}", params={"days": 90}, headers=ctx.headers(UserRole.technician))
+
+
+async def scrape_statements(client: httpx.AsyncClient):
+    """Total (sum, count) of the per-request statement histogram"""
+    try:
+        response = await client.get("/metrics")
+    except httpx.HTTPError:
+        return None
+    if response.status_code != 200:
+        return None
+    totals = {"sum": 0.0, "count": 0.0}
+    for line in response.text.splitlines():
+        match = _METRIC_LINE.match(line)
+        if match:
+            totals[match.group(1)] += float(match.group(2))
+    return totals
+
+
+async def run_http_scenario(name: str, client: httpx.AsyncClient, ctx: Context, args) -> ScenarioResult:
+    factory = SCENARIOS[name]
+    latencies: List[float] = []
+    errors = 0
+    remaining = args.requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            request = factory(ctx, client)
+            start = time.perf_counter()
+            try:
+                response = await client.send(request)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    before = await scrape_statements(client)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    duration = time.perf_counter() - started
+    after = await scrape_statements(client)
+
+    statements = None
+    if before and after:
+        # The second scrape itself is counted once with zero statements
+        requests_seen = after["count"] - before["count"] - 1
+        if requests_seen > 0:
+            statements = round((after["sum"] - before["sum"]) / requests_seen, 2)
+
+    return ScenarioResult(
+        scenario=name,
+        requests=len(latencies),
+        errors=errors,
+        duration_s=round(duration, 3),
+        rps=round(len(latencies) / duration, 1) if duration else 0.0,
+        p50_ms=round(percentile(latencies, 50), 2),
+        p95_ms=round(percentile(latencies, 95), 2),
+        p99_ms=round(percentile(latencies, 99), 2),
+        max_ms=round(max(latencies, default=0.0), 2),
+        statements_per_request=statements
+    )
+
+
+async def run_websocket_fanout(client: httpx.AsyncClient, ctx: Context, args) -> ScenarioResult:
+    """Open many technician sockets, create tickets and time delivery to every socket"""
+    import websockets
+
+    ws_base = args.base_url.replace("http://", "ws://").replace("https://", "wss://")
+    pending: Dict[int, float] = {}
+    # The broadcast can arrive before the POST response, so match ids afterwards
+    arrivals: List[tuple] = []
+    errors = 0
+
+    async def listen(socket):
+        async for raw in socket:
+            message = json.loads(raw)
+            if message.get("type") == "ticket_created":
+                arrivals.append((message.get("ticket_id"), time.perf_counter()))
+
+    sockets = []
+    for _ in range(args.ws_clients):
+        url = f"{ws_base}{API}/notifications/ws?token={ctx.token(UserRole.technician)}"
+        socket = await websockets.connect(url, max_size=None)
+        await socket.recv()  # connection_established
+        sockets.append(socket)
+    listeners = [asyncio.create_task(listen(socket)) for socket in sockets]
+
+    started = time.perf_counter()
+    for index in range(args.ws_messages):
+        sent_at = time.perf_counter()
+        response = await client.post(
+            f"{API}/tickets/",
+            json={"title": f"Benchmark fan-out {index}", "description": "Ticket criado pelo benchmark", "priority": "medium"},
+            headers=ctx.headers(UserRole.user)
+        )
+        if response.status_code >= 400:
+            errors += 1
+            continue
+        pending[response.json()["id"]] = sent_at
+    # Give the last broadcast time to arrive
+    deadline = time.perf_counter() + 5
+    expected = len(pending) * len(sockets)
+    while len(arrivals) < expected and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+    duration = time.perf_counter() - started
+    latencies = [
+        (received_at - pending[ticket_id]) * 1000
+        for ticket_id, received_at in arrivals if ticket_id in pending
+    ]
+
+    for task in listeners:
+        task.cancel()
+    for socket in sockets:
+        await socket.close()
+
+    delivered = len(latencies)
+    return ScenarioResult(
+        scenario="websocket",
+        requests=delivered,
+        errors=errors + (expected - delivered),
+        duration_s=round(duration, 3),
+        rps=round(delivered / duration, 1) if duration else 0.0,
+        p50_ms=round(percentile(latencies, 50), 2),
+        p95_ms=round(percentile(latencies, 95), 2),
+        p99_ms=round(percentile(latencies, 99), 2),
+        max_ms=round(max(latencies, default=0.0), 2),
+        extra={"clients": len(sockets), "messages": len(pending)}
+    )
+
+
+def print_results(results: List[ScenarioResult]):
+    header = f"{'scenario':<12}{'reqs':>8}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'stmts/req':>11}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        statements = "-" if result.statements_per_request is None else f"{result.statements_per_request:.1f}"
+        print(
+            f"{result.scenario:<12}{result.requests:>8}{result.errors:>8}{result.rps:>9.1f}"
+            f"{result.p50_ms:>10.1f}{result.p95_ms:>10.1f}{result.p99_ms:>10.1f}{result.max_ms:>10.1f}{statements:>11}"
+        )
+
+
+def compare_with_baseline(results: List[ScenarioResult], baseline_path: str, tolerance: float) -> bool:
+    """Print p95 changes against a baseline run; return True if any regressed"""
+    with open(baseline_path) as baseline_file:
+        baseline = {item["scenario"]: item for item in json.load(baseline_file)["results"]}
+
+    regressed = False
+    for result in results:
+        previous = baseline.get(result.scenario)
+        if not previous or not previous["p95_ms"]:
+            continue
+        change = (result.p95_ms - previous["p95_ms"]) / previous["p95_ms"]
+        status = "REGRESSION" if change > tolerance else "ok"
+        regressed = regressed or change > tolerance
+        print(f"{result.scenario:<12} p95 {previous['p95_ms']:.1f} -> {result.p95_ms:.1f} ms ({change:+.0%}) {status}")
+    return regressed
+
+
+async def main_async(args) -> int:
+    rng = random.Random(args.seed)
+    ctx = Context(args.database_url, rng)
+    names = [name.strip() for name in args.scenario.split(",") if name.strip()]
+
+    results = []
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        for name in names:
+            if name == "websocket":
+                results.append(await run_websocket_fanout(client, ctx, args))
+            elif name in SCENARIOS:
+                if args.warmup:
+                    warmup_args = argparse.Namespace(**{**vars(args), "requests": args.warmup})
+                    await run_http_scenario(name, client, ctx, warmup_args)
+                results.append(await run_http_scenario(name, client, ctx, args))
+            else:
+                raise SystemExit(f"Unknown scenario: {name}")
+
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump({
+                "base_url": args.base_url,
+                "concurrency": args.concurrency,
+                "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": [asdict(result) for result in results]
+            }, output_file, indent=2)
+
+    if args.baseline:
+        return 1 if compare_with_baseline(results, args.baseline, args.tolerance) else 0
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run load scenarios against the tickets API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL, help="Used to sample users and ticket ids")
+    parser.add_argument("--scenario", default="list,detail,search,dashboard,reports,websocket")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--ws-clients", type=int, default=100)
+    parser.add_argument("--ws-messages", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--baseline", help="Compare p95 against a previous JSON output")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 increase (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    sys.exit(asyncio.run(main_async(parse_args(argv))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+"""
+Bulk synthetic data generator for benchmarks.
+
+Creates users, technicians, categories, tickets, comments, activities and
+evaluations with skewed (Zipf-like) distributions: a few users open most
+tickets, a few technicians carry most of the load, recent weeks are denser and
+old tickets are mostly closed. Rows are written with Core executemany inserts
+in batches, using explicit primary keys so no row has to be read back.
+
+Usage (from the backend directory):
+
+    python -m benchmarks.seed --tickets 200000 --users 5000
+    python -m benchmarks.seed --database-url sqlite:///./bench.db --create-schema
+
+Every generated user is named ``bench_*`` and has the password ``bench123``.
+"""
+import argparse
+import bisect
+import itertools
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Sequence
+
+from sqlalchemy import create_engine, func, select, text
+
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.models.models import (
+    Base, Category, Ticket, TicketActivity, TicketComment, TicketEvaluation,
+    TicketPriority, TicketStatus, User, UserRole
+)
+from app.services.settings_service import DEFAULT_SETTINGS
+from app.services.sla import SlaPolicy
+
+BENCH_PASSWORD = "bench123"
+
+PRIORITY_WEIGHTS = [
+    (TicketPriority.LOW, 0.30),
+    (TicketPriority.MEDIUM, 0.40),
+    (TicketPriority.HIGH, 0.18),
+    (TicketPriority.URGENT, 0.09),
+    (TicketPriority.CRITICAL, 0.03),
+]
+
+# Median resolution time in hours per priority
+RESOLUTION_HOURS = {
+    TicketPriority.LOW: 60,
+    TicketPriority.MEDIUM: 20,
+    TicketPriority.HIGH: 6,
+    TicketPriority.URGENT: 2,
+    TicketPriority.CRITICAL: 1,
+}
+
+ACTIVE_STATUSES = [
+    (TicketStatus.OPEN, 0.45),
+    (TicketStatus.IN_PROGRESS, 0.35),
+    (TicketStatus.WAITING_USER, 0.12),
+    (TicketStatus.REOPENED, 0.08),
+]
+
+CATEGORY_NAMES = [
+    "Rede", "VPN", "Impressoras", "E-mail", "Hardware", "Software", "Acessos",
+    "Telefonia", "ERP", "Banco de Dados", "Backup", "Servidores", "Segurança",
+    "Wi-Fi", "Notebooks", "Monitores", "Licenças", "Sistemas Internos",
+    "Compartilhamento de Arquivos", "Antivírus",
+]
+
+DEPARTMENTS = ["Financeiro", "RH", "Comercial", "Logística", "Jurídico", "Marketing", "Compras", "Diretoria"]
+
+ISSUES = [
+    ("VPN não conecta", "A VPN desconecta ao tentar acessar a rede interna."),
+    ("Impressora offline", "A impressora do andar aparece como offline para todos."),
+    ("Sem acesso ao e-mail", "O Outlook pede senha repetidamente e não sincroniza."),
+    ("Computador lento", "O computador demora vários minutos para iniciar."),
+    ("Erro no ERP", "O ERP apresenta erro ao emitir nota fiscal."),
+    ("Senha expirada", "Preciso redefinir a senha de acesso ao domínio."),
+    ("Wi-Fi instável", "A rede sem fio cai várias vezes ao dia na sala de reunião."),
+    ("Monitor sem imagem", "O segundo monitor não exibe imagem após atualização."),
+    ("Pasta compartilhada inacessível", "Não consigo abrir a pasta compartilhada do departamento."),
+    ("Instalação de software", "Solicito instalação de software para o novo colaborador."),
+    ("Telefone sem linha", "O ramal está sem linha desde ontem."),
+    ("Backup falhou", "O backup noturno do servidor de arquivos falhou."),
+]
+
+SOLUTIONS = [
+    "Reiniciado o serviço e validado com o usuário.",
+    "Credenciais redefinidas e sessão sincronizada.",
+    "Driver atualizado e equipamento reconfigurado.",
+    "Permissões de acesso corrigidas no grupo do AD.",
+    "Equipamento substituído por unidade reserva.",
+    "Cache local limpo e perfil recriado.",
+]
+
+COMMENTS = [
+    "Poderia verificar novamente, por favor?",
+    "Estou analisando o problema.",
+    "O problema persiste após a reinicialização.",
+    "Aguardando retorno do fornecedor.",
+    "Funcionou, obrigado!",
+    "Encaminhado para a equipe de infraestrutura.",
+]
+
+
+def zipf_cum_weights(count: int, exponent: float) -> List[float]:
+    """Cumulative weights of a Zipf distribution over ``count`` items"""
+    return list(itertools.accumulate(1.0 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def weighted(rng: random.Random, items: Sequence, cum_weights: Sequence[float]):
+    return items[bisect.bisect_left(cum_weights, rng.random() * cum_weights[-1])]
+
+
+def batched(rows: Iterable[dict], size: int) -> Iterable[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Generator:
+    def __init__(self, engine, args):
+        self.engine = engine
+        self.args = args
+        self.rng = random.Random(args.seed)
+        self.now = datetime.utcnow()
+        self.counts: Dict[str, int] = {}
+
+    def _next_id(self, conn, model) -> int:
+        return (conn.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+    def _insert(self, conn, model, rows: Iterable[dict]):
+        table = model.__table__
+        total = 0
+        for batch in batched(rows, self.args.batch_size):
+            conn.execute(table.insert(), batch)
+            total += len(batch)
+        self.counts[table.name] = self.counts.get(table.name, 0) + total
+
+    def run(self):
+        started = time.perf_counter()
+        with self.engine.begin() as conn:
+            users, technicians = self.seed_users(conn)
+            categories = self.seed_categories(conn)
+            self.seed_tickets(conn, users, technicians, categories)
+            if self.engine.dialect.name == "postgresql":
+                self.sync_sequences(conn)
+        elapsed = time.perf_counter() - started
+
+        total = sum(self.counts.values())
+        for table, count in self.counts.items():
+            print(f"{table:>20}: {count:>10,}")
+        print(f"{'total':>20}: {total:>10,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+
+    def seed_users(self, conn):
+        password = get_password_hash(BENCH_PASSWORD)
+        first_id = self._next_id(conn, User)
+        rows = []
+
+        def user_row(offset, username, role, department):
+            return {
+                "id": first_id + offset,
+                "username": username,
+                "email": f"{username}@bench.local",
+                "full_name": username.replace("_", " ").title(),
+                "department": department,
+                "role": role,
+                "is_active": True,
+                "is_ldap_user": False,
+                "hashed_password": password,
+                "created_at": self.now - timedelta(days=self.args.days + 30),
+            }
+
+        rows.append(user_row(0, f"bench_admin_{first_id}", UserRole.admin, "TI"))
+        technicians = []
+        for index in range(self.args.technicians):
+            row = user_row(len(rows), f"bench_tech_{first_id + len(rows)}", UserRole.technician, "TI")
+            technicians.append(row["id"])
+            rows.append(row)
+        users = []
+        for index in range(self.args.users):
+            row = user_row(
+                len(rows), f"bench_user_{first_id + len(rows)}", UserRole.user,
+                self.rng.choice(DEPARTMENTS)
+            )
+            users.append(row["id"])
+            rows.append(row)
+
+        self._insert(conn, User, rows)
+        return users, technicians
+
+    def seed_categories(self, conn):
+        first_id = self._next_id(conn, Category)
+        rows = []
+        for index in range(self.args.categories):
+            name = CATEGORY_NAMES[index % len(CATEGORY_NAMES)]
+            rows.append({
+                "id": first_id + index,
+                "name": f"{name} {first_id + index}",
+                "description": f"Categoria de benchmark: {name}",
+                "color": "#%06X" % self.rng.randrange(0x1000000),
+                "is_active": True,
+            })
+        self._insert(conn, Category, rows)
+        return [row["id"] for row in rows]
+
+    def seed_tickets(self, conn, users, technicians, categories):
+        rng = self.rng
+        args = self.args
+        user_weights = zipf_cum_weights(len(users), 1.1)
+        tech_weights = zipf_cum_weights(len(technicians), 0.8) if technicians else []
+        category_weights = zipf_cum_weights(len(categories), 1.0) if categories else []
+        priorities = [priority for priority, _ in PRIORITY_WEIGHTS]
+        priority_weights = list(itertools.accumulate(weight for _, weight in PRIORITY_WEIGHTS))
+        active = [status for status, _ in ACTIVE_STATUSES]
+        active_weights = list(itertools.accumulate(weight for _, weight in ACTIVE_STATUSES))
+        sla_policy = SlaPolicy.from_settings(DEFAULT_SETTINGS["sla"], DEFAULT_SETTINGS["general"]["timezone"])
+
+        ticket_id = self._next_id(conn, Ticket)
+        comment_id = self._next_id(conn, TicketComment)
+        activity_id = self._next_id(conn, TicketActivity)
+        evaluation_id = self._next_id(conn, TicketEvaluation)
+
+        tickets, comments, activities, evaluations = [], [], [], []
+
+        def flush():
+            self._insert(conn, Ticket, tickets)
+            self._insert(conn, TicketComment, comments)
+            self._insert(conn, TicketActivity, activities)
+            self._insert(conn, TicketEvaluation, evaluations)
+            for rows in (tickets, comments, activities, evaluations):
+                rows.clear()
+
+        for _ in range(args.tickets):
+            # Recent weeks are denser than old ones
+            age = timedelta(days=args.days * rng.random() ** 1.6)
+            created_at = self.now - age
+            creator = weighted(rng, users, user_weights)
+            priority = weighted(rng, priorities, priority_weights)
+            title, description = rng.choice(ISSUES)
+            category_id = weighted(rng, categories, category_weights) if categories and rng.random() < 0.9 else None
+
+            # Old tickets are mostly closed
+            closed_share = 0.9 if age > timedelta(days=14) else 0.35
+            if rng.random() < closed_share:
+                resolved_at = created_at + timedelta(hours=rng.lognormvariate(0, 0.8) * RESOLUTION_HOURS[priority])
+                resolved_at = min(resolved_at, self.now)
+                if rng.random() < 0.85:
+                    status = TicketStatus.CLOSED
+                    closed_at = min(resolved_at + timedelta(hours=rng.expovariate(1 / 24)), self.now)
+                else:
+                    status = TicketStatus.RESOLVED
+                    closed_at = None
+            else:
+                status = weighted(rng, active, active_weights)
+                resolved_at = closed_at = None
+
+            assigned_to_id = None
+            if technicians and (status != TicketStatus.OPEN or rng.random() < 0.6):
+                assigned_to_id = weighted(rng, technicians, tech_weights)
+
+            response_due_at, resolve_due_at = sla_policy.due_dates(priority, created_at)
+            tickets.append({
+                "id": ticket_id,
+                "title": f"{title} ({rng.choice(DEPARTMENTS)})",
+                "description": description,
+                "status": status,
+                "priority": priority,
+                "created_by_id": creator,
+                "assigned_to_id": assigned_to_id,
+                "category_id": category_id,
+                "created_at": created_at,
+                "updated_at": closed_at or resolved_at or created_at,
+                "resolved_at": resolved_at,
+                "closed_at": closed_at,
+                "response_due_at": response_due_at,
+                "resolve_due_at": resolve_due_at,
+                "first_response_at": None,
+                "solution": rng.choice(SOLUTIONS) if resolved_at else None,
+            })
+            ticket = tickets[-1]
+            activities.append({
+                "id": activity_id, "ticket_id": ticket_id, "user_id": creator,
+                "action": "created", "description": f"Ticket criado: {title}",
+                "old_value": None, "new_value": None, "created_at": created_at,
+            })
+            activity_id += 1
+
+            last_event = created_at
+            for _ in range(int(rng.expovariate(1 / args.comments_per_ticket))):
+                last_event = min(last_event + timedelta(hours=rng.expovariate(1 / 6)), self.now)
+                author = assigned_to_id if assigned_to_id and rng.random() < 0.5 else creator
+                comments.append({
+                    "id": comment_id, "ticket_id": ticket_id, "user_id": author,
+                    "content": rng.choice(COMMENTS), "is_internal": author != creator and rng.random() < 0.2,
+                    "created_at": last_event,
+                })
+                activities.append({
+                    "id": activity_id, "ticket_id": ticket_id, "user_id": author,
+                    "action": "commented", "description": "Adicionou comentário",
+                    "old_value": None, "new_value": None, "created_at": last_event,
+                })
+                comment_id += 1
+                activity_id += 1
+                if author != creator and ticket["first_response_at"] is None:
+                    ticket["first_response_at"] = last_event
+
+            if resolved_at:
+                activities.append({
+                    "id": activity_id, "ticket_id": ticket_id, "user_id": assigned_to_id or creator,
+                    "action": "updated", "description": "Status alterado",
+                    "old_value": TicketStatus.IN_PROGRESS.value, "new_value": TicketStatus.RESOLVED.value,
+                    "created_at": resolved_at,
+                })
+                activity_id += 1
+                if assigned_to_id and ticket["first_response_at"] is None:
+                    ticket["first_response_at"] = resolved_at
+
+            if status == TicketStatus.CLOSED and rng.random() < 0.4:
+                rating = rng.choices([1, 2, 3, 4, 5], weights=[3, 4, 10, 33, 50])[0]
+                evaluations.append({
+                    "id": evaluation_id, "ticket_id": ticket_id, "user_id": creator,
+                    "rating": rating, "technician_rating": rating,
+                    "feedback": "Atendimento avaliado automaticamente" if rng.random() < 0.2 else None,
+                    "created_at": closed_at,
+                })
+                evaluation_id += 1
+
+            ticket_id += 1
+            if len(tickets) >= args.batch_size:
+                flush()
+
+        flush()
+
+    def sync_sequences(self, conn):
+        """Move PostgreSQL sequences past the explicit ids inserted"""
+        for model in (User, Category, Ticket, TicketComment, TicketActivity, TicketEvaluation):
+            table = model.__table__.name
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 1) FROM {table}))"
+            ))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic benchmark data")
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--create-schema", action="store_true", help="Create missing tables first")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--technicians", type=int, default=40)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--tickets", type=int, default=100000)
+    parser.add_argument("--comments-per-ticket", type=float, default=3.0)
+    parser.add_argument("--days", type=int, default=365, help="Spread tickets over this many days")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    engine = create_engine(args.database_url)
+    if args.create_schema:
+        Base.metadata.create_all(bind=engine)
+    Generator(engine, args).run()
+
+
+if __name__ == "__main__":
+    main()
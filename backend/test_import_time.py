@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Orçamento de tempo de importação da API.
+
+Executa ``python -X importtime -c "import app.main"`` em um processo novo e
+falha se a importação passar do orçamento ou se carregar dependências pesadas
+que só devem ser importadas sob demanda (exportações, migrações).
+
+    python test_import_time.py
+    IMPORT_TIME_BUDGET_MS=1500 pytest test_import_time.py
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Tempo cumulativo máximo de "import app.main" (melhor de RUNS execuções)
+BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", "2500"))
+RUNS = int(os.environ.get("IMPORT_TIME_RUNS", "3"))
+
+# Módulos que não podem ser carregados na importação da API
+LAZY_MODULES = ("pandas", "openpyxl", "numpy", "scipy", "alembic")
+
+
+def measure_import():
+    """Retorna (tempo cumulativo de app.main em ms, módulos importados)"""
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.gettempdir(), "import_time.db"))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+
+    total_us = None
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # cabeçalho
+        name = name.strip()
+        modules.add(name)
+        if name == "app.main":
+            total_us = int(cumulative)
+    assert total_us is not None, "app.main não apareceu na saída de -X importtime"
+    return total_us / 1000, modules
+
+
+def test_import_time():
+    """A importação da API fica dentro do orçamento e sem dependências pesadas"""
+    timings = []
+    for _ in range(RUNS):
+        elapsed_ms, modules = measure_import()
+        timings.append(elapsed_ms)
+
+        loaded = sorted(
+            module for module in LAZY_MODULES
+            if module in modules or any(name.startswith(module + ".") for name in modules)
+        )
+        assert not loaded, f"Dependências que deveriam ser lazy foram importadas: {loaded}"
+
+    best = min(timings)
+    print(f"import app.main: {best:.0f} ms (orçamento {BUDGET_MS:.0f} ms)")
+    assert best <= BUDGET_MS, f"import app.main levou {best:.0f} ms, acima do orçamento de {BUDGET_MS:.0f} ms"
+
+
+if __name__ == "__main__":
+    test_import_time()
+    print("✅ Tempo de importação dentro do orçamento")
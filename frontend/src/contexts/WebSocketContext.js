@@ -3,6 +3,9 @@ import { useAuth } from './AuthContext';
 
 const WebSocketContext = createContext();
 
+// Notification fields sent as `<field>_id` references by the compact encoding
+const USER_FIELDS = ['created_by', 'assigned_to', 'assigned_by', 'changed_by', 'commented_by', 'resolved_by', 'updated_by'];
+
 export const useWebSocket = () => {
   const context = useContext(WebSocketContext);
   if (!context) {
@@ -19,6 +22,7 @@ export const WebSocketProvider = ({ children }) => {
   const [unreadCount, setUnreadCount] = useState(0);
   const reconnectTimeoutRef = useRef(null);
   const heartbeatIntervalRef = useRef(null);
+  const usersRef = useRef({});
 
   const connect = () => {
     if (!token || !user) {
@@ -27,7 +31,7 @@ export const WebSocketProvider = ({ children }) => {
     }
 
     try {
-      const wsUrl = `wss://ticket.algti.com/api/v1/notifications/ws?token=${token}`;
+      const wsUrl = `wss://ticket.algti.com/api/v1/notifications/ws?token=${token}&encoding=compact`;
       console.log('Attempting WebSocket connection to:', wsUrl);
       console.log('User info:', { id: user.id, username: user.username, role: user.role });
       const newSocket = new WebSocket(wsUrl);
@@ -44,7 +48,7 @@ export const WebSocketProvider = ({ children }) => {
       newSocket.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data);
-          handleMessage(data);
+          handleMessage(resolveUsers(data));
         } catch (error) {
           console.error('Error parsing WebSocket message:', error);
         }
@@ -119,6 +123,24 @@ export const WebSocketProvider = ({ children }) => {
     }
   };
 
+  // Replaces user references with the objects from the cache primed by `users` messages
+  const resolveUsers = (data) => {
+    if (data.type === 'users') {
+      data.users.forEach((cachedUser) => {
+        usersRef.current[cachedUser.id] = cachedUser;
+      });
+      return data;
+    }
+    const resolved = { ...data };
+    USER_FIELDS.forEach((field) => {
+      const userId = resolved[`${field}_id`];
+      if (userId !== undefined && usersRef.current[userId]) {
+        resolved[field] = usersRef.current[userId];
+      }
+    });
+    return resolved;
+  };
+
   const handleMessage = (data) => {
     console.log('WebSocket message received:', data);
 
@@ -131,6 +153,10 @@ export const WebSocketProvider = ({ children }) => {
         // Heartbeat acknowledged
         break;
 
+      case 'users':
+        // User cache updated in resolveUsers
+        break;
+
       case 'ticket_created':
       case 'ticket_assigned':
       case 'ticket_status_changed':
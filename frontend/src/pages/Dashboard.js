@@ -1,5 +1,5 @@
-import React from 'react';
-import { useQuery } from 'react-query';
+import React, { useEffect, useRef, useState } from 'react';
+import { useQuery, useQueryClient } from 'react-query';
 import { Link } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
 import { dashboardService, evaluationsAPI } from '../services/api';
@@ -14,18 +14,97 @@ import {
   FaceSmileIcon
 } from '@heroicons/react/24/outline';
 
+// Averages and recent activity are not streamed: refetched at most this often after changes
+const STATS_REFRESH_MS = 30000;
+
+const addCounts = (counts = {}, delta = {}) => {
+  const result = { ...counts };
+  Object.entries(delta).forEach(([key, value]) => {
+    result[key] = (result[key] || 0) + value;
+  });
+  return result;
+};
+
+// Counters of the last snapshot event plus a delta event
+const applyDelta = (counts, delta) => ({
+  total: (counts.total || 0) + (delta.total || 0),
+  status: addCounts(counts.status, delta.status),
+  priority: addCounts(counts.priority, delta.priority),
+  category: addCounts(counts.category, delta.category),
+});
+
+// The /dashboard/stats fields carried by the stream's counters
+const liveStats = (stats, counts) => {
+  const noTickets = Object.fromEntries(
+    Object.keys(stats.tickets_by_priority || {}).map((priority) => [priority, 0])
+  );
+  return {
+    total_tickets: counts.total || 0,
+    open_tickets: counts.status?.open || 0,
+    in_progress_tickets: counts.status?.in_progress || 0,
+    resolved_tickets: counts.status?.resolved || 0,
+    closed_tickets: counts.status?.closed || 0,
+    tickets_by_priority: { ...noTickets, ...counts.priority },
+    tickets_by_category: Object.fromEntries(
+      Object.entries(counts.category || {}).filter(([, count]) => count > 0)
+    ),
+  };
+};
+
 const Dashboard = () => {
-  const { user, isTechnician } = useAuth();
+  const { user, isTechnician, token } = useAuth();
+  const queryClient = useQueryClient();
+  // Ticket counters pushed by /dashboard/stream; null while it is not connected
+  const [liveCounts, setLiveCounts] = useState(null);
+  const refreshTimer = useRef(null);
   
-  const { data: stats, isLoading } = useQuery(
+  const { data: fetchedStats, isLoading } = useQuery(
     ['dashboard-stats'],
-    () => dashboardService.getStats({ days: 365 }), // Get all tickets, not just last 30 days
+    // 365 days is not filtered by date: all tickets, as counted by the stream
+    () => dashboardService.getStats({ days: 365 }),
     {
       select: (response) => response.data,
-      refetchInterval: 30000, // Refresh every 30 seconds
+      // Polled only while the stream is unavailable
+      refetchInterval: liveCounts ? false : 30000,
     }
   );
 
+  useEffect(() => {
+    if (!token || typeof EventSource === 'undefined') {
+      return undefined;
+    }
+    const source = new EventSource(dashboardService.getStreamUrl(token));
+    source.addEventListener('snapshot', (event) => {
+      setLiveCounts(JSON.parse(event.data));
+    });
+    source.addEventListener('delta', (event) => {
+      const delta = JSON.parse(event.data);
+      setLiveCounts((counts) => (counts ? applyDelta(counts, delta) : counts));
+      if (!refreshTimer.current) {
+        refreshTimer.current = setTimeout(() => {
+          refreshTimer.current = null;
+          queryClient.invalidateQueries(['dashboard-stats']);
+        }, STATS_REFRESH_MS);
+      }
+    });
+    source.onerror = () => {
+      // The browser reconnects by itself (and gets a new snapshot) unless the
+      // stream was refused, e.g. disabled or expired token: poll instead
+      if (source.readyState === EventSource.CLOSED) {
+        setLiveCounts(null);
+      }
+    };
+    return () => {
+      source.close();
+      clearTimeout(refreshTimer.current);
+      refreshTimer.current = null;
+    };
+  }, [token, queryClient]);
+
+  const stats = fetchedStats && liveCounts
+    ? { ...fetchedStats, ...liveStats(fetchedStats, liveCounts) }
+    : fetchedStats;
+
   // Fetch satisfaction metrics for technicians and admins
   const { data: satisfactionMetrics, isLoading: isLoadingMetrics } = useQuery(
     ['satisfaction-metrics'],
@@ -313,13 +392,13 @@ const Dashboard = () => {
                 <div className="flex-shrink-0">
                   <div className="h-8 w-8 rounded-full bg-gray-200 flex items-center justify-center">
                     <span className="text-xs font-medium text-gray-600">
-                      {activity.user?.full_name?.charAt(0)?.toUpperCase() || 'U'}
+                      {activity.user ? activity.user.full_name?.charAt(0)?.toUpperCase() || 'U' : 'S'}
                     </span>
                   </div>
                 </div>
                 <div className="flex-1 min-w-0">
                   <p className="text-sm text-gray-900">
-                    <span className="font-medium">{activity.user?.full_name}</span>
+                    <span className="font-medium">{activity.user ? activity.user.full_name : 'Sistema'}</span>
                     {' '}{activity.description}
                   </p>
                   <p className="text-xs text-gray-500">
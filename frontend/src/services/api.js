@@ -186,6 +186,10 @@ export const dashboardService = {
   
   getPriorityTrends: (params = {}) => 
     authAPI.get('/dashboard/priority-trends', { params }),
+  
+  // Server-Sent Events; EventSource cannot send the Authorization header
+  getStreamUrl: (token) => 
+    `${API_BASE_URL}/api/v1/dashboard/stream?token=${encodeURIComponent(token)}`,
 };
 
 // Settings API